@@ -181,11 +181,11 @@ class ProcessingPlugin(object):
 
     def openModeler(self):
         dlg = ModelerDialog()
-        dlg.update_model.connect(self.updateModel)
+        dlg.update_model.connect(lambda: self.updateModel(dlg.alg))
         dlg.show()
 
-    def updateModel(self):
-        algList.reloadProvider('model')
+    def updateModel(self, model):
+        algList.reloadAlgorithm('model', model.descriptionFile)
 
     def openResults(self):
         if self.resultsDock.isVisible():
@@ -46,6 +46,10 @@ class GdalAlgorithm(GeoAlgorithm):
     def __init__(self):
         GeoAlgorithm.__init__(self)
         self._icon = None
+        # only the external process is run in processAlgorithm(), so
+        # subclasses doing anything else there must set it to False
+        self.canRunInParallel = True
+        self.consoleCommands = None
 
     def getIcon(self):
         if self._icon is None:
@@ -55,7 +59,21 @@ class GdalAlgorithm(GeoAlgorithm):
     def getCustomParametersDialog(self):
         return GdalAlgorithmDialog(self)
 
+    def prepareExecution(self, feedback):
+        GeoAlgorithm.prepareExecution(self, feedback)
+        # commands use the layers of the project, and some of them are
+        # exported, so they are built here in the main thread, and
+        # processAlgorithm() only runs them
+        self.consoleCommands = self.exportedConsoleCommands()
+
     def processAlgorithm(self, feedback):
+        GdalUtils.runGdal(self.consoleCommands, feedback)
+
+    def exportedConsoleCommands(self):
+        """Returns the console commands of the algorithm, with the vector
+        layers of the project they use exported to a format supported by
+        OGR when needed.
+        """
         commands = self.getConsoleCommands()
         layers = dataobjects.getVectorLayers()
         supported = dataobjects.getSupportedOutputVectorLayerExtensions()
@@ -72,7 +90,7 @@ class GdalAlgorithm(GeoAlgorithm):
                         c = re.sub('["\']{}["\']'.format(fileName), "'" + exportedFileName + "'", c)
 
             commands[i] = c
-        GdalUtils.runGdal(commands, feedback)
+        return commands
 
     def shortHelp(self):
         helpPath = GdalUtils.gdalHelpPath()
@@ -31,6 +31,7 @@ __revision__ = '$Format:%H$'
 import os
 import subprocess
 import platform
+import threading
 
 from osgeo import gdal
 
@@ -55,6 +56,9 @@ class GdalUtils(object):
 
     supportedRasters = None
 
+    # console output of the last command run by each thread
+    console = threading.local()
+
     @staticmethod
     def runGdal(commands, feedback=None):
         if feedback is None:
@@ -108,11 +112,15 @@ class GdalUtils(object):
                     raise IOError(e.message + u'\nTried 5 times without success. Last iteration stopped after reading {} line(s).\nLast line(s):\n{}'.format(len(loglines), u'\n'.join(loglines[-10:])))
 
         ProcessingLog.addToLog(ProcessingLog.LOG_INFO, loglines)
-        GdalUtils.consoleOutput = loglines
+        GdalUtils.console.output = loglines
+        return loglines
 
     @staticmethod
     def getConsoleOutput():
-        return GdalUtils.consoleOutput
+        """Returns the console output of the last GDAL command run from
+        the calling thread. runGdal() also returns it.
+        """
+        return getattr(GdalUtils.console, 'output', [])
 
     @staticmethod
     def getSupportedRasters():
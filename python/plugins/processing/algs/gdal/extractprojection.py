@@ -44,6 +44,11 @@ class ExtractProjection(GdalAlgorithm):
     INPUT = 'INPUT'
     PRJ_FILE = 'PRJ_FILE'
 
+    def __init__(self):
+        GdalAlgorithm.__init__(self)
+        # files are written next to the input raster
+        self.canRunInParallel = False
+
     def getIcon(self):
         return QIcon(os.path.join(pluginPath, 'images', 'gdaltools', 'projection-export.png'))
 
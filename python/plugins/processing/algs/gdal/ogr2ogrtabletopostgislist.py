@@ -118,10 +118,13 @@ class Ogr2OgrTableToPostGisList(GdalAlgorithm):
         self.addParameter(ParameterString(self.OPTIONS,
                                           self.tr('Additional creation options'), '', optional=True))
 
-    def processAlgorithm(self, feedback):
+    def prepareExecution(self, feedback):
+        # credentials are asked for while the commands are built
         self.processing = True
-        GdalAlgorithm.processAlgorithm(self, feedback)
-        self.processing = False
+        try:
+            GdalAlgorithm.prepareExecution(self, feedback)
+        finally:
+            self.processing = False
 
     def getConsoleCommands(self):
         connection = self.DB_CONNECTIONS[self.getParameterValue(self.DATABASE)]
@@ -170,10 +170,13 @@ class Ogr2OgrToPostGisList(GdalAlgorithm):
         self.addParameter(ParameterString(self.OPTIONS,
                                           self.tr('Additional creation options'), '', optional=True))
 
-    def processAlgorithm(self, feedback):
+    def prepareExecution(self, feedback):
+        # credentials are asked for while the commands are built
         self.processing = True
-        GdalAlgorithm.processAlgorithm(self, feedback)
-        self.processing = False
+        try:
+            GdalAlgorithm.prepareExecution(self, feedback)
+        finally:
+            self.processing = False
 
     def getConsoleCommands(self):
         connection = self.getParameterValue(self.DATABASE)
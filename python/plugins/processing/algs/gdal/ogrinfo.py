@@ -68,10 +68,10 @@ class OgrInfo(GdalAlgorithm):
         return arguments
 
     def processAlgorithm(self, feedback):
-        GdalUtils.runGdal(self.getConsoleCommands(), feedback)
+        consoleOutput = GdalUtils.runGdal(self.consoleCommands, feedback)
         output = self.getOutputValue(self.OUTPUT)
         with open(output, 'w') as f:
             f.write('<pre>')
-            for s in GdalUtils.getConsoleOutput()[1:]:
+            for s in consoleOutput[1:]:
                 f.write(s)
             f.write('</pre>')
@@ -28,6 +28,7 @@ __copyright__ = '(C) 2012-2015, Victor Olaya'
 __revision__ = '$Format:%H$'
 
 import os
+import shutil
 import uuid
 import importlib
 
@@ -41,6 +42,7 @@ from processing.core.GeoAlgorithm import GeoAlgorithm
 from processing.core.ProcessingConfig import ProcessingConfig
 from processing.core.ProcessingLog import ProcessingLog
 from processing.core.GeoAlgorithmExecutionException import GeoAlgorithmExecutionException
+from processing.core.providercache import LazyDescription
 
 from processing.core.parameters import (getParameterFromString,
                                         ParameterVector,
@@ -61,13 +63,13 @@ from processing.core.outputs import (getOutputFromString,
 
 from .Grass7Utils import Grass7Utils
 
-from processing.tools import dataobjects, system
+from processing.tools import dataobjects, system, vector
 
 pluginPath = os.path.normpath(os.path.join(
     os.path.split(os.path.dirname(__file__))[0], os.pardir))
 
 
-class Grass7Algorithm(GeoAlgorithm):
+class Grass7Algorithm(LazyDescription, GeoAlgorithm):
 
     GRASS_OUTPUT_TYPE_PARAMETER = 'GRASS_OUTPUT_TYPE_PARAMETER'
     GRASS_MIN_AREA_PARAMETER = 'GRASS_MIN_AREA_PARAMETER'
@@ -78,15 +80,44 @@ class Grass7Algorithm(GeoAlgorithm):
 
     OUTPUT_TYPES = ['auto', 'point', 'line', 'area']
 
-    def __init__(self, descriptionfile):
+    # modules changing their input layers in GRASS, so those can not be
+    # reused by later executions. Algorithms with an ext module never
+    # reuse them either, since many of those edit their inputs in place
+    MODIFIED_INPUTS = ['r.category', 'r.colors', 'r.colors.stddev', 'r.null', 'r.quant',
+                       'r.support', 'v.build', 'v.distance', 'v.edit', 'v.rast.stats',
+                       'v.vect.stats', 'v.what.rast', 'v.what.vect']
+
+    # providers of the vector layers which can be linked with v.external
+    LINKED_PROVIDERS = ['ogr', 'postgres', 'spatialite']
+
+    # lines of the description file with the name and group
+    HEADER_LINES = 3
+
+    def __init__(self, descriptionfile, header=None):
+        """If the header lines of the description file are passed, the
+        rest of the file is only read when the parameters or outputs
+        of the algorithm are first needed.
+        """
         GeoAlgorithm.__init__(self)
         self.hardcodedStrings = []
         self.descriptionFile = descriptionfile
-        self.defineCharacteristicsFromFile()
+        if header is None:
+            self.defineCharacteristicsFromFile()
+        else:
+            self.defineHeader(header)
+            self.setPendingDefinition()
         self.numExportedLayers = 0
         self._icon = None
         self.uniqueSuffix = str(uuid.uuid4()).replace('-', '')
 
+        # GRASS location used by the current execution
+        self.session = None
+        self.existingSession = False
+
+        # each execution uses its own GRASS location, and only GRASS
+        # itself is run in processAlgorithm()
+        self.canRunInParallel = True
+
         # Use the ext mechanism
         name = self.commandLineName().replace('.', '_')[len('grass7:'):]
         try:
@@ -133,19 +164,19 @@ class Grass7Algorithm(GeoAlgorithm):
             pass
         return descs
 
+    def defineHeader(self, header):
+        self.grass7Name = header[0]
+        self.name = header[1]
+        self.i18n_name = QCoreApplication.translate("GrassAlgorithm", header[1])
+        if " - " not in self.name:
+            self.name = self.grass7Name + " - " + self.name
+            self.i18n_name = self.grass7Name + " - " + self.i18n_name
+        self.group = header[2]
+        self.i18n_group = QCoreApplication.translate("GrassAlgorithm", header[2])
+
     def defineCharacteristicsFromFile(self):
         with open(self.descriptionFile) as lines:
-            line = lines.readline().strip('\n').strip()
-            self.grass7Name = line
-            line = lines.readline().strip('\n').strip()
-            self.name = line
-            self.i18n_name = QCoreApplication.translate("GrassAlgorithm", line)
-            if " - " not in self.name:
-                self.name = self.grass7Name + " - " + self.name
-                self.i18n_name = self.grass7Name + " - " + self.i18n_name
-            line = lines.readline().strip('\n').strip()
-            self.group = line
-            self.i18n_group = QCoreApplication.translate("GrassAlgorithm", line)
+            self.defineHeader([lines.readline().strip('\n').strip() for i in range(self.HEADER_LINES)])
             hasRasterOutput = False
             hasVectorInput = False
             vectorOutputs = 0
@@ -235,7 +266,8 @@ class Grass7Algorithm(GeoAlgorithm):
             cellsize = 100
         return cellsize
 
-    def processAlgorithm(self, feedback):
+    def prepareExecution(self, feedback):
+        GeoAlgorithm.prepareExecution(self, feedback)
         if system.isWindows():
             path = Grass7Utils.grassPath()
             if path == '':
@@ -248,63 +280,114 @@ class Grass7Algorithm(GeoAlgorithm):
         self.outputCommands = []
         self.exportedLayers = {}
 
+        # The inputs are exported and the commands are built here, in
+        # the main thread, since they use the layers of the project and
+        # the map canvas. processAlgorithm() only runs GRASS.
+
         # If GRASS session has been created outside of this algorithm then
-        # get the list of layers loaded in GRASS otherwise start a new
-        # session
-        existingSession = Grass7Utils.sessionRunning
-        if existingSession:
-            self.exportedLayers = Grass7Utils.getSessionLayers()
+        # use it, one execution at a time. Otherwise take a location from
+        # the pool of sessions, which is not used by other executions
+        self.existingSession = Grass7Utils.session is not None
+        if self.existingSession:
+            self.session = Grass7Utils.session
         else:
-            Grass7Utils.startGrass7Session()
+            self.session = Grass7Utils.acquireSession(self.inputProjection())
 
-        # Handle ext functions for inputs/command/outputs
-        if self.module:
-            if hasattr(self.module, 'processInputs'):
-                func = getattr(self.module, 'processInputs')
-                func(self)
-            else:
-                self.processInputs()
+        try:
+            # layers loaded in GRASS by previous executions, which have
+            # not changed since. Algorithms which might change their inputs
+            # import them again, so the layers in the session stay unchanged
+            sessionLayers = self.session.getLayers()
+            if self.existingSession or self.reusesInputs():
+                self.exportedLayers = dict(sessionLayers)
+
+            # Handle ext functions for inputs/command/outputs
+            if self.module:
+                if hasattr(self.module, 'processInputs'):
+                    func = getattr(self.module, 'processInputs')
+                    func(self)
+                else:
+                    self.processInputs()
 
-            if hasattr(self.module, 'processCommand'):
-                func = getattr(self.module, 'processCommand')
-                func(self)
-            else:
-                self.processCommand()
+                if hasattr(self.module, 'processCommand'):
+                    func = getattr(self.module, 'processCommand')
+                    func(self)
+                else:
+                    self.processCommand()
 
-            if hasattr(self.module, 'processOutputs'):
-                func = getattr(self.module, 'processOutputs')
-                func(self)
+                if hasattr(self.module, 'processOutputs'):
+                    func = getattr(self.module, 'processOutputs')
+                    func(self)
+                else:
+                    self.processOutputs()
             else:
+                self.processInputs()
+                self.processCommand()
                 self.processOutputs()
-        else:
-            self.processInputs()
-            self.processCommand()
-            self.processOutputs()
 
-        # Run GRASS
-        loglines = []
-        loglines.append(self.tr('GRASS GIS 7 execution commands'))
-        for line in self.commands:
-            feedback.pushCommandInfo(line)
-            loglines.append(line)
-        if ProcessingConfig.getSetting(Grass7Utils.GRASS_LOG_COMMANDS):
-            ProcessingLog.addToLog(ProcessingLog.LOG_INFO, loglines)
-
-        Grass7Utils.executeGrass7(self.commands, feedback, self.outputCommands)
-
-        for out in self.outputs:
-            if isinstance(out, OutputHTML):
-                with open(self.getOutputFromName("rawoutput").value) as f:
-                    rawOutput = "".join(f.readlines())
-                with open(out.value, "w") as f:
-                    f.write("<pre>%s</pre>" % rawOutput)
+            # Keep only the imported inputs for the next executions using
+            # this location, and remove the rest of the layers once the
+            # outputs have been exported
+            if not self.existingSession:
+                self.keptLayers = dict(sessionLayers)
+                if self.reusesInputs():
+                    inputs = self.inputLayers()
+                    self.keptLayers.update((source, name) for source, name in self.exportedLayers.items()
+                                           if source in inputs)
+                command = self.session.removeLayersCommand(self.keptLayers.values())
+                self.commands.append(command)
+                self.outputCommands.append(command)
+        except:
+            self.releaseSession()
+            raise
 
+    def processAlgorithm(self, feedback):
+        try:
+            # Run GRASS
+            loglines = []
+            loglines.append(self.tr('GRASS GIS 7 execution commands'))
+            for line in self.commands:
+                feedback.pushCommandInfo(line)
+                loglines.append(line)
+            if ProcessingConfig.getSetting(Grass7Utils.GRASS_LOG_COMMANDS):
+                ProcessingLog.addToLog(ProcessingLog.LOG_INFO, loglines)
+
+            if self.existingSession:
+                with self.session.lock:
+                    Grass7Utils.executeGrass7(self.commands, feedback, self.outputCommands, self.session)
+            else:
+                Grass7Utils.executeGrass7(self.commands, feedback, self.outputCommands, self.session)
+            self.moveLinkedOutputs()
+
+            for out in self.outputs:
+                if isinstance(out, OutputHTML):
+                    with open(self.getOutputFromName("rawoutput").value) as f:
+                        rawOutput = "".join(f.readlines())
+                    with open(out.value, "w") as f:
+                        f.write("<pre>%s</pre>" % rawOutput)
+        except:
+            self.releaseSession()
+            raise
+
+    def finishExecution(self, feedback):
         # If the session has been created outside of this algorithm, add
-        # the new GRASS GIS 7 layers to it otherwise finish the session
-        if existingSession:
-            Grass7Utils.addSessionLayers(self.exportedLayers)
-        else:
-            Grass7Utils.endGrass7Session()
+        # the new GRASS GIS 7 layers to it
+        try:
+            if self.existingSession:
+                self.session.addLayers(self.exportedLayers)
+            else:
+                self.session.keepLayers(self.keptLayers)
+        finally:
+            self.releaseSession()
+        GeoAlgorithm.finishExecution(self, feedback)
+
+    def releaseSession(self):
+        """Returns the location used by the execution to the pool of
+        sessions, once it has finished or failed.
+        """
+        if self.session is not None and not self.existingSession:
+            Grass7Utils.releaseSession(self.session)
+        self.session = None
 
     def processInputs(self):
         """Prepare the GRASS import commands"""
@@ -379,6 +462,15 @@ class Grass7Algorithm(GeoAlgorithm):
 
     def processCommand(self):
         """Prepare the GRASS algorithm command"""
+        if self.linkedRasterOutputs():
+            # rasters created by the command are written as GeoTIFF files,
+            # which are then moved to the outputs instead of being exported
+            command = 'r.external.out'
+            command += ' directory="' + self.linkedOutputsFolder() + '"'
+            command += ' format=GTiff extension=tif'
+            command += ' options="TFW=YES,COMPRESS=LZW"'
+            self.commands.append(command)
+
         command = self.grass7Name
         command += ' ' + ' '.join(self.hardcodedStrings)
 
@@ -432,7 +524,10 @@ class Grass7Algorithm(GeoAlgorithm):
 
     def processOutputs(self):
         """Prepare the GRASS v.out.ogr commands"""
+        linkedOutputs = self.linkedRasterOutputs()
         for out in self.outputs:
+            if out in linkedOutputs:
+                continue
             if isinstance(out, OutputRaster):
                 filename = out.value
 
@@ -495,7 +590,48 @@ class Grass7Algorithm(GeoAlgorithm):
                 self.commands.append(command)
                 self.outputCommands.append(command)
 
+        if linkedOutputs:
+            self.commands.append('r.external.out -r')
+
+    def linkedRasterOutputs(self):
+        """Returns the raster outputs which are written directly by GRASS
+        with r.external.out, if linking is enabled.
+
+        Only GeoTIFF outputs of algorithms without an ext module, and whose
+        outputs are not post-processed, can be linked.
+        """
+        if not ProcessingConfig.getSetting(Grass7Utils.GRASS_LINK_EXTERNAL) \
+                or self.module or self.grass7Name in ['r.horizon', 'r.statistics']:
+            return []
+        return [out for out in self.outputs if isinstance(out, OutputRaster)
+                and os.path.splitext(out.value)[1].lower() in ['.tif', '.tiff']]
+
+    def linkedOutputsFolder(self):
+        folder = os.path.join(self.session.folder, 'external')
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        return folder
+
+    def moveLinkedOutputs(self):
+        """Moves the files written by r.external.out to the raster outputs.
+
+        The GRASS layers linked to them are left out of the session, since
+        their files are not where GRASS wrote them anymore.
+        """
+        for out in self.linkedRasterOutputs():
+            self.exportedLayers.pop(out.value, None)
+            filename = os.path.join(self.linkedOutputsFolder(), out.name + self.uniqueSuffix)
+            if not os.path.exists(filename + '.tif'):
+                raise GeoAlgorithmExecutionException(
+                    self.tr('GRASS GIS 7 did not write the output {0}. Check the '
+                            'GRASS GIS 7 console output for errors.').format(out.description))
+            shutil.move(filename + '.tif', out.value)
+            if os.path.exists(filename + '.tfw'):
+                shutil.move(filename + '.tfw', os.path.splitext(out.value)[0] + '.tfw')
+
     def exportVectorLayer(self, orgFilename):
+        if self.canLinkVectorLayer(orgFilename):
+            return self.linkVectorLayer(orgFilename)
 
         # TODO: improve this. We are now exporting if it is not a shapefile,
         # but the functionality of v.in.ogr could be used for this.
@@ -528,17 +664,50 @@ class Grass7Algorithm(GeoAlgorithm):
         command += ' --overwrite -o'
         return command
 
+    def canLinkVectorLayer(self, orgFilename):
+        """Returns True if a vector layer can be linked with v.external
+        instead of being imported with v.in.ogr.
+
+        Layers are imported when snapping is needed, since only v.in.ogr
+        does it, when only some of their features are used, and for
+        algorithms which might change their inputs, so the linked files
+        are not written.
+        """
+        if not ProcessingConfig.getSetting(Grass7Utils.GRASS_LINK_EXTERNAL) \
+                or not self.reusesInputs():
+            return False
+        snap = self.getParameterValue(self.GRASS_SNAP_TOLERANCE_PARAMETER)
+        if snap is not None and float(snap) >= 0:
+            return False
+        layer = dataobjects.getObjectFromUri(orgFilename, False)
+        if not layer:
+            return os.path.isfile(orgFilename)
+        if layer.dataProvider().name() not in self.LINKED_PROVIDERS or layer.subsetString():
+            return False
+        useSelection = ProcessingConfig.getSetting(ProcessingConfig.USE_SELECTED)
+        return not (useSelection and layer.selectedFeatureCount() != 0)
+
+    def linkVectorLayer(self, orgFilename):
+        destFilename = self.getTempFilename()
+        self.exportedLayers[orgFilename] = destFilename
+        command = 'v.external'
+        command += ' input=' + vector.ogrConnectionString(orgFilename)
+        command += ' layer="' + vector.ogrLayerName(orgFilename) + '"'
+        command += ' output=' + destFilename
+        command += ' --overwrite -o'
+        return command
+
     def setSessionProjectionFromProject(self, commands):
-        if not Grass7Utils.projectionSet and iface:
+        if self.session.projection is None and iface:
             proj4 = iface.mapCanvas().mapSettings().destinationCrs().toProj4()
             command = 'g.proj'
             command += ' -c'
             command += ' proj4="' + proj4 + '"'
             self.commands.append(command)
-            Grass7Utils.projectionSet = True
+            self.session.projection = proj4
 
     def setSessionProjectionFromLayer(self, layer, commands):
-        if not Grass7Utils.projectionSet:
+        if self.session.projection is None:
             qGisLayer = dataobjects.getObjectFromUri(layer)
             if qGisLayer:
                 proj4 = str(qGisLayer.crs().toProj4())
@@ -546,7 +715,43 @@ class Grass7Algorithm(GeoAlgorithm):
                 command += ' -c'
                 command += ' proj4="' + proj4 + '"'
                 self.commands.append(command)
-                Grass7Utils.projectionSet = True
+                self.session.projection = proj4
+
+    def reusesInputs(self):
+        """Returns True if the layers imported in a session by the
+        algorithm can be used by later executions, which is only the
+        case if it does not change them.
+        """
+        return self.module is None and self.grass7Name not in self.MODIFIED_INPUTS
+
+    def inputLayers(self):
+        """Returns the sources of the input layers of the algorithm, in
+        the order they are imported.
+        """
+        layers = []
+        for param in self.parameters:
+            if param.value is None or param.value == '':
+                continue
+            if isinstance(param, (ParameterRaster, ParameterVector)):
+                layers.append(param.value)
+            elif isinstance(param, ParameterMultipleInput) and \
+                    param.datatype in [dataobjects.TYPE_RASTER,
+                                       dataobjects.TYPE_VECTOR_ANY,
+                                       dataobjects.TYPE_VECTOR_LINE,
+                                       dataobjects.TYPE_VECTOR_POLYGON,
+                                       dataobjects.TYPE_VECTOR_POINT]:
+                layers.extend(param.value.split(';'))
+        return layers
+
+    def inputProjection(self):
+        """Returns the projection of the first input layer, which will be
+        the one of the GRASS location, or None if it has no input layers.
+        """
+        for layer in self.inputLayers():
+            qGisLayer = dataobjects.getObjectFromUri(layer)
+            if qGisLayer:
+                return str(qGisLayer.crs().toProj4())
+        return None
 
     def exportRasterLayer(self, layer):
         destFilename = self.getTempFilename()
@@ -31,6 +31,7 @@ from qgis.core import QgsApplication
 from processing.core.ProcessingConfig import ProcessingConfig, Setting
 from processing.core.AlgorithmProvider import AlgorithmProvider
 from processing.core.ProcessingLog import ProcessingLog
+from processing.core.providercache import providerCache
 from .Grass7Utils import Grass7Utils
 from .Grass7Algorithm import Grass7Algorithm
 from processing.tools.system import isWindows, isMac
@@ -66,6 +67,11 @@ class Grass7AlgorithmProvider(AlgorithmProvider):
             Grass7Utils.GRASS_HELP_PATH,
             self.tr('Location of GRASS docs'),
             Grass7Utils.grassHelpPath()))
+        ProcessingConfig.addSetting(Setting(
+            self.name(),
+            Grass7Utils.GRASS_LINK_EXTERNAL,
+            self.tr('Link inputs and write raster outputs directly (v.external, r.external.out)'),
+            False))
 
     def unload(self):
         AlgorithmProvider.unload(self)
@@ -74,24 +80,35 @@ class Grass7AlgorithmProvider(AlgorithmProvider):
         ProcessingConfig.removeSetting(Grass7Utils.GRASS_LOG_COMMANDS)
         ProcessingConfig.removeSetting(Grass7Utils.GRASS_LOG_CONSOLE)
         ProcessingConfig.removeSetting(Grass7Utils.GRASS_HELP_PATH)
+        ProcessingConfig.removeSetting(Grass7Utils.GRASS_LINK_EXTERNAL)
+        Grass7Utils.clearSessionPool()
 
     def createAlgsList(self):
+        # algorithms are created from the cached first lines of their
+        # description files, and read the rest when they are first used
         self.preloadedAlgs = []
         folder = Grass7Utils.grassDescriptionPath()
-        for descriptionFile in os.listdir(folder):
-            if descriptionFile.endswith('txt'):
-                try:
-                    alg = Grass7Algorithm(os.path.join(folder, descriptionFile))
-                    if alg.name.strip() != '':
-                        self.preloadedAlgs.append(alg)
-                    else:
-                        ProcessingLog.addToLog(
-                            ProcessingLog.LOG_ERROR,
-                            self.tr('Could not open GRASS GIS 7 algorithm: {0}').format(descriptionFile))
-                except Exception as e:
+        descriptions, stale = providerCache.descriptions(self.id(), folder,
+                                                         Grass7Algorithm.HEADER_LINES)
+        stale = set(stale)
+        newAlgs = []
+        for descriptionFile, header in descriptions:
+            try:
+                alg = Grass7Algorithm(descriptionFile, header)
+                if alg.name.strip() != '':
+                    self.preloadedAlgs.append(alg)
+                    if descriptionFile in stale:
+                        newAlgs.append(alg)
+                else:
                     ProcessingLog.addToLog(
                         ProcessingLog.LOG_ERROR,
-                        self.tr('Could not open GRASS GIS 7 algorithm: {0}\n{1}').format(descriptionFile, str(e)))
+                        self.tr('Could not open GRASS GIS 7 algorithm: {0}').format(descriptionFile))
+            except Exception as e:
+                ProcessingLog.addToLog(
+                    ProcessingLog.LOG_ERROR,
+                    self.tr('Could not open GRASS GIS 7 algorithm: {0}\n{1}').format(descriptionFile, str(e)))
+        providerCache.defineInBackground(self.id(), newAlgs,
+                                         self.tr('Could not open GRASS GIS 7 algorithm: {0}\n{1}'))
         self.preloadedAlgs.append(nviz7())
 
     def _loadAlgorithms(self):
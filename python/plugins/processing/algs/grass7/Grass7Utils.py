@@ -31,14 +31,101 @@ import stat
 import shutil
 import subprocess
 import os
+import re
+import tempfile
+import threading
 from qgis.core import QgsApplication
 from qgis.PyQt.QtCore import QCoreApplication
 from processing.core.ProcessingConfig import ProcessingConfig
 from processing.core.ProcessingLog import ProcessingLog
-from processing.tools.system import userFolder, isWindows, isMac, tempFolder, mkdir
+from processing.tools.system import isWindows, isMac, tempFolder, mkdir
+from processing.tools import dataobjects
 from processing.tests.TestData import points
 
 
+class Grass7Session(object):
+
+    """A temporary GRASS location, with its own gisrc and batch job
+    files, used by a single GRASS execution at a time, so several of
+    them can run in parallel.
+
+    The location keeps the layers imported by previous executions, so
+    they are not imported again if they have not changed since.
+    """
+
+    LOCATION = 'temp_location'
+
+    def __init__(self):
+        # a unique folder, so several QGIS instances sharing the same
+        # temporary folder do not use the same location
+        self.folder = tempfile.mkdtemp(prefix='session', dir=Grass7Utils.grassDataFolder())
+        self.lock = threading.Lock()
+        self.projection = None
+        self.layers = {}
+        Grass7Utils.createTempMapset(self.locationFolder())
+
+    def locationFolder(self):
+        return os.path.join(self.folder, self.LOCATION)
+
+    def gisrcFilename(self):
+        return os.path.join(self.folder, 'processing.gisrc7')
+
+    def batchJobFilename(self):
+        return os.path.join(self.folder, 'grass7_batch_job.sh')
+
+    def scriptFilename(self):
+        return os.path.join(self.folder, 'grass7_script.bat')
+
+    def canBeReused(self, projection):
+        """Returns True if the location has the given projection, and no
+        mask left by a previous execution.
+        """
+        mapset = os.path.join(self.locationFolder(), 'PERMANENT')
+        return (self.projection is not None and self.projection == projection and
+                os.path.exists(os.path.join(mapset, 'PROJ_INFO')) and
+                not os.path.exists(os.path.join(mapset, 'cell', 'MASK')))
+
+    def getLayers(self):
+        """Returns the layers imported by previous executions which have
+        not changed since, as a dict of GRASS layer names by source.
+        """
+        return dict((source, name) for source, (stamp, name) in self.layers.items()
+                    if stamp is not None and stamp == Grass7Utils.layerStamp(source))
+
+    def addLayers(self, layers):
+        for source, name in layers.items():
+            stamp = Grass7Utils.layerStamp(source)
+            if stamp is not None:
+                self.layers[source] = (stamp, name)
+
+    def keepLayers(self, layers):
+        """Keeps only the given layers for later executions, as a dict of
+        GRASS layer names by source.
+        """
+        self.layers = {}
+        self.addLayers(layers)
+
+    def removeLayersCommand(self, keptNames):
+        """Returns the GRASS command removing all the layers of the
+        location but the ones with the given names, so outputs and
+        intermediate layers of an execution do not pile up in the pool.
+        """
+        command = 'g.remove -f -e type=raster,raster_3d,vector pattern=".*"'
+        keptNames = sorted(set(keptNames))
+        if keptNames:
+            command += ' exclude="^({})$"'.format('|'.join(re.escape(name) for name in keptNames))
+        return command
+
+    def reset(self):
+        shutil.rmtree(self.locationFolder(), True)
+        self.projection = None
+        self.layers = {}
+        Grass7Utils.createTempMapset(self.locationFolder())
+
+    def remove(self):
+        shutil.rmtree(self.folder, True)
+
+
 class Grass7Utils(object):
 
     GRASS_REGION_XMIN = 'GRASS7_REGION_XMIN'
@@ -50,32 +137,35 @@ class Grass7Utils(object):
     GRASS_LOG_COMMANDS = 'GRASS7_LOG_COMMANDS'
     GRASS_LOG_CONSOLE = 'GRASS7_LOG_CONSOLE'
     GRASS_HELP_PATH = 'GRASS_HELP_PATH'
+    GRASS_LINK_EXTERNAL = 'GRASS7_LINK_EXTERNAL'
+
+    # session started with startGrass7Session, shared by all the GRASS
+    # executions until endGrass7Session is called
+    session = None
+
+    # maximum number of idle sessions kept for later executions
+    SESSION_POOL_SIZE = 4
 
-    sessionRunning = False
-    sessionLayers = {}
-    projectionSet = False
+    sessionPool = []
+    sessionPoolLock = threading.Lock()
 
     isGrass7Installed = False
 
     version = None
 
     @staticmethod
-    def grassBatchJobFilename():
+    def grassBatchJobFilename(session):
         '''This is used in Linux. This is the batch job that we assign to
         GRASS_BATCH_JOB and then call GRASS and let it do the work
         '''
-        filename = 'grass7_batch_job.sh'
-        batchfile = os.path.join(userFolder(), filename)
-        return batchfile
+        return session.batchJobFilename()
 
     @staticmethod
-    def grassScriptFilename():
+    def grassScriptFilename(session):
         '''This is used in windows. We create a script that initializes
         GRASS and then uses grass commands
         '''
-        filename = 'grass7_script.bat'
-        filename = os.path.join(userFolder(), filename)
-        return filename
+        return session.scriptFilename()
 
     @staticmethod
     def installedVersion(run=False):
@@ -140,16 +230,16 @@ class Grass7Utils(object):
         return os.path.join(os.path.dirname(__file__), 'description')
 
     @staticmethod
-    def createGrass7Script(commands):
+    def createGrass7Script(commands, session):
         folder = Grass7Utils.grassPath()
 
-        script = Grass7Utils.grassScriptFilename()
-        gisrc = os.path.join(userFolder(), 'processing.gisrc7')  # FIXME: use temporary file
+        script = Grass7Utils.grassScriptFilename(session)
+        gisrc = session.gisrcFilename()
 
         # Temporary gisrc file
         with open(gisrc, 'w') as output:
-            location = 'temp_location'
-            gisdbase = Grass7Utils.grassDataFolder()
+            location = session.LOCATION
+            gisdbase = session.folder
 
             output.write('GISDBASE: ' + gisdbase + '\n')
             output.write('LOCATION_NAME: ' + location + '\n')
@@ -187,18 +277,12 @@ class Grass7Utils(object):
             output.write('exit\n')
 
     @staticmethod
-    def createGrass7BatchJobFileFromGrass7Commands(commands):
-        with open(Grass7Utils.grassBatchJobFilename(), 'w') as fout:
+    def createGrass7BatchJobFileFromGrass7Commands(commands, session):
+        with open(Grass7Utils.grassBatchJobFilename(session), 'w') as fout:
             for command in commands:
                 Grass7Utils.writeCommand(fout, command)
             fout.write('exit')
 
-    @staticmethod
-    def grassMapsetFolder():
-        folder = os.path.join(Grass7Utils.grassDataFolder(), 'temp_location')
-        mkdir(folder)
-        return folder
-
     @staticmethod
     def grassDataFolder():
         tempfolder = os.path.join(tempFolder(), 'grassdata')
@@ -206,16 +290,15 @@ class Grass7Utils(object):
         return tempfolder
 
     @staticmethod
-    def createTempMapset():
+    def createTempMapset(folder):
         '''Creates a temporary location and mapset(s) for GRASS data
-        processing. A minimal set of folders and files is created in the
-        system's default temporary directory. The settings files are
-        written with sane defaults, so GRASS can do its work. The mapset
-        projection will be set later, based on the projection of the first
-        input image or vector
+        processing in the given folder. A minimal set of folders and
+        files is created. The settings files are written with sane
+        defaults, so GRASS can do its work. The mapset projection will
+        be set later, based on the projection of the first input image
+        or vector
         '''
 
-        folder = Grass7Utils.grassMapsetFolder()
         mkdir(os.path.join(folder, 'PERMANENT'))
         mkdir(os.path.join(folder, 'PERMANENT', '.tmp'))
         Grass7Utils.writeGrass7Window(os.path.join(folder, 'PERMANENT', 'DEFAULT_WIND'))
@@ -252,35 +335,46 @@ class Grass7Utils(object):
             out.write('t-b resol:  1\n')
 
     @staticmethod
-    def prepareGrass7Execution(commands):
+    def prepareGrass7Execution(commands, session):
         env = os.environ.copy()
 
         if isWindows():
-            Grass7Utils.createGrass7Script(commands)
-            command = ['cmd.exe', '/C ', Grass7Utils.grassScriptFilename()]
+            Grass7Utils.createGrass7Script(commands, session)
+            command = ['cmd.exe', '/C ', Grass7Utils.grassScriptFilename(session)]
         else:
-            gisrc = os.path.join(userFolder(), 'processing.gisrc7')
-            env['GISRC'] = gisrc
+            env['GISRC'] = session.gisrcFilename()
             env['GRASS_MESSAGE_FORMAT'] = 'plain'
-            env['GRASS_BATCH_JOB'] = Grass7Utils.grassBatchJobFilename()
+            env['GRASS_BATCH_JOB'] = Grass7Utils.grassBatchJobFilename(session)
             if 'GISBASE' in env:
                 del env['GISBASE']
-            Grass7Utils.createGrass7BatchJobFileFromGrass7Commands(commands)
-            os.chmod(Grass7Utils.grassBatchJobFilename(), stat.S_IEXEC | stat.S_IREAD | stat.S_IWRITE)
+            Grass7Utils.createGrass7BatchJobFileFromGrass7Commands(commands, session)
+            os.chmod(Grass7Utils.grassBatchJobFilename(session), stat.S_IEXEC | stat.S_IREAD | stat.S_IWRITE)
             if isMac() and os.path.exists(os.path.join(Grass7Utils.grassPath(), 'grass.sh')):
                 command = os.path.join(Grass7Utils.grassPath(), 'grass.sh') + ' ' \
-                    + os.path.join(Grass7Utils.grassMapsetFolder(), 'PERMANENT')
+                    + os.path.join(session.locationFolder(), 'PERMANENT')
             else:
-                command = Grass7Utils.command + ' ' + os.path.join(Grass7Utils.grassMapsetFolder(), 'PERMANENT')
+                command = Grass7Utils.command + ' ' + os.path.join(session.locationFolder(), 'PERMANENT')
 
         return command, env
 
     @staticmethod
-    def executeGrass7(commands, feedback, outputCommands=None):
+    def executeGrass7(commands, feedback, outputCommands=None, session=None):
+        """Runs GRASS commands in the location of the given session. If
+        no session is passed, one is taken from the pool for this
+        execution only.
+        """
+        if session is None:
+            session = Grass7Utils.acquireSession()
+            try:
+                Grass7Utils.executeGrass7(commands, feedback, outputCommands, session)
+            finally:
+                Grass7Utils.releaseSession(session)
+            return
+
         loglines = []
         loglines.append(Grass7Utils.tr('GRASS GIS 7 execution console output'))
         grassOutDone = False
-        command, grassenv = Grass7Utils.prepareGrass7Execution(commands)
+        command, grassenv = Grass7Utils.prepareGrass7Execution(commands, session)
         with subprocess.Popen(
             command,
             shell=True,
@@ -309,7 +403,7 @@ class Grass7Utils(object):
         # commands again.
 
         if not grassOutDone and outputCommands:
-            command, grassenv = Grass7Utils.prepareGrass7Execution(outputCommands)
+            command, grassenv = Grass7Utils.prepareGrass7Execution(outputCommands, session)
             with subprocess.Popen(
                 command,
                 shell=True,
@@ -341,28 +435,90 @@ class Grass7Utils(object):
     # structure
     @staticmethod
     def startGrass7Session():
-        if not Grass7Utils.sessionRunning:
-            Grass7Utils.createTempMapset()
-            Grass7Utils.sessionRunning = True
+        if Grass7Utils.session is None:
+            Grass7Utils.session = Grass7Session()
 
     # End session by removing the temporary GRASS mapset and all
     # the layers.
     @staticmethod
     def endGrass7Session():
-        shutil.rmtree(Grass7Utils.grassMapsetFolder(), True)
-        Grass7Utils.sessionRunning = False
-        Grass7Utils.sessionLayers = {}
-        Grass7Utils.projectionSet = False
+        if Grass7Utils.session is not None:
+            Grass7Utils.session.remove()
+            Grass7Utils.session = None
 
     @staticmethod
-    def getSessionLayers():
-        return Grass7Utils.sessionLayers
+    def acquireSession(projection=None):
+        """Returns an idle session from the pool for a GRASS execution,
+        or a new one if there is none. Sessions whose location already
+        has the given projection are preferred, since the layers imported
+        in them can be reused.
+        """
+        with Grass7Utils.sessionPoolLock:
+            pool = Grass7Utils.sessionPool
+            for session in pool:
+                if projection is not None and session.canBeReused(projection):
+                    pool.remove(session)
+                    return session
+            session = pool.pop(0) if pool else None
+        if session is None:
+            return Grass7Session()
+        session.reset()
+        return session
 
     @staticmethod
-    def addSessionLayers(exportedLayers):
-        Grass7Utils.sessionLayers = dict(
-            list(Grass7Utils.sessionLayers.items()) +
-            list(exportedLayers.items()))
+    def releaseSession(session):
+        """Returns a session to the pool once its execution has finished.
+        """
+        with Grass7Utils.sessionPoolLock:
+            pool = Grass7Utils.sessionPool
+            pool.append(session)
+            removed = pool[:-Grass7Utils.SESSION_POOL_SIZE] if len(pool) > Grass7Utils.SESSION_POOL_SIZE else []
+            del pool[:len(removed)]
+        for session in removed:
+            session.remove()
+
+    @staticmethod
+    def clearSessionPool():
+        with Grass7Utils.sessionPoolLock:
+            pool = list(Grass7Utils.sessionPool)
+            del Grass7Utils.sessionPool[:]
+        for session in pool:
+            session.remove()
+
+    @staticmethod
+    def layerStamp(source):
+        """Returns a fingerprint of the content of a layer source, so the
+        layer is imported again in a session when it changes, or None if
+        it can not be told, in which case it is always imported again.
+
+        Database layers are never fingerprinted, since their tables can
+        change without any file changing.
+        """
+        subset = ''
+        layer = dataobjects.getObjectFromUri(source, False)
+        if layer is not None:
+            if ProcessingConfig.getSetting(ProcessingConfig.USE_SELECTED) \
+                    and getattr(layer, 'selectedFeatureCount', lambda: 0)() != 0:
+                return None
+            subset = getattr(layer, 'subsetString', lambda: '')()
+        path = source.split('|')[0]
+        try:
+            info = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        stamp = [source, subset, info.st_mtime, info.st_size]
+        # attributes of shapefiles and uncommitted changes of GeoPackage
+        # and SpatiaLite files are kept in other files
+        base, ext = os.path.splitext(path)
+        if ext.lower() == '.shp':
+            related = [base + '.dbf', base + '.shx']
+        else:
+            related = [path + '-wal']
+        for filename in related:
+            if os.path.exists(filename):
+                info = os.stat(filename)
+                stamp.extend([info.st_mtime, info.st_size])
+        return tuple(stamp)
 
     @staticmethod
     def checkGrass7IsInstalled(ignorePreviousState=False):
@@ -31,7 +31,6 @@ __revision__ = '$Format:%H$'
 
 from processing.core.parameters import getParameterFromString
 from processing.tools.system import isWindows
-from ..Grass7Utils import Grass7Utils
 from os import path
 
 
@@ -139,7 +138,7 @@ def regroupRasters(alg, field, groupField, subgroupField=None, extFile=None):
             extFileName = alg.getParameterValue(ext)
             if extFileName:
                 shortFileName = path.basename(extFileName)
-                destPath = path.join(Grass7Utils.grassMapsetFolder(),
+                destPath = path.join(alg.session.locationFolder(),
                                      'PERMANENT',
                                      'group', group.value,
                                      'subgroup', subgroup.value,
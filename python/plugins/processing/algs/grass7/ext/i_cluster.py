@@ -28,7 +28,6 @@ __revision__ = '$Format:%H$'
 
 from .i import regroupRasters, file2Output, moveFile, verifyRasterNum
 from os import path
-from ..Grass7Utils import Grass7Utils
 
 
 def checkParameterValuesBeforeExecuting(alg):
@@ -54,6 +53,6 @@ def processCommand(alg):
     alg.addOutput(reportFile)
 
     # Find Grass directory
-    interSig = path.join(Grass7Utils.grassMapsetFolder(), 'PERMANENT', 'group', group, 'subgroup', subgroup, 'sig', shortSigFile)
+    interSig = path.join(alg.session.locationFolder(), 'PERMANENT', 'group', group, 'subgroup', subgroup, 'sig', shortSigFile)
     moveFile(alg, interSig, origSigFile)
     alg.setOutputValue('signaturefile', origSigFile)
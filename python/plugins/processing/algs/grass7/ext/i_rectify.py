@@ -28,7 +28,6 @@ __revision__ = '$Format:%H$'
 
 from .i import copyFile, multipleOutputDir
 from qgis.core import QgsCoordinateReferenceSystem
-from ..Grass7Utils import Grass7Utils
 from processing.core.parameters import getParameterFromString
 from os import path
 
@@ -63,7 +62,7 @@ def processCommand(alg):
     # Handle POINT File
     gcp = alg.getParameterFromName('gcp')
     extFileName = gcp.value
-    destPath = path.join(Grass7Utils.grassMapsetFolder(),
+    destPath = path.join(alg.session.locationFolder(),
                          'PERMANENT',
                          'group', group.value,
                          'POINTS')
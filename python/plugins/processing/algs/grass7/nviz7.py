@@ -131,7 +131,6 @@ class nviz7(GeoAlgorithm):
         if elevation is None and vector is None:
             command += ' -q'
         commands.append(command)
-        Grass7Utils.createTempMapset()
         Grass7Utils.executeGrass7(commands, feedback)
 
     def getTempFilename(self):
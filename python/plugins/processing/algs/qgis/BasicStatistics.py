@@ -33,8 +33,7 @@ from qgis.PyQt.QtGui import QIcon
 
 from qgis.core import (QgsStatisticalSummary,
                        QgsStringStatisticalSummary,
-                       QgsDateTimeStatisticalSummary,
-                       QgsFeatureRequest)
+                       QgsDateTimeStatisticalSummary)
 
 from processing.core.GeoAlgorithm import GeoAlgorithm
 from processing.core.parameters import ParameterTable
@@ -121,37 +120,34 @@ class BasicStatisticsForField(GeoAlgorithm):
 
         output_file = self.getOutputValue(self.OUTPUT_HTML_FILE)
 
-        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry).setSubsetOfAttributes([field_name], layer.fields())
-        features = vector.features(layer, request)
+        column = vector.layerColumns(layer, field_name)[field_name]
 
         data = []
         data.append(self.tr('Analyzed layer: {}').format(layer.name()))
         data.append(self.tr('Analyzed field: {}').format(field_name))
 
         if field.isNumeric():
-            data.extend(self.calcNumericStats(features, feedback, field))
+            data.extend(self.calcNumericStats(column, feedback, field))
         elif field.type() in (QVariant.Date, QVariant.Time, QVariant.DateTime):
-            data.extend(self.calcDateTimeStats(features, feedback, field))
+            data.extend(self.calcDateTimeStats(column, feedback, field))
         else:
-            data.extend(self.calcStringStats(features, feedback, field))
+            data.extend(self.calcStringStats(column, feedback, field))
 
         self.createHTML(output_file, data)
 
-    def calcNumericStats(self, features, feedback, field):
-        count = len(features)
-        total = 100.0 / float(count)
+    def calcNumericStats(self, column, feedback, field):
+        count = len(column)
+        missing = int(column.nulls.sum())
         stat = QgsStatisticalSummary()
-        for current, ft in enumerate(features):
-            stat.addVariant(ft[field.name()])
-            feedback.setProgress(int(current * total))
-        stat.finalize()
+        stat.calculate(column.validValues().astype(float).tolist())
+        feedback.setProgress(100)
 
         cv = stat.stDev() / stat.mean() if stat.mean() != 0 else 0
 
         self.setOutputValue(self.COUNT, stat.count())
         self.setOutputValue(self.UNIQUE, stat.variety())
-        self.setOutputValue(self.EMPTY, stat.countMissing())
-        self.setOutputValue(self.FILLED, count - stat.countMissing())
+        self.setOutputValue(self.EMPTY, missing)
+        self.setOutputValue(self.FILLED, count - missing)
         self.setOutputValue(self.MIN, stat.min())
         self.setOutputValue(self.MAX, stat.max())
         self.setOutputValue(self.RANGE, stat.range())
@@ -169,7 +165,7 @@ class BasicStatisticsForField(GeoAlgorithm):
         data = []
         data.append(self.tr('Count: {}').format(stat.count()))
         data.append(self.tr('Unique values: {}').format(stat.variety()))
-        data.append(self.tr('NULL (missing) values: {}').format(stat.countMissing()))
+        data.append(self.tr('NULL (missing) values: {}').format(missing))
         data.append(self.tr('Minimum value: {}').format(stat.min()))
         data.append(self.tr('Maximum value: {}').format(stat.max()))
         data.append(self.tr('Range: {}').format(stat.range()))
@@ -185,14 +181,11 @@ class BasicStatisticsForField(GeoAlgorithm):
         data.append(self.tr('Interquartile Range (IQR): {}').format(stat.interQuartileRange()))
         return data
 
-    def calcStringStats(self, features, feedback, field):
-        count = len(features)
-        total = 100.0 / float(count)
+    def calcStringStats(self, column, feedback, field):
+        count = len(column)
         stat = QgsStringStatisticalSummary()
-        for current, ft in enumerate(features):
-            stat.addValue(ft[field.name()])
-            feedback.setProgress(int(current * total))
-        stat.finalize()
+        stat.calculateFromVariants(column.toList())
+        feedback.setProgress(100)
 
         self.setOutputValue(self.COUNT, stat.count())
         self.setOutputValue(self.UNIQUE, stat.countDistinct())
@@ -216,14 +209,11 @@ class BasicStatisticsForField(GeoAlgorithm):
 
         return data
 
-    def calcDateTimeStats(self, features, feedback, field):
-        count = len(features)
-        total = 100.0 / float(count)
+    def calcDateTimeStats(self, column, feedback, field):
+        count = len(column)
         stat = QgsDateTimeStatisticalSummary()
-        for current, ft in enumerate(features):
-            stat.addValue(ft[field.name()])
-            feedback.setProgress(int(current * total))
-        stat.finalize()
+        stat.calculate(column.toList())
+        feedback.setProgress(100)
 
         self.setOutputValue(self.COUNT, stat.count())
         self.setOutputValue(self.UNIQUE, stat.countDistinct())
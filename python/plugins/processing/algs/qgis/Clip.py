@@ -109,31 +109,18 @@ class Clip(GeoAlgorithm):
 
                 tested_feature_ids.add(in_feat.id())
 
-                if not engine.intersects(in_feat.geometry().geometry()):
-                    continue
-
-                if not engine.contains(in_feat.geometry().geometry()):
-                    cur_geom = in_feat.geometry()
-                    new_geom = combined_clip_geom.intersection(cur_geom)
-                    if new_geom.wkbType() == QgsWkbTypes.Unknown or QgsWkbTypes.flatType(new_geom.geometry().wkbType()) == QgsWkbTypes.GeometryCollection:
-                        int_com = in_feat.geometry().combine(new_geom)
-                        int_sym = in_feat.geometry().symDifference(new_geom)
-                        new_geom = int_com.difference(int_sym)
-                else:
-                    # clip geometry totally contains feature geometry, so no need to perform intersection
-                    new_geom = in_feat.geometry()
-
-                try:
-                    out_feat = QgsFeature()
-                    out_feat.setGeometry(new_geom)
-                    out_feat.setAttributes(in_feat.attributes())
-                    writer.addFeature(out_feat)
-                except:
-                    ProcessingLog.addToLog(ProcessingLog.LOG_ERROR,
-                                           self.tr('Feature geometry error: One or more '
-                                                   'output features ignored due to '
-                                                   'invalid geometry.'))
-                    continue
+                new_geom = self.clip(in_feat.geometry(), engine, combined_clip_geom)
+                if new_geom is not None:
+                    try:
+                        out_feat = QgsFeature()
+                        out_feat.setGeometry(new_geom)
+                        out_feat.setAttributes(in_feat.attributes())
+                        writer.addFeature(out_feat)
+                    except:
+                        ProcessingLog.addToLog(ProcessingLog.LOG_ERROR,
+                                               self.tr('Feature geometry error: One or more '
+                                                       'output features ignored due to '
+                                                       'invalid geometry.'))
 
                 if single_clip_feature:
                     feedback.setProgress(int(current * total))
@@ -143,3 +130,22 @@ class Clip(GeoAlgorithm):
                 feedback.setProgress(100.0 * i / len(clip_geoms))
 
         del writer
+
+    def clip(self, geom, engine, combined_clip_geom):
+        """Returns the part of a geometry inside the clip geometry, or None
+        if they do not intersect. engine is a prepared geometry engine for
+        the clip geometry.
+        """
+        if not engine.intersects(geom.geometry()):
+            return None
+
+        if not engine.contains(geom.geometry()):
+            new_geom = combined_clip_geom.intersection(geom)
+            if new_geom.wkbType() == QgsWkbTypes.Unknown or QgsWkbTypes.flatType(new_geom.geometry().wkbType()) == QgsWkbTypes.GeometryCollection:
+                int_com = geom.combine(new_geom)
+                int_sym = geom.symDifference(new_geom)
+                new_geom = int_com.difference(int_sym)
+        else:
+            # clip geometry totally contains feature geometry, so no need to perform intersection
+            new_geom = geom
+        return new_geom
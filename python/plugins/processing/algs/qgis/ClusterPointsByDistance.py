@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    ClusterPointsByDistance.py
+    ---------------------
+    Date                 : April 2017
+    Copyright            : (C) 2017 by the QGIS Development Team
+    Email                : qgis-developer at lists dot osgeo dot org
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Development Team'
+__date__ = 'April 2017'
+__copyright__ = '(C) 2017, the QGIS Development Team'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+from qgis.PyQt.QtCore import QVariant
+from qgis.core import QgsField, QgsFeature, QgsFeatureRequest
+from processing.core.GeoAlgorithm import GeoAlgorithm
+from processing.core.parameters import ParameterVector
+from processing.core.parameters import ParameterNumber
+from processing.core.outputs import OutputVector
+from processing.tools import dataobjects, vector
+
+
+class ClusterPointsByDistance(GeoAlgorithm):
+
+    INPUT = 'INPUT'
+    DISTANCE = 'DISTANCE'
+    OUTPUT = 'OUTPUT'
+
+    def defineCharacteristics(self):
+        self.name, self.i18n_name = self.trAlgorithm('Cluster points by distance')
+        self.group, self.i18n_group = self.trAlgorithm('Vector analysis tools')
+
+        self.addParameter(ParameterVector(self.INPUT,
+                                          self.tr('Input layer'), [dataobjects.TYPE_VECTOR_POINT]))
+        self.addParameter(ParameterNumber(self.DISTANCE,
+                                          self.tr('Maximum distance between points of a cluster'),
+                                          0.0, 999999999.999990, 1.0))
+        self.addOutput(OutputVector(self.OUTPUT, self.tr('Clusters'), datatype=[dataobjects.TYPE_VECTOR_POINT]))
+
+    def processAlgorithm(self, feedback):
+        layer = dataobjects.getObjectFromUri(self.getParameterValue(self.INPUT))
+        distance = self.getParameterValue(self.DISTANCE)
+        output = self.getOutputFromName(self.OUTPUT)
+
+        # only coordinates are kept in memory, and the layer is read
+        # again to write the output features
+        features = vector.features(layer, QgsFeatureRequest().setSubsetOfAttributes([]))
+        total = 50.0 / len(features) if len(features) > 0 else 1
+        xs = []
+        ys = []
+        for current, f in enumerate(features):
+            if f.hasGeometry():
+                point = f.geometry().centroid().asPoint()
+                xs.append(point.x())
+                ys.append(point.y())
+            feedback.setProgress(int(current * total))
+
+        clusters, sizes = vector.clusterPoints(xs, ys, distance)
+
+        fields = layer.fields()
+        fields.append(QgsField('CLUSTER_ID', QVariant.Int))
+        fields.append(QgsField('CLUSTER_SIZE', QVariant.Int))
+        writer = output.getVectorWriter(fields, layer.wkbType(), layer.crs())
+
+        outFeat = QgsFeature()
+        i = 0
+        for current, f in enumerate(vector.features(layer)):
+            attrs = f.attributes()
+            if f.hasGeometry():
+                attrs.extend([clusters[i], sizes[clusters[i]]])
+                i += 1
+            else:
+                attrs.extend([None, None])
+            outFeat.setGeometry(f.geometry())
+            outFeat.setAttributes(attrs)
+            writer.addFeature(outFeat)
+            feedback.setProgress(50 + int(current * total))
+
+        del writer
@@ -16,7 +16,6 @@
 *                                                                         *
 ***************************************************************************
 """
-from builtins import range
 
 __author__ = 'Piotr Pociask'
 __date__ = 'May 2014'
@@ -26,16 +25,18 @@ __copyright__ = '(C) 2014, Piotr Pociask'
 
 __revision__ = '$Format:%H$'
 
-from qgis.core import QgsFeatureRequest, QgsFeature, QgsGeometry, QgsWkbTypes
+import numpy
+
+from qgis.core import QgsFeature, QgsGeometry, QgsPoint, QgsWkbTypes
 from processing.core.GeoAlgorithm import GeoAlgorithm
 from processing.core.GeoAlgorithmExecutionException import GeoAlgorithmExecutionException
 from processing.core.parameters import ParameterVector
 from processing.core.parameters import ParameterNumber
 from processing.core.parameters import ParameterBoolean
 from processing.core.outputs import OutputVector
-from processing.tools import dataobjects
-import processing
-from math import sqrt
+from processing.tools import dataobjects, vector
+
+from . import voronoi
 
 
 class ConcaveHull(GeoAlgorithm):
@@ -66,77 +67,117 @@ class ConcaveHull(GeoAlgorithm):
         holes = self.getParameterValue(self.HOLES)
         no_multigeom = self.getParameterValue(self.NO_MULTIGEOMETRY)
 
-        # Delaunay triangulation from input point layer
+        # Unique input points
+        feedback.setProgressText(self.tr('Reading points...'))
+        points = {}
+        features = vector.features(layer)
+        total = 20.0 / len(features) if len(features) > 0 else 1
+        for current, feat in enumerate(features):
+            geom = feat.geometry()
+            if geom.isNull():
+                continue
+            if geom.isMultipart():
+                parts = geom.asMultiPoint()
+            else:
+                parts = [geom.asPoint()]
+            for point in parts:
+                points[(point.x(), point.y())] = True
+            feedback.setProgress(int(current * total))
+        points = list(points.keys())
+        if len(points) < 3:
+            raise GeoAlgorithmExecutionException(
+                self.tr('Input file should contain at least 3 points. Choose '
+                        'another file and try again.'))
+
+        # Delaunay triangulation of the input points, as an array with
+        # the coordinates of the vertices of each triangle
         feedback.setProgressText(self.tr('Creating Delaunay triangles...'))
-        delone_triangles = processing.runalg("qgis:delaunaytriangulation", layer, None)['OUTPUT']
-        delaunay_layer = processing.getObject(delone_triangles)
+        triangles = self.triangulate(points)
+        if len(triangles) == 0:
+            raise GeoAlgorithmExecutionException(self.tr('No Delaunay triangles created.'))
+        feedback.setProgress(50)
 
-        # Get max edge length from Delaunay triangles
+        # Keep the triangles whose longest edge is not longer than
+        # alpha * max_length
         feedback.setProgressText(self.tr('Computing edges max length...'))
-        features = delaunay_layer.getFeatures()
-        if len(features) == 0:
-            raise GeoAlgorithmExecutionException(self.tr('No Delaunay triangles created.'))
+        edges = triangles - numpy.roll(triangles, -1, axis=1)
+        lengths = numpy.hypot(edges[:, :, 0], edges[:, :, 1]).max(axis=1)
+        kept = triangles[lengths <= alpha * lengths.max()]
 
-        counter = 50. / len(features)
-        lengths = []
-        edges = {}
-        for feat in features:
-            line = feat.geometry().asPolygon()[0]
-            for i in range(len(line) - 1):
-                lengths.append(sqrt(line[i].sqrDist(line[i + 1])))
-            edges[feat.id()] = max(lengths[-3:])
-            feedback.setProgress(feat.id() * counter)
-        max_length = max(lengths)
-
-        # Get features with longest edge longer than alpha*max_length
-        feedback.setProgressText(self.tr('Removing features...'))
-        counter = 50. / len(edges)
-        i = 0
-        ids = []
-        for id, max_len in list(edges.items()):
-            if max_len > alpha * max_length:
-                ids.append(id)
-            feedback.setProgress(50 + i * counter)
-            i += 1
-
-        # Remove features
-        delaunay_layer.selectByIds(ids)
-        delaunay_layer.startEditing()
-        delaunay_layer.deleteSelectedFeatures()
-        delaunay_layer.commitChanges()
-
-        # Dissolve all Delaunay triangles
+        # Dissolve the kept triangles
         feedback.setProgressText(self.tr('Dissolving Delaunay triangles...'))
-        dissolved = processing.runalg("qgis:dissolve", delaunay_layer,
-                                      True, None, None)['OUTPUT']
-        dissolved_layer = processing.getObject(dissolved)
+        polygons = []
+        for triangle in kept:
+            ring = [QgsPoint(x, y) for (x, y) in triangle]
+            ring.append(ring[0])
+            polygons.append(QgsGeometry.fromPolygon([ring]))
+        geom = QgsGeometry.unaryUnion(polygons)
+        feedback.setProgress(90)
 
         # Save result
         feedback.setProgressText(self.tr('Saving data...'))
-        feat = QgsFeature()
-        dissolved_layer.getFeatures(QgsFeatureRequest().setFilterFid(0)).nextFeature(feat)
         writer = self.getOutputFromName(self.OUTPUT).getVectorWriter(
             layer.fields().toList(), QgsWkbTypes.Polygon, layer.crs())
-        geom = feat.geometry()
-        if no_multigeom and geom.isMultipart():
+        if geom.isEmpty():
+            parts = []
+        elif geom.isMultipart():
+            parts = geom.asMultiPolygon()
+        else:
+            parts = [geom.asPolygon()]
+        if not holes:
+            # Delete holes
+            parts = [part[:1] for part in parts]
+        parts = [self.normalizePolygon(part) for part in parts]
+        if no_multigeom:
             # Only singlepart geometries are allowed
-            geom_list = geom.asMultiPolygon()
-            for single_geom_list in geom_list:
-                single_feature = QgsFeature()
-                single_geom = QgsGeometry.fromPolygon(single_geom_list)
-                if not holes:
-                    # Delete holes
-                    deleted = True
-                    while deleted:
-                        deleted = single_geom.deleteRing(1)
-                single_feature.setGeometry(single_geom)
-                writer.addFeature(single_feature)
+            geometries = [QgsGeometry.fromPolygon(part) for part in parts]
+        elif len(parts) > 1:
+            geometries = [QgsGeometry.fromMultiPolygon(parts)]
         else:
-            # Multipart geometries are allowed
-            if not holes:
-                # Delete holes
-                deleted = True
-                while deleted:
-                    deleted = geom.deleteRing(1)
+            geometries = [QgsGeometry.fromPolygon(part) for part in parts]
+        # The hull does not derive from a single input feature, so the
+        # output has the fields of the input layer with empty values
+        for geometry in geometries:
+            feat = QgsFeature()
+            feat.setGeometry(geometry)
             writer.addFeature(feat)
         del writer
+
+    def triangulate(self, points):
+        """Returns an array of shape (n, 3, 2) with the coordinates of the
+        vertices of the Delaunay triangles of the given points.
+
+        The triangulation is computed by GEOS, or by the Fortune sweep
+        algorithm of the voronoi module if GEOS does not support it.
+        """
+        multi_point = QgsGeometry.fromMultiPoint([QgsPoint(x, y) for (x, y) in points])
+        result = multi_point.delaunayTriangulation()
+        if not result.isEmpty():
+            return numpy.array([[(p.x(), p.y()) for p in triangle.asPolygon()[0][:3]]
+                                for triangle in result.asGeometryCollection()],
+                               dtype=float).reshape(-1, 3, 2)
+
+        c = voronoi.Context()
+        c.triangulate = True
+        voronoi.voronoi(voronoi.SiteList([voronoi.Site(x, y) for (x, y) in points]), c)
+        if len(c.triangles) == 0:
+            return numpy.zeros((0, 3, 2))
+        return numpy.array(points, dtype=float)[numpy.array(c.triangles)]
+
+    def normalizePolygon(self, polygon):
+        """Returns the rings of a polygon with a clockwise shell and
+        counterclockwise holes, each one starting at its lowest vertex,
+        so the output does not depend on how GEOS builds the union.
+        """
+        rings = []
+        for i, ring in enumerate(polygon):
+            vertices = ring[:-1]
+            area = sum(p.x() * q.y() - q.x() * p.y()
+                       for p, q in zip(vertices, vertices[1:] + vertices[:1]))
+            if (area > 0) == (i == 0):
+                vertices.reverse()
+            first = min(range(len(vertices)),
+                        key=lambda j: (vertices[j].y(), vertices[j].x()))
+            vertices = vertices[first:] + vertices[:first]
+            rings.append(vertices + vertices[:1])
+        return rings
@@ -77,5 +77,5 @@ class CreateConstantRaster(GeoAlgorithm):
                          layer.crs(),
                          geoTransform
                          )
-        w.matrix.fill(value)
+        w.fill(value)
         w.close()
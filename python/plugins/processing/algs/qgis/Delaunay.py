@@ -16,7 +16,6 @@
 *                                                                         *
 ***************************************************************************
 """
-from builtins import next
 
 __author__ = 'Victor Olaya'
 __date__ = 'August 2012'
@@ -31,11 +30,13 @@ import os
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant
 
-from qgis.core import QgsField, QgsFeatureRequest, QgsFeature, QgsGeometry, QgsPoint, QgsWkbTypes
+from qgis.core import QgsField, QgsFeature, QgsGeometry, QgsPoint, QgsWkbTypes
 
 from processing.core.GeoAlgorithm import GeoAlgorithm
 from processing.core.GeoAlgorithmExecutionException import GeoAlgorithmExecutionException
+from processing.core.ProcessingLog import ProcessingLog
 from processing.core.parameters import ParameterVector
+from processing.core.parameters import ParameterSelection
 from processing.core.outputs import OutputVector
 from processing.tools import dataobjects, vector
 
@@ -47,6 +48,7 @@ pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 class Delaunay(GeoAlgorithm):
 
     INPUT = 'INPUT'
+    METHOD = 'METHOD'
     OUTPUT = 'OUTPUT'
 
     def getIcon(self):
@@ -58,6 +60,10 @@ class Delaunay(GeoAlgorithm):
 
         self.addParameter(ParameterVector(self.INPUT,
                                           self.tr('Input layer'), [dataobjects.TYPE_VECTOR_POINT]))
+        self.methods = [self.tr('GEOS'),
+                        self.tr('Fortune sweep (slower)')]
+        self.addParameter(ParameterSelection(self.METHOD,
+                                             self.tr('Triangulation method'), self.methods, 0))
 
         self.addOutput(OutputVector(self.OUTPUT,
                                     self.tr('Delaunay triangulation'),
@@ -66,6 +72,7 @@ class Delaunay(GeoAlgorithm):
     def processAlgorithm(self, feedback):
         layer = dataobjects.getObjectFromUri(
             self.getParameterValue(self.INPUT))
+        method = self.getParameterValue(self.METHOD)
 
         fields = [QgsField('POINTA', QVariant.Double, '', 24, 15),
                   QgsField('POINTB', QVariant.Double, '', 24, 15),
@@ -74,10 +81,9 @@ class Delaunay(GeoAlgorithm):
         writer = self.getOutputFromName(self.OUTPUT).getVectorWriter(fields,
                                                                      QgsWkbTypes.Polygon, layer.crs())
 
-        pts = []
-        ptDict = {}
+        # index of the first point found at each location
+        pts = {}
         ptNdx = -1
-        c = voronoi.Context()
         features = vector.features(layer)
         total = 100.0 / len(features)
         for current, inFeat in enumerate(features):
@@ -88,51 +94,65 @@ class Delaunay(GeoAlgorithm):
                 points = geom.asMultiPoint()
             else:
                 points = [geom.asPoint()]
-            for n, point in enumerate(points):
-                x = point.x()
-                y = point.y()
-                pts.append((x, y))
+            for point in points:
                 ptNdx += 1
-                ptDict[ptNdx] = (inFeat.id(), n)
+                pts.setdefault((point.x(), point.y()), ptNdx)
             feedback.setProgress(int(current * total))
 
-        if len(pts) < 3:
+        if ptNdx < 2:
             raise GeoAlgorithmExecutionException(
                 self.tr('Input file should contain at least 3 points. Choose '
                         'another file and try again.'))
 
-        uniqueSet = set(item for item in pts)
-        ids = [pts.index(item) for item in uniqueSet]
-        sl = voronoi.SiteList([voronoi.Site(*i) for i in uniqueSet])
-        c.triangulate = True
-        voronoi.voronoi(sl, c)
-        triangles = c.triangles
-        feat = QgsFeature()
+        triangles = None
+        if method == 0:
+            triangles = self.geosTriangles(pts)
+            if triangles is None:
+                ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
+                                       self.tr('GEOS could not triangulate the points, using the Fortune algorithm instead'))
+        if triangles is None:
+            triangles = self.fortuneTriangles(pts)
 
-        total = 100.0 / len(triangles)
+        feat = QgsFeature()
+        total = 100.0 / len(triangles) if len(triangles) > 0 else 1
         for current, triangle in enumerate(triangles):
-            indices = list(triangle)
-            indices.append(indices[0])
-            polygon = []
-            attrs = []
-            step = 0
-            for index in indices:
-                fid, n = ptDict[ids[index]]
-                request = QgsFeatureRequest().setFilterFid(fid)
-                inFeat = next(layer.getFeatures(request))
-                geom = QgsGeometry(inFeat.geometry())
-                if geom.isMultipart():
-                    point = QgsPoint(geom.asMultiPoint()[n])
-                else:
-                    point = QgsPoint(geom.asPoint())
-                polygon.append(point)
-                if step <= 3:
-                    attrs.append(ids[index])
-                step += 1
-            feat.setAttributes(attrs)
-            geometry = QgsGeometry().fromPolygon([polygon])
-            feat.setGeometry(geometry)
+            polygon = [QgsPoint(*vertex) for vertex in triangle]
+            polygon.append(polygon[0])
+            feat.setAttributes([pts[vertex] for vertex in triangle])
+            feat.setGeometry(QgsGeometry.fromPolygon([polygon]))
             writer.addFeature(feat)
             feedback.setProgress(int(current * total))
 
         del writer
+
+    def geosTriangles(self, pts):
+        """Returns the triangles as lists with the coordinates of their
+        vertices, computed by GEOS from a single multipoint geometry, or
+        None if GEOS does not support Delaunay triangulation.
+
+        Triangles are counterclockwise, start at their first input point
+        and are sorted by point index, so the output does not depend on
+        the order in which GEOS returns them.
+        """
+        multiPoint = QgsGeometry.fromMultiPoint([QgsPoint(x, y) for (x, y) in pts])
+        result = multiPoint.delaunayTriangulation()
+        if result.isEmpty():
+            return None
+
+        triangles = []
+        for triangle in result.asGeometryCollection():
+            vertices = [(p.x(), p.y()) for p in triangle.asPolygon()[0][:3]]
+            (ax, ay), (bx, by), (cx, cy) = vertices
+            if (bx - ax) * (cy - ay) - (by - ay) * (cx - ax) < 0:
+                vertices.reverse()
+            first = min(range(3), key=lambda i: pts[vertices[i]])
+            triangles.append(vertices[first:] + vertices[:first])
+        triangles.sort(key=lambda triangle: [pts[vertex] for vertex in triangle])
+        return triangles
+
+    def fortuneTriangles(self, pts):
+        sites = list(pts.keys())
+        c = voronoi.Context()
+        c.triangulate = True
+        voronoi.voronoi(voronoi.SiteList([voronoi.Site(*i) for i in sites]), c)
+        return [[sites[index] for index in triangle] for triangle in c.triangles]
@@ -25,9 +25,10 @@ __copyright__ = '(C) 2010, Michael Minn'
 
 __revision__ = '$Format:%H$'
 
-from qgis.core import QgsFeatureRequest
+from qgis.core import QgsGeometry
 from processing.core.GeoAlgorithm import GeoAlgorithm
 from processing.core.parameters import ParameterVector
+from processing.core.parameters import ParameterNumber
 from processing.core.outputs import OutputVector
 from processing.tools import dataobjects, vector
 
@@ -35,6 +36,7 @@ from processing.tools import dataobjects, vector
 class DeleteDuplicateGeometries(GeoAlgorithm):
 
     INPUT = 'INPUT'
+    TOLERANCE = 'TOLERANCE'
     OUTPUT = 'OUTPUT'
 
     def defineCharacteristics(self):
@@ -43,11 +45,17 @@ class DeleteDuplicateGeometries(GeoAlgorithm):
 
         self.addParameter(ParameterVector(self.INPUT,
                                           self.tr('Input layer')))
+        tolerance_param = ParameterNumber(self.TOLERANCE,
+                                          self.tr('Snapping tolerance (0 to compare exact geometries)'),
+                                          0.0, None, 0.0)
+        tolerance_param.isAdvanced = True
+        self.addParameter(tolerance_param)
         self.addOutput(OutputVector(self.OUTPUT, self.tr('Cleaned')))
 
     def processAlgorithm(self, feedback):
         layer = dataobjects.getObjectFromUri(
             self.getParameterValue(self.INPUT))
+        tolerance = float(self.getParameterValue(self.TOLERANCE) or 0)
 
         fields = layer.fields()
 
@@ -55,26 +63,51 @@ class DeleteDuplicateGeometries(GeoAlgorithm):
                                                                      layer.wkbType(), layer.crs())
 
         features = vector.features(layer)
+        total = 100.0 / len(features) if len(features) > 0 else 1
 
-        total = 100.0 / len(features)
-        geoms = dict()
+        # Geometries are bucketed by their bounding box, so the expensive
+        # GEOS comparison only runs against the (few) already written
+        # geometries sharing the same key. Only geometries that are kept
+        # are stored, everything else is streamed straight to the writer.
+        buckets = {}
         for current, f in enumerate(features):
-            geoms[f.id()] = f.geometry()
             feedback.setProgress(int(current * total))
 
-        cleaned = dict(geoms)
+            if not f.hasGeometry():
+                writer.addFeature(f)
+                continue
 
-        for i, g in list(geoms.items()):
-            for j in list(cleaned.keys()):
-                if i == j or i not in cleaned:
-                    continue
-                if g.isGeosEqual(cleaned[j]):
-                    del cleaned[j]
+            geom = f.geometry()
+            if tolerance > 0:
+                geom = snapToGrid(geom, tolerance)
 
-        total = 100.0 / len(cleaned)
-        request = QgsFeatureRequest().setFilterFids(list(cleaned.keys()))
-        for current, f in enumerate(layer.getFeatures(request)):
+            key = geometryHashKey(geom)
+            candidates = buckets.setdefault(key, [])
+            if any(geom.isGeosEqual(other) for other in candidates):
+                continue
+
+            candidates.append(geom)
             writer.addFeature(f)
-            feedback.setProgress(int(current * total))
 
         del writer
+
+
+def snapToGrid(geom, tolerance):
+    """Returns a copy of geom with every vertex snapped to a regular
+    grid of the given spacing.
+    """
+    snapped = QgsGeometry(geom)
+    for i in range(snapped.geometry().nCoordinates()):
+        point = snapped.vertexAt(i)
+        snapped.moveVertex(round(point.x() / tolerance) * tolerance,
+                           round(point.y() / tolerance) * tolerance,
+                           i)
+    return snapped
+
+
+def geometryHashKey(geom):
+    """Returns a hashable key which is identical for all geometries that
+    could be equal according to QgsGeometry.isGeosEqual.
+    """
+    bbox = geom.boundingBox()
+    return (bbox.xMinimum(), bbox.yMinimum(), bbox.xMaximum(), bbox.yMaximum())
@@ -29,13 +29,15 @@ import os
 
 from qgis.PyQt.QtGui import QIcon
 
-from qgis.core import QgsFeatureRequest, QgsFeature, QgsGeometry, QgsWkbTypes
+from qgis.core import QgsFeature, QgsWkbTypes
 from processing.core.ProcessingLog import ProcessingLog
 from processing.core.GeoAlgorithm import GeoAlgorithm
 from processing.core.parameters import ParameterVector
 from processing.core.outputs import OutputVector
 from processing.tools import dataobjects, vector
 
+from . import overlay
+
 pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 
 
@@ -71,21 +73,12 @@ class Difference(GeoAlgorithm):
                                                layerA.crs())
 
         outFeat = QgsFeature()
-        index = vector.spatialindex(layerB)
+        cacheB = overlay.FeatureCache.fromLayer(layerB, attributes=False)
         selectionA = vector.features(layerA)
-        total = 100.0 / len(selectionA)
-        for current, inFeatA in enumerate(selectionA):
-            geom = inFeatA.geometry()
-            diff_geom = QgsGeometry(geom)
-            attrs = inFeatA.attributes()
-            intersections = index.intersects(geom.boundingBox())
-
-            request = QgsFeatureRequest().setFilterFids(intersections).setSubsetOfAttributes([])
-            for inFeatB in layerB.getFeatures(request):
-                tmpGeom = inFeatB.geometry()
-                if diff_geom.intersects(tmpGeom):
-                    diff_geom = QgsGeometry(diff_geom.difference(tmpGeom))
-
+        total = 100.0 / len(selectionA) if len(selectionA) > 0 else 1
+        results = map(
+            lambda f: (overlay.difference(f.geometry(), cacheB), f.attributes()), selectionA)
+        for current, (diff_geom, attrs) in enumerate(results):
             try:
                 outFeat.setGeometry(diff_geom)
                 outFeat.setAttributes(attrs)
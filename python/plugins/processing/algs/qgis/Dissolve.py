@@ -50,6 +50,7 @@ class Dissolve(GeoAlgorithm):
     OUTPUT = 'OUTPUT'
     FIELD = 'FIELD'
     DISSOLVE_ALL = 'DISSOLVE_ALL'
+    VALIDATE = 'VALIDATE'
 
     def getIcon(self):
         return QIcon(os.path.join(pluginPath, 'images', 'ftools', 'dissolve.png'))
@@ -64,11 +65,14 @@ class Dissolve(GeoAlgorithm):
                                            self.tr('Dissolve all (do not use fields)'), True))
         self.addParameter(ParameterTableField(Dissolve.FIELD,
                                               self.tr('Unique ID fields'), Dissolve.INPUT, optional=True, multiple=True))
+        self.addParameter(ParameterBoolean(Dissolve.VALIDATE,
+                                           self.tr('Check validity of input geometries'), True))
         self.addOutput(OutputVector(Dissolve.OUTPUT, self.tr('Dissolved')))
 
     def processAlgorithm(self, feedback):
         useField = not self.getParameterValue(Dissolve.DISSOLVE_ALL)
         field_names = self.getParameterValue(Dissolve.FIELD)
+        validate = self.getParameterValue(Dissolve.VALIDATE)
         vlayerA = dataobjects.getObjectFromUri(
             self.getParameterValue(Dissolve.INPUT))
 
@@ -78,24 +82,31 @@ class Dissolve(GeoAlgorithm):
                 vlayerA.wkbType(),
                 vlayerA.crs())
 
-        outFeat = QgsFeature()
-        features = vector.features(vlayerA)
-        total = 100.0 / len(features)
-
         if not useField:
-            first = True
-            # we dissolve geometries in blocks using unaryUnion
-            geom_queue = []
-            for current, inFeat in enumerate(features):
-                feedback.setProgress(int(current * total))
-                if first:
-                    outFeat.setAttributes(inFeat.attributes())
-                    first = False
-
-                tmpInGeom = inFeat.geometry()
-                if tmpInGeom.isNull() or tmpInGeom.isEmpty():
-                    continue
+            self.dissolveAll(vlayerA, writer, validate, feedback)
+        else:
+            self.dissolveByFields(vlayerA, field_names, writer, validate, feedback)
+
+        del writer
 
+    def dissolveAll(self, layer, writer, validate, feedback):
+        outFeat = QgsFeature()
+        features = vector.features(layer)
+        total = 50.0 / len(features) if len(features) > 0 else 1
+
+        first = True
+        geometries = []
+        for current, inFeat in enumerate(features):
+            feedback.setProgress(int(current * total))
+            if first:
+                outFeat.setAttributes(inFeat.attributes())
+                first = False
+
+            tmpInGeom = inFeat.geometry()
+            if tmpInGeom.isNull() or tmpInGeom.isEmpty():
+                continue
+
+            if validate:
                 errors = tmpInGeom.validateGeometry()
                 if len(errors) != 0:
                     for error in errors:
@@ -107,38 +118,35 @@ class Dissolve(GeoAlgorithm):
                                                error.what())
                     continue
 
-                geom_queue.append(tmpInGeom)
+            geometries.append(tmpInGeom)
 
-                if len(geom_queue) > 10000:
-                    # queue too long, combine it
-                    try:
-                        temp_output_geometry = QgsGeometry.unaryUnion(geom_queue)
-                        geom_queue = [temp_output_geometry]
-                    except:
-                        raise GeoAlgorithmExecutionException(
-                            self.tr('Geometry exception while dissolving'))
+        feedback.setProgressText(self.tr('Dissolving geometries...'))
+        try:
+            outFeat.setGeometry(vector.unionGeometries(geometries))
+        except:
+            raise GeoAlgorithmExecutionException(
+                self.tr('Geometry exception while dissolving'))
 
-            try:
-                outFeat.setGeometry(QgsGeometry.unaryUnion(geom_queue))
-            except:
-                raise GeoAlgorithmExecutionException(
-                    self.tr('Geometry exception while dissolving'))
+        writer.addFeature(outFeat)
 
-            writer.addFeature(outFeat)
-        else:
-            field_indexes = [vlayerA.fields().lookupField(f) for f in field_names.split(';')]
+    def dissolveByFields(self, layer, field_names, writer, validate, feedback):
+        features = vector.features(layer)
+        total = 50.0 / len(features) if len(features) > 0 else 1
+        field_indexes = [layer.fields().lookupField(f) for f in field_names.split(';')]
 
-            attribute_dict = {}
-            geometry_dict = defaultdict(lambda: [])
+        attribute_dict = {}
+        geometry_dict = defaultdict(lambda: [])
 
-            for inFeat in features:
-                attrs = inFeat.attributes()
+        for current, inFeat in enumerate(features):
+            feedback.setProgress(int(current * total))
+            attrs = inFeat.attributes()
 
-                index_attrs = tuple([attrs[i] for i in field_indexes])
+            index_attrs = tuple([attrs[i] for i in field_indexes])
 
-                tmpInGeom = QgsGeometry(inFeat.geometry())
-                if tmpInGeom and tmpInGeom.isEmpty():
-                    continue
+            tmpInGeom = QgsGeometry(inFeat.geometry())
+            if tmpInGeom and tmpInGeom.isEmpty():
+                continue
+            if validate:
                 errors = tmpInGeom.validateGeometry()
                 if len(errors) != 0:
                     for error in errors:
@@ -149,26 +157,24 @@ class Dissolve(GeoAlgorithm):
                                                        'geometry: ') +
                                                error.what())
 
-                if index_attrs not in attribute_dict:
-                    # keep attributes of first feature
-                    attribute_dict[index_attrs] = attrs
+            if index_attrs not in attribute_dict:
+                # keep attributes of first feature
+                attribute_dict[index_attrs] = attrs
 
-                geometry_dict[index_attrs].append(tmpInGeom)
+            geometry_dict[index_attrs].append(tmpInGeom)
 
-            nFeat = len(attribute_dict)
-
-            nElement = 0
-            for key, value in list(geometry_dict.items()):
-                outFeat = QgsFeature()
-                nElement += 1
-                feedback.setProgress(int(nElement * 100 / nFeat))
-                try:
-                    tmpOutGeom = QgsGeometry.unaryUnion(value)
-                except:
-                    raise GeoAlgorithmExecutionException(
-                        self.tr('Geometry exception while dissolving'))
-                outFeat.setGeometry(tmpOutGeom)
-                outFeat.setAttributes(attribute_dict[key])
-                writer.addFeature(outFeat)
-
-        del writer
+        # Small groups are dissolved at once, while large groups are split
+        # into partitions of nearby geometries
+        feedback.setProgressText(self.tr('Dissolving geometries...'))
+        nFeat = len(geometry_dict)
+        for nElement, (key, value) in enumerate(list(geometry_dict.items())):
+            feedback.setProgress(50 + int(nElement * 50 / nFeat))
+            try:
+                tmpOutGeom = vector.unionGeometries(value)
+            except:
+                raise GeoAlgorithmExecutionException(
+                    self.tr('Geometry exception while dissolving'))
+            outFeat = QgsFeature()
+            outFeat.setGeometry(tmpOutGeom)
+            outFeat.setAttributes(attribute_dict[key])
+            writer.addFeature(outFeat)
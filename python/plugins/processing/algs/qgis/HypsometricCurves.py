@@ -186,30 +186,23 @@ class HypsometricCurves(GeoAlgorithm):
 
         minValue = d.min()
         maxValue = d.max()
-        startValue = minValue
-        tmpValue = minValue + step
-        while startValue < maxValue:
-            out[tmpValue] = ((startValue <= d) & (d < tmpValue)).sum()
-            startValue = tmpValue
-            tmpValue += step
+
+        # Classes are [minValue + i * step, minValue + (i + 1) * step),
+        # each one keyed by its upper bound. All cells are binned at once
+        # and the accumulated area is obtained with a cumulative sum.
+        nClasses = int(numpy.ceil((maxValue - minValue) / float(step)))
+        classes = numpy.floor((d - minValue) / float(step)).astype(numpy.int64)
+        counts = numpy.bincount(classes[classes < nClasses],
+                                minlength=nClasses)[:nClasses]
 
         if percentage:
             multiplier = 100.0 / len(d.flat)
         else:
             multiplier = pX * pY
 
-        for k, v in list(out.items()):
-            out[k] = v * multiplier
-
-        prev = None
-        for i in sorted(out.items()):
-            if prev is None:
-                out[i[0]] = i[1]
-            else:
-                out[i[0]] = i[1] + out[prev]
-            prev = i[0]
-
-        writer = vector.TableWriter(fName, 'utf-8', [self.tr('Area'), self.tr('Elevation')])
-        for i in sorted(out.items()):
-            writer.addRecord([i[1], i[0]])
-        del writer
+        areas = numpy.cumsum(counts * multiplier)
+        for i, area in enumerate(areas):
+            out[minValue + (i + 1) * step] = area
+
+        with vector.TableWriter(fName, 'utf-8', [self.tr('Area'), self.tr('Elevation')]) as writer:
+            writer.addRecords([i[1], i[0]] for i in sorted(out.items()))
@@ -29,7 +29,7 @@ import os
 
 from qgis.PyQt.QtGui import QIcon
 
-from qgis.core import QgsFeatureRequest, QgsFeature, QgsGeometry, QgsWkbTypes
+from qgis.core import QgsFeature, QgsGeometry, QgsWkbTypes
 
 from processing.core.GeoAlgorithm import GeoAlgorithm
 from processing.core.ProcessingLog import ProcessingLog
@@ -37,6 +37,8 @@ from processing.core.parameters import ParameterVector
 from processing.core.outputs import OutputVector
 from processing.tools import dataobjects, vector
 
+from . import overlay
+
 pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 
 wkbTypeGroups = {
@@ -78,49 +80,58 @@ class Intersection(GeoAlgorithm):
         writer = self.getOutputFromName(self.OUTPUT).getVectorWriter(fields,
                                                                      geomType, vlayerA.crs())
         outFeat = QgsFeature()
-        index = vector.spatialindex(vlayerB)
+        cacheB = overlay.FeatureCache.fromLayer(vlayerB)
         selectionA = vector.features(vlayerA)
-        total = 100.0 / len(selectionA)
-        for current, inFeatA in enumerate(selectionA):
+        total = 100.0 / len(selectionA) if len(selectionA) > 0 else 1
+        results = map(lambda f: self.intersect(f, cacheB), selectionA)
+        for current, outputs in enumerate(results):
             feedback.setProgress(int(current * total))
-            geom = inFeatA.geometry()
-            atMapA = inFeatA.attributes()
-            intersects = index.intersects(geom.boundingBox())
-            request = QgsFeatureRequest().setFilterFids(intersects)
-
-            engine = None
-            if len(intersects) > 0:
-                # use prepared geometries for faster intersection tests
-                engine = QgsGeometry.createGeometryEngine(geom.geometry())
-                engine.prepareGeometry()
-
-            for inFeatB in vlayerB.getFeatures(request):
-                tmpGeom = inFeatB.geometry()
-                if engine.intersects(tmpGeom.geometry()):
-                    atMapB = inFeatB.attributes()
-                    int_geom = QgsGeometry(geom.intersection(tmpGeom))
-                    if int_geom.wkbType() == QgsWkbTypes.Unknown or QgsWkbTypes.flatType(int_geom.geometry().wkbType()) == QgsWkbTypes.GeometryCollection:
-                        int_com = geom.combine(tmpGeom)
-                        int_geom = QgsGeometry()
-                        if int_com:
-                            int_sym = geom.symDifference(tmpGeom)
-                            int_geom = QgsGeometry(int_com.difference(int_sym))
-                    if int_geom.isEmpty() or not int_geom.isGeosValid():
-                        ProcessingLog.addToLog(ProcessingLog.LOG_ERROR,
-                                               self.tr('GEOS geoprocessing error: One or '
-                                                       'more input features have invalid '
-                                                       'geometry.'))
-                    try:
-                        if int_geom.wkbType() in wkbTypeGroups[wkbTypeGroups[int_geom.wkbType()]]:
-                            outFeat.setGeometry(int_geom)
-                            attrs = []
-                            attrs.extend(atMapA)
-                            attrs.extend(atMapB)
-                            outFeat.setAttributes(attrs)
-                            writer.addFeature(outFeat)
-                    except:
-                        ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
-                                               self.tr('Feature geometry error: One or more output features ignored due to invalid geometry.'))
-                        continue
+            for int_geom, attrs in outputs:
+                try:
+                    outFeat.setGeometry(int_geom)
+                    outFeat.setAttributes(attrs)
+                    writer.addFeature(outFeat)
+                except:
+                    ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
+                                           self.tr('Feature geometry error: One or more output features ignored due to invalid geometry.'))
 
         del writer
+
+    def intersect(self, inFeatA, cacheB):
+        """Returns the intersections of a feature with the features in
+        cacheB, as (geometry, attributes) tuples.
+        """
+        outputs = []
+        geom = inFeatA.geometry()
+        atMapA = inFeatA.attributes()
+        intersects = cacheB.candidates(geom)
+        if len(intersects) == 0:
+            return outputs
+
+        # use prepared geometries for faster intersection tests
+        engine = QgsGeometry.createGeometryEngine(geom.geometry())
+        engine.prepareGeometry()
+
+        for fid in intersects:
+            tmpGeom = cacheB.geometries[fid]
+            if engine.intersects(tmpGeom.geometry()):
+                atMapB = cacheB.attributes[fid]
+                int_geom = QgsGeometry(geom.intersection(tmpGeom))
+                if int_geom.wkbType() == QgsWkbTypes.Unknown or QgsWkbTypes.flatType(int_geom.geometry().wkbType()) == QgsWkbTypes.GeometryCollection:
+                    int_com = geom.combine(tmpGeom)
+                    int_geom = QgsGeometry()
+                    if int_com:
+                        int_sym = geom.symDifference(tmpGeom)
+                        int_geom = QgsGeometry(int_com.difference(int_sym))
+                if int_geom.isEmpty() or not int_geom.isGeosValid():
+                    ProcessingLog.addToLog(ProcessingLog.LOG_ERROR,
+                                           self.tr('GEOS geoprocessing error: One or '
+                                                   'more input features have invalid '
+                                                   'geometry.'))
+                try:
+                    if int_geom.wkbType() in wkbTypeGroups[wkbTypeGroups[int_geom.wkbType()]]:
+                        outputs.append((int_geom, atMapA + atMapB))
+                except:
+                    ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
+                                           self.tr('Feature geometry error: One or more output features ignored due to invalid geometry.'))
+        return outputs
@@ -16,7 +16,6 @@
 *                                                                         *
 ***************************************************************************
 """
-from builtins import next
 from builtins import str
 from builtins import range
 
@@ -29,11 +28,12 @@ __copyright__ = '(C) 2012, Victor Olaya'
 __revision__ = '$Format:%H$'
 
 import os
-import math
+import numpy
 
 from qgis.PyQt.QtGui import QIcon
 
-from qgis.core import QgsFeatureRequest, QgsDistanceArea
+from qgis.core import (QgsFeatureRequest, QgsDistanceArea, QgsProject,
+                       QgsCoordinateTransform, QgsCoordinateReferenceSystem)
 
 from processing.core.GeoAlgorithm import GeoAlgorithm
 from processing.core.parameters import ParameterNumber
@@ -42,6 +42,7 @@ from processing.core.parameters import ParameterSelection
 from processing.core.parameters import ParameterTableField
 from processing.core.outputs import OutputTable
 from processing.tools import dataobjects, vector
+from . import distancematrix
 
 pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 
@@ -54,6 +55,7 @@ class PointDistance(GeoAlgorithm):
     TARGET_FIELD = 'TARGET_FIELD'
     MATRIX_TYPE = 'MATRIX_TYPE'
     NEAREST_POINTS = 'NEAREST_POINTS'
+    METHOD = 'METHOD'
     DISTANCE_MATRIX = 'DISTANCE_MATRIX'
 
     def getIcon(self):
@@ -81,6 +83,10 @@ class PointDistance(GeoAlgorithm):
                                              self.tr('Output matrix type'), self.mat_types, 0))
         self.addParameter(ParameterNumber(self.NEAREST_POINTS,
                                           self.tr('Use only the nearest (k) target points'), 0, 9999, 0))
+        self.calc_methods = [self.tr('Layer CRS'),
+                             self.tr('Ellipsoidal')]
+        self.addParameter(ParameterSelection(self.METHOD,
+                                             self.tr('Calculate distances using'), self.calc_methods, 0))
 
         self.addOutput(OutputTable(self.DISTANCE_MATRIX, self.tr('Distance matrix')))
 
@@ -93,101 +99,89 @@ class PointDistance(GeoAlgorithm):
         targetField = self.getParameterValue(self.TARGET_FIELD)
         matType = self.getParameterValue(self.MATRIX_TYPE)
         nPoints = self.getParameterValue(self.NEAREST_POINTS)
+        method = self.getParameterValue(self.METHOD)
 
         outputFile = self.getOutputFromName(self.DISTANCE_MATRIX)
 
+        ellipsoid = None
+        geographicCrs = None
+        if method == 1:
+            distArea = QgsDistanceArea()
+            ellips = QgsProject.instance().readEntry('Measure', '/Ellipsoid', 'NONE')[0]
+            if ellips == 'NONE' or not distArea.setEllipsoid(ellips):
+                ellips = 'WGS84'
+                distArea.setEllipsoid(ellips)
+            ellipsoid = (distArea.ellipsoidSemiMajor(), distArea.ellipsoidSemiMinor())
+            geographicCrs = self.geographicCrs(ellips, ellipsoid)
+
+        inIDs, inPoints = self.loadPoints(inLayer, inField, geographicCrs)
+        targetIDs, targetPoints = self.loadPoints(targetLayer, targetField, geographicCrs)
+
         if nPoints < 1:
-            nPoints = len(vector.features(targetLayer))
-
-        self.writer = outputFile.getTableWriter([])
-
-        if matType == 0:
-            # Linear distance matrix
-            self.linearMatrix(inLayer, inField, targetLayer, targetField,
-                              matType, nPoints, feedback)
-        elif matType == 1:
-            # Standard distance matrix
-            self.regularMatrix(inLayer, inField, targetLayer, targetField,
-                               nPoints, feedback)
-        elif matType == 2:
-            # Summary distance matrix
-            self.linearMatrix(inLayer, inField, targetLayer, targetField,
-                              matType, nPoints, feedback)
-
-    def linearMatrix(self, inLayer, inField, targetLayer, targetField,
-                     matType, nPoints, feedback):
-        if matType == 0:
-            self.writer.addRecord(['InputID', 'TargetID', 'Distance'])
-        else:
-            self.writer.addRecord(['InputID', 'MEAN', 'STDDEV', 'MIN', 'MAX'])
-
-        index = vector.spatialindex(targetLayer)
-
-        inIdx = inLayer.fields().lookupField(inField)
-        outIdx = targetLayer.fields().lookupField(targetField)
-
-        distArea = QgsDistanceArea()
-
-        features = vector.features(inLayer)
-        total = 100.0 / len(features)
-        for current, inFeat in enumerate(features):
-            inGeom = inFeat.geometry()
-            inID = str(inFeat.attributes()[inIdx])
-            featList = index.nearestNeighbor(inGeom.asPoint(), nPoints)
-            distList = []
-            vari = 0.0
-            request = QgsFeatureRequest().setFilterFids(featList).setSubsetOfAttributes([outIdx])
-            for outFeat in targetLayer.getFeatures(request):
-                outID = outFeat.attributes()[outIdx]
-                outGeom = outFeat.geometry()
-                dist = distArea.measureLine(inGeom.asPoint(),
-                                            outGeom.asPoint())
+            nPoints = len(targetIDs)
+        nPoints = min(nPoints, len(targetIDs))
+
+        with outputFile.getTableWriter([]) as writer:
+            if matType == 0:
+                writer.addRecord(['InputID', 'TargetID', 'Distance'])
+            elif matType == 1:
+                writer.addRecord(['ID'] + ['DIST_{0}'.format(i + 1) for i in range(nPoints)])
+            else:
+                writer.addRecord(['InputID', 'MEAN', 'STDDEV', 'MIN', 'MAX'])
+
+            total = 100.0 / len(inIDs) if len(inIDs) > 0 else 1
+            for start, indices, distances in distancematrix.nearestNeighbours(inPoints, targetPoints,
+                                                                              nPoints, ellipsoid):
+                ids = inIDs[start:start + len(indices)]
                 if matType == 0:
-                    self.writer.addRecord([inID, str(outID), str(dist)])
+                    # Linear distance matrix
+                    writer.addRecords([inID, targetIDs[j], str(d)]
+                                      for inID, row, dists in zip(ids, indices, distances)
+                                      for j, d in zip(row, dists))
+                elif matType == 1:
+                    # Standard distance matrix
+                    writer.addRecords([inID] + [str(d) for d in dists]
+                                      for inID, dists in zip(ids, distances))
                 else:
-                    distList.append(float(dist))
-
-            if matType != 0:
-                mean = sum(distList) / len(distList)
-                for i in distList:
-                    vari += (i - mean) * (i - mean)
-                vari = math.sqrt(vari / len(distList))
-                self.writer.addRecord([inID, str(mean),
-                                       str(vari), str(min(distList)),
-                                       str(max(distList))])
-
-            feedback.setProgress(int(current * total))
-
-    def regularMatrix(self, inLayer, inField, targetLayer, targetField,
-                      nPoints, feedback):
-        index = vector.spatialindex(targetLayer)
-
-        inIdx = inLayer.fields().lookupField(inField)
-
-        distArea = QgsDistanceArea()
-
-        first = True
-        features = vector.features(inLayer)
-        total = 100.0 / len(features)
-        for current, inFeat in enumerate(features):
-            inGeom = inFeat.geometry()
-            inID = str(inFeat.attributes()[inIdx])
-            featList = index.nearestNeighbor(inGeom.asPoint(), nPoints)
-            if first:
-                first = False
-                data = ['ID']
-                for i in range(len(featList)):
-                    data.append('DIST_{0}'.format(i + 1))
-                self.writer.addRecord(data)
-
-            data = [inID]
-            for i in featList:
-                request = QgsFeatureRequest().setFilterFid(i)
-                outFeat = next(targetLayer.getFeatures(request))
-                outGeom = outFeat.geometry()
-                dist = distArea.measureLine(inGeom.asPoint(),
-                                            outGeom.asPoint())
-                data.append(str(float(dist)))
-            self.writer.addRecord(data)
-
-            feedback.setProgress(int(current * total))
+                    # Summary distance matrix
+                    means = distances.mean(axis=1)
+                    stddevs = distances.std(axis=1)
+                    mins = distances.min(axis=1)
+                    maxs = distances.max(axis=1)
+                    writer.addRecords([inID, str(means[i]), str(stddevs[i]),
+                                       str(mins[i]), str(maxs[i])]
+                                      for i, inID in enumerate(ids))
+                feedback.setProgress(int((start + len(indices)) * total))
+
+    def geographicCrs(self, ellips, ellipsoid):
+        """Returns the geographic CRS of an ellipsoid, so points are
+        measured on the same ellipsoid their longitude and latitude refer
+        to.
+        """
+        if ellips == 'WGS84':
+            return QgsCoordinateReferenceSystem('EPSG:4326')
+        return QgsCoordinateReferenceSystem.fromProj4(
+            '+proj=longlat +a={0!r} +b={1!r} +no_defs'.format(*ellipsoid))
+
+    def loadPoints(self, layer, field, crs=None):
+        """Returns the ids of the features in a point layer, and an array
+        with their coordinates. Coordinates are transformed to the given
+        geographic CRS, if any.
+        """
+        idx = layer.fields().lookupField(field)
+        transform = None
+        if crs is not None:
+            transform = QgsCoordinateTransform(layer.crs(), crs)
+
+        request = QgsFeatureRequest().setSubsetOfAttributes([idx])
+        ids = []
+        coords = []
+        for f in vector.features(layer, request):
+            if not f.hasGeometry():
+                continue
+            point = f.geometry().asPoint()
+            if transform is not None:
+                point = transform.transform(point)
+            ids.append(str(f.attributes()[idx]))
+            coords.append((point.x(), point.y()))
+        return ids, numpy.array(coords, dtype=float).reshape(-1, 2)
@@ -27,7 +27,7 @@ __copyright__ = '(C) 2013, Alexander Bruy'
 __revision__ = '$Format:%H$'
 
 import math
-from qgis.core import QgsFeatureRequest, QgsFeature, QgsGeometry, QgsPoint
+from qgis.core import QgsFeature, QgsGeometry, QgsPoint
 from processing.tools import dataobjects, vector
 from processing.core.GeoAlgorithm import GeoAlgorithm
 from processing.core.parameters import ParameterVector
@@ -41,6 +41,7 @@ class PointsDisplacement(GeoAlgorithm):
     INPUT_LAYER = 'INPUT_LAYER'
     DISTANCE = 'DISTANCE'
     HORIZONTAL = 'HORIZONTAL'
+    PROXIMITY = 'PROXIMITY'
     OUTPUT_LAYER = 'OUTPUT_LAYER'
 
     def defineCharacteristics(self):
@@ -54,10 +55,14 @@ class PointsDisplacement(GeoAlgorithm):
                                           0.00001, 999999999.999990, 0.00015))
         self.addParameter(ParameterBoolean(self.HORIZONTAL,
                                            self.tr('Horizontal distribution for two point case')))
+        self.addParameter(ParameterNumber(self.PROXIMITY,
+                                          self.tr('Minimum distance to other points'),
+                                          0.0, 999999999.999990, 0.0))
         self.addOutput(OutputVector(self.OUTPUT_LAYER, self.tr('Displaced'), datatype=[dataobjects.TYPE_VECTOR_POINT]))
 
     def processAlgorithm(self, feedback):
         radius = self.getParameterValue(self.DISTANCE)
+        proximity = self.getParameterValue(self.PROXIMITY)
         horizontal = self.getParameterValue(self.HORIZONTAL)
         output = self.getOutputFromName(self.OUTPUT_LAYER)
 
@@ -68,29 +73,37 @@ class PointsDisplacement(GeoAlgorithm):
 
         features = vector.features(layer)
 
-        total = 100.0 / len(features)
+        total = 100.0 / len(features) if len(features) > 0 else 1
 
-        duplicates = dict()
+        # features are kept, so they are written without reading the
+        # layer again once their cluster is known
+        points = []
+        xs = []
+        ys = []
         for current, f in enumerate(features):
-            wkt = f.geometry().exportToWkt()
-            if wkt not in duplicates:
-                duplicates[wkt] = [f.id()]
-            else:
-                duplicates[wkt].extend([f.id()])
-
+            if not f.hasGeometry():
+                writer.addFeature(f)
+                continue
+            point = f.geometry().asPoint()
+            points.append(f)
+            xs.append(point.x())
+            ys.append(point.y())
             feedback.setProgress(int(current * total))
 
-        current = 0
-        total = 100.0 / len(duplicates)
+        clusters, sizes = vector.clusterPoints(xs, ys, proximity)
+        members = [[] for size in sizes]
+        for i, cluster in enumerate(clusters):
+            members[cluster].append(i)
+
+        total = 100.0 / len(members) if len(members) > 0 else 1
         feedback.setProgress(0)
 
         fullPerimeter = 2 * math.pi
 
-        for (geom, fids) in list(duplicates.items()):
-            count = len(fids)
+        for current, cluster in enumerate(members):
+            count = len(cluster)
             if count == 1:
-                f = next(layer.getFeatures(QgsFeatureRequest().setFilterFid(fids[0])))
-                writer.addFeature(f)
+                writer.addFeature(points[cluster[0]])
             else:
                 angleStep = fullPerimeter / count
                 if count == 2 and horizontal:
@@ -98,24 +111,24 @@ class PointsDisplacement(GeoAlgorithm):
                 else:
                     currentAngle = 0
 
-                old_point = QgsGeometry.fromWkt(geom).asPoint()
+                # points are displaced around the center of the cluster
+                centerX = sum(xs[i] for i in cluster) / count
+                centerY = sum(ys[i] for i in cluster) / count
 
-                request = QgsFeatureRequest().setFilterFids(fids).setFlags(QgsFeatureRequest.NoGeometry)
-                for f in layer.getFeatures(request):
+                for i in cluster:
                     sinusCurrentAngle = math.sin(currentAngle)
                     cosinusCurrentAngle = math.cos(currentAngle)
                     dx = radius * sinusCurrentAngle
                     dy = radius * cosinusCurrentAngle
 
-                    new_point = QgsPoint(old_point.x() + dx, old_point.y() + dy)
+                    new_point = QgsPoint(centerX + dx, centerY + dy)
                     out_feature = QgsFeature()
                     out_feature.setGeometry(QgsGeometry.fromPoint(new_point))
-                    out_feature.setAttributes(f.attributes())
+                    out_feature.setAttributes(points[i].attributes())
 
                     writer.addFeature(out_feature)
                     currentAngle += angleStep
 
-            current += 1
             feedback.setProgress(int(current * total))
 
         del writer
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    PrevalidateGeometries.py
+    ---------------------
+    Date                 : April 2017
+    Copyright            : (C) 2017 by the QGIS Development Team
+    Email                : qgis-developer at lists dot osgeo dot org
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Development Team'
+__date__ = 'April 2017'
+__copyright__ = '(C) 2017, the QGIS Development Team'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+
+from qgis.PyQt.QtGui import QIcon
+
+from processing.core.GeoAlgorithm import GeoAlgorithm
+from processing.core.parameters import ParameterVector
+from processing.core.outputs import OutputNumber
+from processing.tools import dataobjects, vector
+
+pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
+
+
+class PrevalidateGeometries(GeoAlgorithm):
+
+    INPUT_LAYER = 'INPUT_LAYER'
+    VALID_COUNT = 'VALID_COUNT'
+    INVALID_COUNT = 'INVALID_COUNT'
+
+    def getIcon(self):
+        return QIcon(os.path.join(pluginPath, 'images', 'ftools', 'check_geometry.png'))
+
+    def defineCharacteristics(self):
+        self.name, self.i18n_name = self.trAlgorithm('Pre-validate geometries')
+        self.group, self.i18n_group = self.trAlgorithm('Vector geometry tools')
+
+        self.addParameter(ParameterVector(self.INPUT_LAYER,
+                                          self.tr('Input layer')))
+
+        self.addOutput(OutputNumber(self.VALID_COUNT, self.tr('Count of valid features')))
+        self.addOutput(OutputNumber(self.INVALID_COUNT, self.tr('Count of invalid features')))
+
+    def processAlgorithm(self, feedback):
+        layer = dataobjects.getObjectFromUri(
+            self.getParameterValue(self.INPUT_LAYER))
+        source = layer.source()
+
+        features = vector.features(layer, checkValidity=False)
+        total = 100.0 / len(features) if len(features) > 0 else 1
+        validCount = 0
+        invalidCount = 0
+        for current, feature in enumerate(features):
+            feedback.setProgress(int(current * total))
+            if not feature.hasGeometry():
+                continue
+            if vector.isGeometryValid(source, feature):
+                validCount += 1
+            else:
+                invalidCount += 1
+
+        self.setOutputValue(self.VALID_COUNT, validCount)
+        self.setOutputValue(self.INVALID_COUNT, invalidCount)
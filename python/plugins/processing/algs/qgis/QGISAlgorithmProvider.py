@@ -112,6 +112,7 @@ from .JoinAttributes import JoinAttributes
 from .CreateConstantRaster import CreateConstantRaster
 from .PointsLayerFromTable import PointsLayerFromTable
 from .PointsDisplacement import PointsDisplacement
+from .ClusterPointsByDistance import ClusterPointsByDistance
 from .ZonalStatistics import ZonalStatistics
 from .PointsFromPolygons import PointsFromPolygons
 from .PointsFromLines import PointsFromLines
@@ -135,6 +136,7 @@ from .SplitLinesWithLines import SplitLinesWithLines
 from .FieldsMapper import FieldsMapper
 from .Datasources2Vrt import Datasources2Vrt
 from .CheckValidity import CheckValidity
+from .PrevalidateGeometries import PrevalidateGeometries
 from .OrientedMinimumBoundingBox import OrientedMinimumBoundingBox
 from .Smooth import Smooth
 from .ReverseLineDirection import ReverseLineDirection
@@ -222,6 +224,7 @@ class QGISAlgorithmProvider(AlgorithmProvider):
                         EquivalentNumField(), PointsLayerFromTable(),
                         StatisticsByCategories(), ConcaveHull(),
                         RasterLayerStatistics(), PointsDisplacement(),
+                        ClusterPointsByDistance(),
                         ZonalStatistics(), PointsFromPolygons(),
                         PointsFromLines(), RandomPointsExtent(),
                         RandomPointsLayer(), RandomPointsPolygonsFixed(),
@@ -233,7 +236,8 @@ class QGISAlgorithmProvider(AlgorithmProvider):
                         SelectByExpression(), HypsometricCurves(),
                         SplitWithLines(), SplitLinesWithLines(), CreateConstantRaster(),
                         FieldsMapper(), SelectByAttributeSum(), Datasources2Vrt(),
-                        CheckValidity(), OrientedMinimumBoundingBox(), Smooth(),
+                        CheckValidity(), PrevalidateGeometries(),
+                        OrientedMinimumBoundingBox(), Smooth(),
                         ReverseLineDirection(), SpatialIndex(), DefineProjection(),
                         RectanglesOvalsDiamondsVariable(),
                         RectanglesOvalsDiamondsFixed(), MergeLines(),
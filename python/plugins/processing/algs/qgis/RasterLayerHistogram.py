@@ -25,6 +25,7 @@ __copyright__ = '(C) 2013, Victor Olaya'
 
 __revision__ = '$Format:%H$'
 
+import numpy
 import plotly as plt
 import plotly.graph_objs as go
 
@@ -59,14 +60,31 @@ class RasterLayerHistogram(GeoAlgorithm):
 
         output = self.getOutputValue(self.PLOT)
 
-        # ALERT: this is potentially blocking if the layer is too big
-        values = raster.scanraster(layer, feedback)
-
-        valueslist = []
-        for v in values:
-            if v is not None:
-                valueslist.append(v)
-
-        data = [go.Histogram(x=valueslist,
-                             nbinsx=nbins)]
+        # First pass gets the value range, second one accumulates the
+        # counts of each block, so raster values are never all kept in
+        # memory at once
+        minvalue = None
+        maxvalue = None
+        for block in raster.scanrasterBlocks(layer, feedback, progressEnd=50):
+            if block.count() == 0:
+                continue
+            if minvalue is None:
+                minvalue = block.min()
+                maxvalue = block.max()
+            else:
+                minvalue = min(block.min(), minvalue)
+                maxvalue = max(block.max(), maxvalue)
+
+        counts = numpy.zeros(nbins, dtype=numpy.int64)
+        edges = numpy.linspace(minvalue or 0, maxvalue or 0, nbins + 1)
+        if minvalue is not None:
+            for block in raster.scanrasterBlocks(layer, feedback, progressStart=50):
+                blockCounts, edges = numpy.histogram(block.compressed(),
+                                                     bins=nbins,
+                                                     range=(minvalue, maxvalue))
+                counts += blockCounts
+
+        data = [go.Bar(x=((edges[:-1] + edges[1:]) / 2.0).tolist(),
+                       y=counts.tolist(),
+                       width=numpy.diff(edges).tolist())]
         plt.offline.plot(data, filename=output, auto_open=False)
@@ -29,6 +29,8 @@ __revision__ = '$Format:%H$'
 import math
 import codecs
 
+import numpy
+
 from processing.core.GeoAlgorithm import GeoAlgorithm
 from processing.core.parameters import ParameterRaster
 from processing.core.outputs import OutputNumber
@@ -69,7 +71,7 @@ class RasterLayerStatistics(GeoAlgorithm):
         outputFile = self.getOutputValue(self.OUTPUT_HTML_FILE)
         uri = self.getParameterValue(self.INPUT)
         layer = dataobjects.getObjectFromUri(uri)
-        values = raster.scanraster(layer, feedback)
+        blocks = raster.scanrasterBlocks(layer, feedback)
 
         n = 0
         nodata = 0
@@ -79,21 +81,33 @@ class RasterLayerStatistics(GeoAlgorithm):
         minvalue = None
         maxvalue = None
 
-        for v in values:
-            if v is not None:
-                sum += v
-                n = n + 1
-                delta = v - mean
-                mean = mean + delta / n
-                M2 = M2 + delta * (v - mean)
-                if minvalue is None:
-                    minvalue = v
-                    maxvalue = v
-                else:
-                    minvalue = min(v, minvalue)
-                    maxvalue = max(v, maxvalue)
+        # Blocks are reduced with NumPy and their partial results are
+        # merged with the pairwise update formula for the variance
+        for block in blocks:
+            raw = block.compressed()
+            values = raw.astype(numpy.float64)
+            nodata += block.size - values.size
+            if values.size == 0:
+                continue
+
+            blockN = values.size
+            blockMean = values.mean().item()
+            blockM2 = ((values - blockMean) ** 2).sum().item()
+
+            delta = blockMean - mean
+            total = n + blockN
+            mean = mean + delta * blockN / total
+            M2 = M2 + blockM2 + delta ** 2 * n * blockN / total
+            n = total
+
+            accumulator = numpy.float64 if raw.dtype.kind == 'f' else numpy.int64
+            sum += raw.sum(dtype=accumulator).item()
+            if minvalue is None:
+                minvalue = raw.min().item()
+                maxvalue = raw.max().item()
             else:
-                nodata += 1
+                minvalue = min(raw.min().item(), minvalue)
+                maxvalue = max(raw.max().item(), maxvalue)
 
         variance = M2 / (n - 1)
         stddev = math.sqrt(variance)
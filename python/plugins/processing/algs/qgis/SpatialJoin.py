@@ -17,8 +17,6 @@
 ***************************************************************************
 """
 from builtins import str
-from builtins import zip
-from builtins import range
 
 __author__ = 'Joshua Arnott'
 __date__ = 'October 2013'
@@ -29,6 +27,9 @@ __copyright__ = '(C) 2013, Joshua Arnott'
 __revision__ = '$Format:%H$'
 
 import os
+import itertools
+
+import numpy
 
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant
@@ -43,8 +44,16 @@ from processing.core.parameters import ParameterString
 from processing.core.outputs import OutputVector
 from processing.tools import dataobjects, vector
 
+from . import overlay
+
 pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 
+# number of target features joined at once
+BATCH_SIZE = 10000
+
+# geometry engine methods evaluating each predicate
+PREDICATE_METHODS = {'equals': 'isEqual'}
+
 
 class SpatialJoin(GeoAlgorithm):
     TARGET = "TARGET"
@@ -118,144 +127,246 @@ class SpatialJoin(GeoAlgorithm):
         targetFields = target.fields()
         joinFields = join.fields()
 
-        fieldList = QgsFields()
+        fields = QgsFields()
+        for f in targetFields:
+            fields.append(f)
 
+        numFields = []
         if not summary:
-            joinFields = vector.testForUniqueness(targetFields, joinFields)
-            seq = list(range(len(targetFields) + len(joinFields)))
-            targetFields.extend(joinFields)
-            targetFields = dict(list(zip(seq, targetFields)))
+            for f in vector.testForUniqueness(targetFields, joinFields):
+                fields.append(f)
         else:
-            numFields = {}
+            fieldList = QgsFields()
             for j in range(len(joinFields)):
                 if joinFields[j].type() in [QVariant.Int, QVariant.Double, QVariant.LongLong, QVariant.UInt, QVariant.ULongLong]:
-                    numFields[j] = []
+                    numFields.append(j)
                     for i in sumList:
                         field = QgsField(i + str(joinFields[j].name()), QVariant.Double, '', 24, 16)
                         fieldList.append(field)
             field = QgsField('count', QVariant.Double, '', 24, 16)
             fieldList.append(field)
-            joinFields = vector.testForUniqueness(targetFields, fieldList)
-            targetFields.extend(fieldList)
-            seq = list(range(len(targetFields)))
-            targetFields = dict(list(zip(seq, targetFields)))
-
-        fields = QgsFields()
-        for f in list(targetFields.values()):
-            fields.append(f)
+            for f in vector.testForUniqueness(targetFields, fieldList):
+                fields.append(f)
 
         writer = self.getOutputFromName(self.OUTPUT).getVectorWriter(
             fields, target.wkbType(), target.crs())
 
-        outFeat = QgsFeature()
-        inFeatB = QgsFeature()
-        inGeom = QgsGeometry()
-
-        index = vector.spatialindex(join)
-
-        mapP2 = dict()
-        features = vector.features(join)
-        for f in features:
-            mapP2[f.id()] = QgsFeature(f)
+        # join features are read once, with their geometries snapped to
+        # the precision, and the numeric attributes used for the summary
+        # are stored as arrays, with NaN for NULL values
+        cache = overlay.FeatureCache()
+        for f in vector.features(join):
+            f.setGeometry(vector.snapToPrecision(f.geometry(), precision))
+            cache.addFeature(f)
+        boxes = boundingBoxes([cache.geometries[fid] for fid in cache.ids])
+        columns = {}
+        for j in numFields:
+            columns[j] = numpy.array([_toFloat(cache.attributes[fid][j]) for fid in cache.ids],
+                                     dtype=float)
 
+        outFeat = QgsFeature()
         features = vector.features(target)
-        total = 100.0 / len(features)
-        for c, f in enumerate(features):
-            atMap1 = f.attributes()
-            outFeat.setGeometry(f.geometry())
-            inGeom = vector.snapToPrecision(f.geometry(), precision)
-            none = True
-            joinList = []
-            if inGeom.type() == QgsWkbTypes.PointGeometry:
-                bbox = inGeom.buffer(10, 2).boundingBox()
-            else:
-                bbox = inGeom.boundingBox()
-            bufferedBox = vector.bufferedBoundingBox(bbox, 0.51 * precision)
-            joinList = index.intersects(bufferedBox)
-            if len(joinList) > 0:
-                count = 0
-                for i in joinList:
-                    inFeatB = mapP2[i]
-                    inGeomB = vector.snapToPrecision(inFeatB.geometry(), precision)
-
-                    res = False
-                    for predicate in predicates:
-                        res = getattr(inGeom, predicate)(inGeomB)
-                        if res:
-                            break
-
-                    if res:
-                        count = count + 1
-                        none = False
-                        atMap2 = inFeatB.attributes()
-                        if not summary:
-                            atMap = atMap1
-                            atMap2 = atMap2
-                            atMap.extend(atMap2)
-                            atMap = dict(list(zip(seq, atMap)))
-                            break
-                        else:
-                            for j in list(numFields.keys()):
-                                numFields[j].append(atMap2[j])
-
-                if summary and not none:
-                    atMap = atMap1
-                    for j in list(numFields.keys()):
-                        for k in sumList:
-                            if k == 'sum':
-                                atMap.append(sum(self._filterNull(numFields[j])))
-                            elif k == 'mean':
-                                try:
-                                    nn_count = sum(1 for _ in self._filterNull(numFields[j]))
-                                    atMap.append(sum(self._filterNull(numFields[j])) / nn_count)
-                                except ZeroDivisionError:
-                                    atMap.append(NULL)
-                            elif k == 'min':
-                                try:
-                                    atMap.append(min(self._filterNull(numFields[j])))
-                                except ValueError:
-                                    atMap.append(NULL)
-                            elif k == 'median':
-                                atMap.append(self._median(numFields[j]))
-                            else:
-                                try:
-                                    atMap.append(max(self._filterNull(numFields[j])))
-                                except ValueError:
-                                    atMap.append(NULL)
-
-                        numFields[j] = []
-                    atMap.append(count)
-                    atMap = dict(list(zip(seq, atMap)))
-            if none:
-                outFeat.setAttributes(atMap1)
+        total = 100.0 / len(features) if len(features) > 0 else 1
+        iterator = iter(features)
+        current = 0
+        while True:
+            batch = [QgsFeature(f) for f in itertools.islice(iterator, BATCH_SIZE)]
+            if len(batch) == 0:
+                break
+
+            # table of matching (target, join) pairs for the batch
+            targets, joins = joinPairs(batch, cache, boxes, predicates, precision, not summary)
+            counts = numpy.bincount(targets, minlength=len(batch))
+            if summary:
+                stats = [groupedStatistics(targets, columns[j][joins], len(batch)) for j in numFields]
             else:
-                outFeat.setAttributes(list(atMap.values()))
-
-            if keep:
+                firstJoin = numpy.zeros(len(batch), dtype=int)
+                firstJoin[targets] = joins
+
+            for i, f in enumerate(batch):
+                atMap = f.attributes()
+                if counts[i] > 0:
+                    if not summary:
+                        atMap.extend(cache.attributes[cache.ids[firstJoin[i]]])
+                    else:
+                        for values in stats:
+                            for k in sumList:
+                                value = values.get(k, values['max'])[i]
+                                atMap.append(NULL if numpy.isnan(value) else float(value))
+                        atMap.append(int(counts[i]))
+                elif not keep:
+                    continue
+
+                outFeat.setGeometry(f.geometry())
+                outFeat.setAttributes(atMap)
                 writer.addFeature(outFeat)
-            else:
-                if not none:
-                    writer.addFeature(outFeat)
 
-            feedback.setProgress(int(c * total))
+            current += len(batch)
+            feedback.setProgress(int(current * total))
         del writer
 
-    def _filterNull(self, values):
-        """Takes an iterator of values and returns a new iterator
-        returning the same values but skipping any NULL values"""
-        return (v for v in values if v != NULL)
-
-    def _median(self, data):
-        count = len(data)
-        if count == 1:
-            return data[0]
-        data.sort()
-
-        median = 0
-        if count > 1:
-            if (count % 2) == 0:
-                median = 0.5 * ((data[count / 2 - 1]) + (data[count / 2]))
-            else:
-                median = data[(count + 1) / 2 - 1]
 
-        return median
+def _toFloat(value):
+    if value is None or value == NULL:
+        return numpy.nan
+    return float(value)
+
+
+def boundingBoxes(geometries):
+    """Returns an array with the minimum x, minimum y, maximum x and
+    maximum y of the bounding box of each geometry, with NaN values for
+    empty geometries.
+    """
+    boxes = numpy.full((len(geometries), 4), numpy.nan)
+    for i, geom in enumerate(geometries):
+        if not geom.isEmpty():
+            bbox = geom.boundingBox()
+            boxes[i] = (bbox.xMinimum(), bbox.yMinimum(), bbox.xMaximum(), bbox.yMaximum())
+    return boxes
+
+
+def _expand(starts, counts):
+    # concatenation of the ranges starting at starts with the given lengths
+    return numpy.repeat(starts - numpy.cumsum(counts) + counts, counts) + numpy.arange(counts.sum())
+
+
+def candidatePairs(boxesA, boxesB, maxCells=64):
+    """Returns two arrays with the positions of the intersecting pairs
+    of boxes from two arrays of bounding boxes, as returned by
+    boundingBoxes, sorted by position in boxesA and then in boxesB.
+
+    Boxes are assigned to the cells of a regular grid they cover, and
+    the pairs are found by matching the cells of both arrays, all at
+    once. Boxes covering more than maxCells cells are compared with all
+    the boxes of the other array.
+    """
+    validA = numpy.flatnonzero(~numpy.isnan(boxesA).any(axis=1))
+    validB = numpy.flatnonzero(~numpy.isnan(boxesB).any(axis=1))
+    if len(validA) == 0 or len(validB) == 0:
+        return numpy.zeros(0, dtype=int), numpy.zeros(0, dtype=int)
+    a = boxesA[validA]
+    b = boxesB[validB]
+
+    allBoxes = numpy.concatenate([a, b])
+    xMin, yMin = allBoxes[:, 0].min(), allBoxes[:, 1].min()
+    width = allBoxes[:, 2].max() - xMin
+    height = allBoxes[:, 3].max() - yMin
+    cellSize = max(numpy.median(numpy.maximum(allBoxes[:, 2] - allBoxes[:, 0],
+                                              allBoxes[:, 3] - allBoxes[:, 1])),
+                   max(width, height) / numpy.sqrt(len(allBoxes)))
+    if cellSize == 0:
+        cellSize = 1.0
+    nRows = int(height / cellSize) + 2
+
+    def cells(boxes):
+        x0 = numpy.floor((boxes[:, 0] - xMin) / cellSize).astype(numpy.int64)
+        y0 = numpy.floor((boxes[:, 1] - yMin) / cellSize).astype(numpy.int64)
+        w = numpy.floor((boxes[:, 2] - xMin) / cellSize).astype(numpy.int64) - x0 + 1
+        h = numpy.floor((boxes[:, 3] - yMin) / cellSize).astype(numpy.int64) - y0 + 1
+        small = w * h <= maxCells
+        owners = numpy.flatnonzero(small)
+        counts = (w * h)[owners]
+        offsets = _expand(numpy.zeros(len(owners), dtype=numpy.int64), counts)
+        owners = numpy.repeat(owners, counts)
+        keys = (x0[owners] + offsets % w[owners]) * nRows + y0[owners] + offsets // w[owners]
+        return keys, owners, numpy.flatnonzero(~small)
+
+    keysA, ownersA, largeA = cells(a)
+    keysB, ownersB, largeB = cells(b)
+    order = numpy.argsort(keysB, kind='mergesort')
+    keysB = keysB[order]
+    ownersB = ownersB[order]
+    first = numpy.searchsorted(keysB, keysA, 'left')
+    counts = numpy.searchsorted(keysB, keysA, 'right') - first
+    pairsA = [numpy.repeat(ownersA, counts),
+              numpy.repeat(largeA, len(b)),
+              numpy.tile(numpy.arange(len(a)), len(largeB))]
+    pairsB = [ownersB[_expand(first, counts)],
+              numpy.tile(numpy.arange(len(b)), len(largeA)),
+              numpy.repeat(largeB, len(a))]
+    pairsA = numpy.concatenate(pairsA)
+    pairsB = numpy.concatenate(pairsB)
+
+    # boxes sharing a cell may still not intersect, and pairs sharing
+    # several cells are found several times
+    boxA = a[pairsA]
+    boxB = b[pairsB]
+    intersecting = ((boxA[:, 0] <= boxB[:, 2]) & (boxB[:, 0] <= boxA[:, 2]) &
+                    (boxA[:, 1] <= boxB[:, 3]) & (boxB[:, 1] <= boxA[:, 3]))
+    pairs = numpy.unique(pairsA[intersecting] * len(b) + pairsB[intersecting])
+    return validA[pairs // len(b)], validB[pairs % len(b)]
+
+
+def joinPairs(features, cache, boxes, predicates, precision, firstOnly):
+    """Finds the features of a FeatureCache which match any of the
+    predicates with each of the given features.
+
+    boxes holds the bounding boxes of the features in the cache. The
+    candidate pairs are found at once from the bounding boxes with
+    candidatePairs, and tested with a prepared geometry engine for each
+    feature. Returns two arrays, with the positions of the features in
+    the list and the rows of the matching features in the cache. If
+    firstOnly is True, only the first match of each feature is returned.
+    """
+    geometries = [vector.snapToPrecision(f.geometry(), precision) for f in features]
+    targetBoxes = numpy.full((len(geometries), 4), numpy.nan)
+    for i, geom in enumerate(geometries):
+        if geom.isEmpty():
+            continue
+        if geom.type() == QgsWkbTypes.PointGeometry:
+            bbox = geom.buffer(10, 2).boundingBox()
+        else:
+            bbox = geom.boundingBox()
+        bbox = vector.bufferedBoundingBox(bbox, 0.51 * precision)
+        targetBoxes[i] = (bbox.xMinimum(), bbox.yMinimum(), bbox.xMaximum(), bbox.yMaximum())
+
+    candidateTargets, candidateRows = candidatePairs(targetBoxes, boxes)
+    bounds = numpy.searchsorted(candidateTargets, numpy.arange(len(geometries) + 1))
+
+    targets = []
+    joins = []
+    for i in numpy.unique(candidateTargets):
+        engine = QgsGeometry.createGeometryEngine(geometries[i].geometry())
+        engine.prepareGeometry()
+        for row in candidateRows[bounds[i]:bounds[i + 1]]:
+            other = cache.geometries[cache.ids[row]].geometry()
+            if any(getattr(engine, PREDICATE_METHODS.get(predicate, predicate))(other)
+                   for predicate in predicates):
+                targets.append(i)
+                joins.append(row)
+                if firstOnly:
+                    break
+    return numpy.array(targets, dtype=int), numpy.array(joins, dtype=int)
+
+
+def groupedStatistics(groups, values, nGroups):
+    """Computes the sum, mean, minimum, maximum and median of the values
+    in each group, ignoring NaN values.
+
+    groups is an array with the group number, between 0 and nGroups - 1,
+    of each value. Returns a dictionary with an array of nGroups values
+    for each statistic. The sum of a group with no values is 0, and other
+    statistics are NaN.
+    """
+    valid = ~numpy.isnan(values)
+    groups = groups[valid]
+    values = values[valid]
+    order = numpy.lexsort((values, groups))
+    groups = groups[order]
+    values = values[order]
+
+    counts = numpy.bincount(groups, minlength=nGroups)
+    starts = numpy.cumsum(counts) - counts
+    empty = counts == 0
+    sums = numpy.bincount(groups, weights=values, minlength=nGroups)
+
+    def sortedValue(positions):
+        if len(values) == 0:
+            return numpy.full(nGroups, numpy.nan)
+        return numpy.where(empty, numpy.nan, values[numpy.clip(positions, 0, len(values) - 1)])
+
+    return {'sum': sums,
+            'mean': numpy.where(empty, numpy.nan, sums / numpy.maximum(counts, 1)),
+            'min': sortedValue(starts),
+            'max': sortedValue(starts + counts - 1),
+            'median': 0.5 * (sortedValue(starts + (counts - 1) // 2) + sortedValue(starts + counts // 2))}
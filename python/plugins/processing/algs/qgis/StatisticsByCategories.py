@@ -26,7 +26,8 @@ __copyright__ = '(C) 2012, Victor Olaya'
 
 __revision__ = '$Format:%H$'
 
-from qgis.core import QgsStatisticalSummary
+import numpy
+
 from processing.core.outputs import OutputTable
 from processing.core.GeoAlgorithm import GeoAlgorithm
 from processing.tools import dataobjects, vector
@@ -65,28 +66,37 @@ class StatisticsByCategories(GeoAlgorithm):
         valuesField = layer.fields().lookupField(valuesFieldName)
         categoriesField = layer.fields().lookupField(categoriesFieldName)
 
-        features = vector.features(layer)
-        total = 100.0 / len(features)
-        values = {}
-        for current, feat in enumerate(features):
-            feedback.setProgress(int(current * total))
-            attrs = feat.attributes()
-            try:
-                value = float(attrs[valuesField])
-                cat = str(attrs[categoriesField])
-                if cat not in values:
-                    values[cat] = []
-                values[cat].append(value)
-            except:
-                pass
+        columns = vector.layerColumns(layer, valuesField, categoriesField)
+        feedback.setProgress(50)
+
+        # features with NULL values are ignored
+        valuesColumn = columns[valuesField]
+        valid = ~valuesColumn.nulls
+        values = valuesColumn.values[valid].astype(float)
+        categories = [str(c) for (c, v) in zip(columns[categoriesField].toList(), valid) if v]
+
+        # categories are numbered in the order they are found
+        codes = {}
+        categoryCodes = numpy.array([codes.setdefault(c, len(codes)) for c in categories], dtype=int)
+        codes = sorted(codes, key=codes.get)
+
+        order = numpy.lexsort((values, categoryCodes))
+        categoryCodes = categoryCodes[order]
+        values = values[order]
+
+        counts = numpy.bincount(categoryCodes, minlength=len(codes))
+        starts = numpy.cumsum(counts) - counts
+        sums = numpy.bincount(categoryCodes, weights=values, minlength=len(codes))
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts
+            deviations = numpy.bincount(categoryCodes, weights=(values - means[categoryCodes]) ** 2,
+                                        minlength=len(codes))
+            stdDevs = numpy.sqrt(deviations / (counts - 1))
 
         fields = ['category', 'min', 'max', 'mean', 'stddev', 'sum', 'count']
         writer = output.getTableWriter(fields)
-        stat = QgsStatisticalSummary(QgsStatisticalSummary.Min | QgsStatisticalSummary.Max |
-                                     QgsStatisticalSummary.Mean | QgsStatisticalSummary.StDevSample |
-                                     QgsStatisticalSummary.Sum | QgsStatisticalSummary.Count)
-
-        for (cat, v) in list(values.items()):
-            stat.calculate(v)
-            record = [cat, stat.min(), stat.max(), stat.mean(), stat.sampleStDev(), stat.sum(), stat.count()]
+        for i, cat in enumerate(codes):
+            record = [cat, float(values[starts[i]]), float(values[starts[i] + counts[i] - 1]),
+                      float(means[i]), float(stdDevs[i]), float(sums[i]), int(counts[i])]
             writer.addRecord(record)
+        writer.close()
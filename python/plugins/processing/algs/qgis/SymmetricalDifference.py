@@ -29,13 +29,15 @@ import os
 
 from qgis.PyQt.QtGui import QIcon
 
-from qgis.core import QgsFeature, QgsGeometry, QgsFeatureRequest, NULL, QgsWkbTypes
+from qgis.core import QgsFeature, NULL, QgsWkbTypes
 from processing.core.ProcessingLog import ProcessingLog
 from processing.core.GeoAlgorithm import GeoAlgorithm
 from processing.core.parameters import ParameterVector
 from processing.core.outputs import OutputVector
 from processing.tools import dataobjects, vector
 
+from . import overlay
+
 pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 
 
@@ -69,29 +71,23 @@ class SymmetricalDifference(GeoAlgorithm):
         writer = self.getOutputFromName(self.OUTPUT).getVectorWriter(
             fields, geomType, layerA.crs())
 
-        featB = QgsFeature()
         outFeat = QgsFeature()
 
-        indexA = vector.spatialindex(layerB)
-        indexB = vector.spatialindex(layerA)
+        # features of both layers are read once, and the input layer is
+        # cached while computing the first difference
+        cacheA = overlay.FeatureCache(attributes=False)
+        cacheB = overlay.FeatureCache.fromLayer(layerB)
 
         featuresA = vector.features(layerA)
-        featuresB = vector.features(layerB)
 
-        total = 100.0 / (len(featuresA) * len(featuresB))
+        nFeat = len(featuresA) + len(cacheB.ids)
+        total = 100.0 / nFeat if nFeat > 0 else 1
         count = 0
 
-        for featA in featuresA:
-            geom = featA.geometry()
-            diffGeom = QgsGeometry(geom)
-            attrs = featA.attributes()
-            intersects = indexA.intersects(geom.boundingBox())
-            request = QgsFeatureRequest().setFilterFids(intersects).setSubsetOfAttributes([])
-            for featB in layerB.getFeatures(request):
-                tmpGeom = featB.geometry()
-                if diffGeom.intersects(tmpGeom):
-                    diffGeom = QgsGeometry(diffGeom.difference(tmpGeom))
-
+        results = map(
+            lambda f: (overlay.difference(f.geometry(), cacheB), f.attributes()),
+            cacheA.cachingFeatures(featuresA))
+        for diffGeom, attrs in results:
             try:
                 outFeat.setGeometry(diffGeom)
                 outFeat.setAttributes(attrs)
@@ -106,18 +102,10 @@ class SymmetricalDifference(GeoAlgorithm):
 
         length = len(layerA.fields())
 
-        for featA in featuresB:
-            geom = featA.geometry()
-            diffGeom = QgsGeometry(geom)
-            attrs = featA.attributes()
-            attrs = [NULL] * length + attrs
-            intersects = indexB.intersects(geom.boundingBox())
-            request = QgsFeatureRequest().setFilterFids(intersects).setSubsetOfAttributes([])
-            for featB in layerA.getFeatures(request):
-                tmpGeom = featB.geometry()
-                if diffGeom.intersects(tmpGeom):
-                    diffGeom = QgsGeometry(diffGeom.difference(tmpGeom))
-
+        results = map(
+            lambda fid: (overlay.difference(cacheB.geometries[fid], cacheA), [NULL] * length + cacheB.attributes[fid]),
+            cacheB.ids)
+        for diffGeom, attrs in results:
             try:
                 outFeat.setGeometry(diffGeom)
                 outFeat.setAttributes(attrs)
@@ -29,7 +29,7 @@ import os
 
 from qgis.PyQt.QtGui import QIcon
 
-from qgis.core import QgsFeatureRequest, QgsFeature, QgsGeometry, QgsWkbTypes
+from qgis.core import QgsFeature, QgsGeometry, QgsWkbTypes
 
 from processing.core.GeoAlgorithm import GeoAlgorithm
 from processing.core.ProcessingLog import ProcessingLog
@@ -37,6 +37,8 @@ from processing.core.parameters import ParameterVector
 from processing.core.outputs import OutputVector
 from processing.tools import dataobjects, vector
 
+from . import overlay
+
 pluginPath = os.path.split(os.path.split(os.path.dirname(__file__))[0])[0]
 
 wkbTypeGroups = {
@@ -75,159 +77,132 @@ class Union(GeoAlgorithm):
         fields = vector.combineVectorFields(vlayerA, vlayerB)
         writer = self.getOutputFromName(Union.OUTPUT).getVectorWriter(fields,
                                                                       geomType, vlayerA.crs())
-        inFeatA = QgsFeature()
-        inFeatB = QgsFeature()
         outFeat = QgsFeature()
-        indexA = vector.spatialindex(vlayerB)
-        indexB = vector.spatialindex(vlayerA)
 
-        count = 0
-        nElement = 0
+        # features of both layers are read once, and the first layer is
+        # cached while it is processed
+        cacheA = overlay.FeatureCache(attributes=False)
+        cacheB = overlay.FeatureCache.fromLayer(vlayerB)
+
         featuresA = vector.features(vlayerA)
-        nFeat = len(featuresA)
-        for inFeatA in featuresA:
-            feedback.setProgress(nElement / float(nFeat) * 50)
-            nElement += 1
-            lstIntersectingB = []
-            geom = inFeatA.geometry()
-            atMapA = inFeatA.attributes()
-            intersects = indexA.intersects(geom.boundingBox())
-            if len(intersects) < 1:
-                try:
-                    outFeat.setGeometry(geom)
-                    outFeat.setAttributes(atMapA)
-                    writer.addFeature(outFeat)
-                except:
-                    # This really shouldn't happen, as we haven't
-                    # edited the input geom at all
-                    ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
-                                           self.tr('Feature geometry error: One or more output features ignored due to invalid geometry.'))
-            else:
-                request = QgsFeatureRequest().setFilterFids(intersects)
-
-                engine = QgsGeometry.createGeometryEngine(geom.geometry())
-                engine.prepareGeometry()
-
-                for inFeatB in vlayerB.getFeatures(request):
-                    count += 1
-
-                    atMapB = inFeatB.attributes()
-                    tmpGeom = inFeatB.geometry()
-
-                    if engine.intersects(tmpGeom.geometry()):
-                        int_geom = geom.intersection(tmpGeom)
-                        lstIntersectingB.append(tmpGeom)
-
-                        if not int_geom:
-                            # There was a problem creating the intersection
-                            ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
-                                                   self.tr('GEOS geoprocessing error: One or more input features have invalid geometry.'))
-                            int_geom = QgsGeometry()
-                        else:
-                            int_geom = QgsGeometry(int_geom)
-
-                        if int_geom.wkbType() == QgsWkbTypes.Unknown or QgsWkbTypes.flatType(int_geom.geometry().wkbType()) == QgsWkbTypes.GeometryCollection:
-                            # Intersection produced different geomety types
-                            temp_list = int_geom.asGeometryCollection()
-                            for i in temp_list:
-                                if i.type() == geom.type():
-                                    int_geom = QgsGeometry(i)
-                                    try:
-                                        outFeat.setGeometry(int_geom)
-                                        outFeat.setAttributes(atMapA + atMapB)
-                                        writer.addFeature(outFeat)
-                                    except:
-                                        ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
-                                                               self.tr('Feature geometry error: One or more output features ignored due to invalid geometry.'))
-                        else:
-                            # Geometry list: prevents writing error
-                            # in geometries of different types
-                            # produced by the intersection
-                            # fix #3549
-                            if int_geom.wkbType() in wkbTypeGroups[wkbTypeGroups[int_geom.wkbType()]]:
-                                try:
-                                    outFeat.setGeometry(int_geom)
-                                    outFeat.setAttributes(atMapA + atMapB)
-                                    writer.addFeature(outFeat)
-                                except:
-                                    ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
-                                                           self.tr('Feature geometry error: One or more output features ignored due to invalid geometry.'))
-
-                # the remaining bit of inFeatA's geometry
-                # if there is nothing left, this will just silently fail and we're good
-                diff_geom = QgsGeometry(geom)
-                if len(lstIntersectingB) != 0:
-                    intB = QgsGeometry.unaryUnion(lstIntersectingB)
-                    diff_geom = diff_geom.difference(intB)
-
-                if diff_geom.wkbType() == 0 or QgsWkbTypes.flatType(diff_geom.geometry().wkbType()) == QgsWkbTypes.GeometryCollection:
-                    temp_list = diff_geom.asGeometryCollection()
-                    for i in temp_list:
-                        if i.type() == geom.type():
-                            diff_geom = QgsGeometry(i)
-                try:
-                    outFeat.setGeometry(diff_geom)
-                    outFeat.setAttributes(atMapA)
-                    writer.addFeature(outFeat)
-                except:
-                    ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
-                                           self.tr('Feature geometry error: One or more output features ignored due to invalid geometry.'))
+        nFeat = len(featuresA) + len(cacheB.ids)
+        results = map(lambda f: self.unionA(f, cacheB),
+                      cacheA.cachingFeatures(featuresA))
+        for nElement, outputs in enumerate(results):
+            feedback.setProgress(nElement / float(nFeat) * 100)
+            self.writeOutputs(writer, outFeat, outputs)
 
         length = len(vlayerA.fields())
-        atMapA = [None] * length
-
-        featuresA = vector.features(vlayerB)
-        nFeat = len(featuresA)
-        for inFeatA in featuresA:
+        results = map(lambda fid: self.unionB(fid, cacheB, cacheA, length),
+                      cacheB.ids)
+        for nElement, outputs in enumerate(results, len(featuresA)):
             feedback.setProgress(nElement / float(nFeat) * 100)
-            add = False
-            geom = inFeatA.geometry()
-            diff_geom = QgsGeometry(geom)
-            atMap = [None] * length
-            atMap.extend(inFeatA.attributes())
-            intersects = indexB.intersects(geom.boundingBox())
-
-            if len(intersects) < 1:
-                try:
-                    outFeat.setGeometry(geom)
-                    outFeat.setAttributes(atMap)
-                    writer.addFeature(outFeat)
-                except:
-                    ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
-                                           self.tr('Feature geometry error: One or more output features ignored due to invalid geometry.'))
-            else:
-                request = QgsFeatureRequest().setFilterFids(intersects)
-
-                # use prepared geometries for faster intersection tests
-                engine = QgsGeometry.createGeometryEngine(diff_geom.geometry())
-                engine.prepareGeometry()
-
-                for inFeatB in vlayerA.getFeatures(request):
-                    atMapB = inFeatB.attributes()
-                    tmpGeom = inFeatB.geometry()
-
-                    if engine.intersects(tmpGeom.geometry()):
-                        add = True
-                        diff_geom = QgsGeometry(diff_geom.difference(tmpGeom))
-                    else:
-                        try:
-                            # Ihis only happens if the bounding box
-                            # intersects, but the geometry doesn't
-                            outFeat.setGeometry(diff_geom)
-                            outFeat.setAttributes(atMap)
-                            writer.addFeature(outFeat)
-                        except:
-                            ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
-                                                   self.tr('Feature geometry error: One or more output features ignored due to invalid geometry.'))
-
-            if add:
-                try:
-                    outFeat.setGeometry(diff_geom)
-                    outFeat.setAttributes(atMap)
-                    writer.addFeature(outFeat)
-                except:
-                    ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
-                                           self.tr('Feature geometry error: One or more output features ignored due to invalid geometry.'))
-            nElement += 1
+            self.writeOutputs(writer, outFeat, outputs)
 
         del writer
+
+    def writeOutputs(self, writer, outFeat, outputs):
+        for geom, attrs in outputs:
+            try:
+                outFeat.setGeometry(geom)
+                outFeat.setAttributes(attrs)
+                writer.addFeature(outFeat)
+            except:
+                ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
+                                       self.tr('Feature geometry error: One or more output features ignored due to invalid geometry.'))
+
+    def unionA(self, inFeatA, cacheB):
+        """Returns the intersections of a feature of the first layer with
+        the features of the second one, and the remaining part of it, as
+        (geometry, attributes) tuples.
+        """
+        outputs = []
+        lstIntersectingB = []
+        geom = inFeatA.geometry()
+        atMapA = inFeatA.attributes()
+        intersects = cacheB.candidates(geom)
+        if len(intersects) < 1:
+            outputs.append((geom, atMapA))
+            return outputs
+
+        engine = QgsGeometry.createGeometryEngine(geom.geometry())
+        engine.prepareGeometry()
+
+        for fid in intersects:
+            atMapB = cacheB.attributes[fid]
+            tmpGeom = cacheB.geometries[fid]
+
+            if engine.intersects(tmpGeom.geometry()):
+                int_geom = geom.intersection(tmpGeom)
+                lstIntersectingB.append(tmpGeom)
+
+                if not int_geom:
+                    # There was a problem creating the intersection
+                    ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
+                                           self.tr('GEOS geoprocessing error: One or more input features have invalid geometry.'))
+                    int_geom = QgsGeometry()
+                else:
+                    int_geom = QgsGeometry(int_geom)
+
+                if int_geom.wkbType() == QgsWkbTypes.Unknown or QgsWkbTypes.flatType(int_geom.geometry().wkbType()) == QgsWkbTypes.GeometryCollection:
+                    # Intersection produced different geomety types
+                    temp_list = int_geom.asGeometryCollection()
+                    for i in temp_list:
+                        if i.type() == geom.type():
+                            outputs.append((QgsGeometry(i), atMapA + atMapB))
+                else:
+                    # Geometry list: prevents writing error
+                    # in geometries of different types
+                    # produced by the intersection
+                    # fix #3549
+                    if int_geom.wkbType() in wkbTypeGroups[wkbTypeGroups[int_geom.wkbType()]]:
+                        outputs.append((int_geom, atMapA + atMapB))
+
+        # the remaining bit of inFeatA's geometry
+        # if there is nothing left, this will just silently fail and we're good
+        diff_geom = QgsGeometry(geom)
+        if len(lstIntersectingB) != 0:
+            intB = QgsGeometry.unaryUnion(lstIntersectingB)
+            diff_geom = diff_geom.difference(intB)
+
+        if diff_geom.wkbType() == 0 or QgsWkbTypes.flatType(diff_geom.geometry().wkbType()) == QgsWkbTypes.GeometryCollection:
+            temp_list = diff_geom.asGeometryCollection()
+            for i in temp_list:
+                if i.type() == geom.type():
+                    diff_geom = QgsGeometry(i)
+        outputs.append((diff_geom, atMapA))
+        return outputs
+
+    def unionB(self, fid, cacheB, cacheA, length):
+        """Returns the parts of a feature of the second layer which do not
+        intersect the first one, as (geometry, attributes) tuples.
+        """
+        outputs = []
+        add = False
+        geom = cacheB.geometries[fid]
+        diff_geom = QgsGeometry(geom)
+        atMap = [None] * length
+        atMap.extend(cacheB.attributes[fid])
+        intersects = cacheA.candidates(geom)
+
+        if len(intersects) < 1:
+            outputs.append((geom, atMap))
+        else:
+            # use prepared geometries for faster intersection tests
+            engine = QgsGeometry.createGeometryEngine(diff_geom.geometry())
+            engine.prepareGeometry()
+
+            for fidA in intersects:
+                tmpGeom = cacheA.geometries[fidA]
+
+                if engine.intersects(tmpGeom.geometry()):
+                    add = True
+                    diff_geom = QgsGeometry(diff_geom.difference(tmpGeom))
+                else:
+                    # Ihis only happens if the bounding box
+                    # intersects, but the geometry doesn't
+                    outputs.append((diff_geom, atMap))
+
+        if add:
+            outputs.append((diff_geom, atMap))
+        return outputs
@@ -16,7 +16,6 @@
 *                                                                         *
 ***************************************************************************
 """
-from builtins import next
 
 __author__ = 'Victor Olaya'
 __date__ = 'August 2012'
@@ -30,12 +29,14 @@ import os
 
 from qgis.PyQt.QtGui import QIcon
 
-from qgis.core import QgsFeatureRequest, QgsFeature, QgsGeometry, QgsPoint, QgsWkbTypes
+from qgis.core import QgsFeature, QgsGeometry, QgsPoint, QgsRectangle, QgsSpatialIndex, QgsWkbTypes
 
 from processing.core.GeoAlgorithm import GeoAlgorithm
 from processing.core.GeoAlgorithmExecutionException import GeoAlgorithmExecutionException
+from processing.core.ProcessingLog import ProcessingLog
 from processing.core.parameters import ParameterVector
 from processing.core.parameters import ParameterNumber
+from processing.core.parameters import ParameterSelection
 from processing.core.outputs import OutputVector
 from processing.tools import dataobjects, vector
 
@@ -48,6 +49,7 @@ class VoronoiPolygons(GeoAlgorithm):
 
     INPUT = 'INPUT'
     BUFFER = 'BUFFER'
+    METHOD = 'METHOD'
     OUTPUT = 'OUTPUT'
 
     def getIcon(self):
@@ -61,6 +63,10 @@ class VoronoiPolygons(GeoAlgorithm):
                                           self.tr('Input layer'), [dataobjects.TYPE_VECTOR_POINT]))
         self.addParameter(ParameterNumber(self.BUFFER,
                                           self.tr('Buffer region'), 0.0, 100.0, 0.0))
+        self.methods = [self.tr('GEOS'),
+                        self.tr('Fortune sweep (slower)')]
+        self.addParameter(ParameterSelection(self.METHOD,
+                                             self.tr('Method'), self.methods, 0))
 
         self.addOutput(OutputVector(self.OUTPUT, self.tr('Voronoi polygons'), datatype=[dataobjects.TYPE_VECTOR_POLYGON]))
 
@@ -68,6 +74,7 @@ class VoronoiPolygons(GeoAlgorithm):
         layer = dataobjects.getObjectFromUri(self.getParameterValue(self.INPUT))
 
         buf = self.getParameterValue(self.BUFFER)
+        method = self.getParameterValue(self.METHOD)
 
         writer = self.getOutputFromName(self.OUTPUT).getVectorWriter(
             layer.fields().toList(), QgsWkbTypes.Polygon, layer.crs())
@@ -76,12 +83,10 @@ class VoronoiPolygons(GeoAlgorithm):
         extent = layer.extent()
         extraX = extent.height() * (buf / 100.0)
         extraY = extent.width() * (buf / 100.0)
-        height = extent.height()
-        width = extent.width()
-        c = voronoi.Context()
-        pts = []
-        ptDict = {}
-        ptNdx = -1
+
+        # attributes of the first feature found at each location
+        pts = {}
+        nPoints = 0
 
         features = vector.features(layer)
         total = 100.0 / len(features)
@@ -90,46 +95,88 @@ class VoronoiPolygons(GeoAlgorithm):
             point = geom.asPoint()
             x = point.x() - extent.xMinimum()
             y = point.y() - extent.yMinimum()
-            pts.append((x, y))
-            ptNdx += 1
-            ptDict[ptNdx] = inFeat.id()
+            nPoints += 1
+            if (x, y) not in pts:
+                pts[(x, y)] = inFeat.attributes()
             feedback.setProgress(int(current * total))
 
-        if len(pts) < 3:
+        if nPoints < 3:
             raise GeoAlgorithmExecutionException(
                 self.tr('Input file should contain at least 3 points. Choose '
                         'another file and try again.'))
 
-        uniqueSet = set(item for item in pts)
-        ids = [pts.index(item) for item in uniqueSet]
-        sl = voronoi.SiteList([voronoi.Site(i[0], i[1], sitenum=j) for (j,
-                                                                        i) in enumerate(uniqueSet)])
-        voronoi.voronoi(sl, c)
-        inFeat = QgsFeature()
-
-        current = 0
-        if len(c.polygons) == 0:
+        sites = list(pts.keys())
+        polygons = None
+        if method == 0:
+            polygons = self.geosPolygons(sites, extent, extraX, extraY)
+            if polygons is None:
+                ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
+                                       self.tr('GEOS could not compute the Voronoi diagram, using the Fortune algorithm instead'))
+        if polygons is None:
+            polygons = self.fortunePolygons(sites, extent, extraX, extraY)
+
+        if len(polygons) == 0:
             raise GeoAlgorithmExecutionException(
                 self.tr('There were no polygons created.'))
 
-        total = 100.0 / len(c.polygons)
-
-        for (site, edges) in list(c.polygons.items()):
-            request = QgsFeatureRequest().setFilterFid(ptDict[ids[site]])
-            inFeat = next(layer.getFeatures(request))
-            lines = self.clip_voronoi(edges, c, width, height, extent, extraX, extraY)
-
-            geom = QgsGeometry.fromMultiPoint(lines)
-            geom = QgsGeometry(geom.convexHull())
+        total = 100.0 / len(polygons)
+        for current, (site, geom) in enumerate(polygons):
             outFeat.setGeometry(geom)
-            outFeat.setAttributes(inFeat.attributes())
+            outFeat.setAttributes(pts[sites[site]])
             writer.addFeature(outFeat)
-
-            current += 1
             feedback.setProgress(int(current * total))
 
         del writer
 
+    def geosPolygons(self, sites, extent, exX, exY):
+        """Returns (site index, polygon) tuples with the Voronoi cells
+        computed by GEOS and clipped to the buffered extent, or None if
+        GEOS does not support Voronoi diagrams.
+
+        Cells are sorted by site and rebuilt as convex hulls like in the
+        Fortune method, so the output does not depend on the order in
+        which GEOS returns cells and vertices.
+        """
+        xMin = extent.xMinimum()
+        yMin = extent.yMinimum()
+        clipRect = QgsRectangle(xMin - exX, yMin - exY,
+                                extent.xMaximum() + exX, extent.yMaximum() + exY)
+        clipGeom = QgsGeometry.fromRect(clipRect)
+        points = [QgsPoint(x + xMin, y + yMin) for (x, y) in sites]
+        diagram = QgsGeometry.fromMultiPoint(points).voronoiDiagram(clipGeom)
+        if diagram.isEmpty():
+            return None
+
+        # GEOS does not return the cells in the order of the sites, so
+        # each cell is matched with the site it contains
+        index = QgsSpatialIndex()
+        for i, point in enumerate(points):
+            feat = QgsFeature(i)
+            feat.setGeometry(QgsGeometry.fromPoint(point))
+            index.insertFeature(feat)
+
+        polygons = []
+        for cell in diagram.asGeometryCollection():
+            for i in index.intersects(cell.boundingBox()):
+                if cell.contains(points[i]):
+                    clipped = cell.intersection(clipGeom)
+                    polygons.append((i, QgsGeometry(clipped.convexHull())))
+                    break
+        polygons.sort(key=lambda polygon: polygon[0])
+        return polygons
+
+    def fortunePolygons(self, sites, extent, exX, exY):
+        c = voronoi.Context()
+        sl = voronoi.SiteList([voronoi.Site(x, y, sitenum=j) for (j, (x, y)) in enumerate(sites)])
+        voronoi.voronoi(sl, c)
+
+        polygons = []
+        for (site, edges) in list(c.polygons.items()):
+            lines = self.clip_voronoi(edges, c, extent.width(), extent.height(), extent, exX, exY)
+            geom = QgsGeometry.fromMultiPoint(lines)
+            polygons.append((site, QgsGeometry(geom.convexHull())))
+        return polygons
+
     def clip_voronoi(self, edges, c, width, height, extent, exX, exY):
         """Clip voronoi function based on code written for Inkscape.
         Copyright (C) 2010 Alvin Penner, penner@vaxxine.com
@@ -55,8 +55,12 @@ class ZonalStatistics(GeoAlgorithm):
     INPUT_VECTOR = 'INPUT_VECTOR'
     COLUMN_PREFIX = 'COLUMN_PREFIX'
     GLOBAL_EXTENT = 'GLOBAL_EXTENT'
+    SINGLE_PASS = 'SINGLE_PASS'
     OUTPUT_LAYER = 'OUTPUT_LAYER'
 
+    # Size in pixels of the tiles processed in single pass mode
+    TILE_SIZE = 2048
+
     def defineCharacteristics(self):
         self.name, self.i18n_name = self.trAlgorithm('Zonal Statistics')
         self.group, self.i18n_group = self.trAlgorithm('Raster tools')
@@ -72,6 +76,9 @@ class ZonalStatistics(GeoAlgorithm):
                                           self.tr('Output column prefix'), '_'))
         self.addParameter(ParameterBoolean(self.GLOBAL_EXTENT,
                                            self.tr('Load whole raster in memory')))
+        self.addParameter(ParameterBoolean(self.SINGLE_PASS,
+                                           self.tr('Rasterize all zones at once (zones must not overlap)'),
+                                           False))
         self.addOutput(OutputVector(self.OUTPUT_LAYER, self.tr('Zonal statistics'), datatype=[dataobjects.TYPE_VECTOR_POLYGON]))
 
     def processAlgorithm(self, feedback):
@@ -85,6 +92,7 @@ class ZonalStatistics(GeoAlgorithm):
         bandNumber = self.getParameterValue(self.RASTER_BAND)
         columnPrefix = self.getParameterValue(self.COLUMN_PREFIX)
         useGlobalExtent = self.getParameterValue(self.GLOBAL_EXTENT)
+        singlePass = self.getParameterValue(self.SINGLE_PASS)
 
         rasterDS = gdal.Open(rasterPath, gdal.GA_ReadOnly)
         geoTransform = rasterDS.GetGeoTransform()
@@ -106,7 +114,7 @@ class ZonalStatistics(GeoAlgorithm):
         crs = osr.SpatialReference()
         crs.ImportFromProj4(str(layer.crs().toProj4()))
 
-        if useGlobalExtent:
+        if useGlobalExtent and not singlePass:
             xMin = rasterBBox.xMinimum()
             xMax = rasterBBox.xMaximum()
             yMin = rasterBBox.yMinimum()
@@ -158,6 +166,10 @@ class ZonalStatistics(GeoAlgorithm):
         if hasSciPy:
             (idxMode, fields) = vector.findOrCreateField(layer, fields,
                                                          columnPrefix + 'mode', 21, 6)
+        else:
+            idxMode = None
+        indexes = (idxMin, idxMax, idxSum, idxCount, idxMean, idxStd,
+                   idxUnique, idxRange, idxVar, idxMedian, idxMode)
 
         writer = self.getOutputFromName(self.OUTPUT_LAYER).getVectorWriter(
             fields.toList(), layer.wkbType(), layer.crs())
@@ -167,6 +179,13 @@ class ZonalStatistics(GeoAlgorithm):
         outFeat.initAttributes(len(fields))
         outFeat.setFields(fields)
 
+        if singlePass:
+            self.processAllZones(feedback, layer, rasterBand, geoTransform,
+                                 crs, writer, outFeat, indexes)
+            rasterDS = None
+            del writer
+            return
+
         features = vector.features(layer)
         total = 100.0 / len(features)
         for current, f in enumerate(features):
@@ -261,3 +280,231 @@ class ZonalStatistics(GeoAlgorithm):
         rasterDS = None
 
         del writer
+
+    def processAllZones(self, feedback, layer, rasterBand, geoTransform, crs,
+                        writer, outFeat, indexes):
+        """Computes the statistics of all zones in a single pass over the
+        raster.
+
+        Zone ids are burnt into one label raster per tile, and statistics
+        are computed for all zones of a tile at once using grouped NumPy
+        reductions. Values of zones spanning several tiles are kept
+        until the last tile they touch has been read.
+
+        As in the per zone mode, zones which do not overlap the raster are
+        left out of the output.
+        """
+        noData = rasterBand.GetNoDataValue()
+        scale = rasterBand.GetScale()
+        offset = rasterBand.GetOffset()
+        xSize = rasterBand.XSize
+        ySize = rasterBand.YSize
+        tileSize = self.TILE_SIZE
+        tileColumns = (xSize + tileSize - 1) // tileSize
+        tileRows = (ySize + tileSize - 1) // tileSize
+
+        memVDS = ogr.GetDriverByName('Memory').CreateDataSource('zones')
+        memLayer = memVDS.CreateLayer('zones', crs, ogr.wkbMultiPolygon)
+        memLayer.CreateField(ogr.FieldDefn('zone', ogr.OFTInteger))
+        zoneDefn = memLayer.GetLayerDefn()
+
+        # Zones are numbered from 1, 0 is used for cells outside any zone
+        feedback.setProgressText(self.tr('Rasterizing zones...'))
+        labels = dict()
+        outside = set()
+        spanning = [False]
+        lastTile = [-1]
+        finishing = dict()
+        for f in vector.features(layer):
+            zone = len(labels) + 1
+            labels[f.id()] = zone
+            spanning.append(False)
+            lastTile.append(-1)
+
+            geom = f.geometry()
+            if geom is None or geom.isEmpty():
+                outside.add(f.id())
+                continue
+
+            # rows and columns are ordered by the sign of the cell size,
+            # so the corners of the bounding box might be swapped
+            bbox = geom.boundingBox()
+            (column1, row1) = mapToPixel(bbox.xMinimum(), bbox.yMaximum(), geoTransform)
+            (column2, row2) = mapToPixel(bbox.xMaximum(), bbox.yMinimum(), geoTransform)
+            startColumn, endColumn = min(column1, column2), max(column1, column2)
+            startRow, endRow = min(row1, row2), max(row1, row2)
+            if endColumn < 0 or startColumn >= xSize or endRow < 0 or startRow >= ySize:
+                outside.add(f.id())
+                continue
+
+            ft = ogr.Feature(zoneDefn)
+            ft.SetGeometry(ogr.CreateGeometryFromWkb(bytes(geom.exportToWkb())))
+            ft.SetField('zone', zone)
+            memLayer.CreateFeature(ft)
+            ft = None
+
+            startTileColumn = min(max(startColumn, 0), xSize - 1) // tileSize
+            startTileRow = min(max(startRow, 0), ySize - 1) // tileSize
+            endTileColumn = min(max(endColumn, 0), xSize - 1) // tileSize
+            endTileRow = min(max(endRow, 0), ySize - 1) // tileSize
+
+            lastTile[zone] = endTileRow * tileColumns + endTileColumn
+            if startTileColumn != endTileColumn or startTileRow != endTileRow:
+                spanning[zone] = True
+                finishing.setdefault(lastTile[zone], []).append(zone)
+
+        spanning = numpy.array(spanning, dtype=bool)
+        nZones = len(labels) + 1
+        results = {}
+        for stat in ('min', 'max', 'sum', 'mean', 'std', 'var', 'median', 'mode'):
+            results[stat] = numpy.full(nZones, numpy.nan)
+        results['count'] = numpy.zeros(nZones, dtype=numpy.int64)
+        results['unique'] = numpy.zeros(nZones, dtype=numpy.int64)
+
+        memRasterDriver = gdal.GetDriverByName('MEM')
+        pending = dict()
+        total = 90.0 / (tileColumns * tileRows)
+        for tileRow in range(tileRows):
+            for tileColumn in range(tileColumns):
+                tile = tileRow * tileColumns + tileColumn
+                xOff = tileColumn * tileSize
+                yOff = tileRow * tileSize
+                width = min(tileSize, xSize - xOff)
+                height = min(tileSize, ySize - yOff)
+
+                tileGeoTransform = (
+                    geoTransform[0] + xOff * geoTransform[1],
+                    geoTransform[1],
+                    0.0,
+                    geoTransform[3] + yOff * geoTransform[5],
+                    0.0,
+                    geoTransform[5],
+                )
+                xMin = tileGeoTransform[0]
+                xMax = xMin + width * geoTransform[1]
+                yMax = tileGeoTransform[3]
+                yMin = yMax + height * geoTransform[5]
+                memLayer.SetSpatialFilterRect(min(xMin, xMax), min(yMin, yMax),
+                                              max(xMin, xMax), max(yMin, yMax))
+
+                labelDS = memRasterDriver.Create('', width, height, 1, gdal.GDT_Int32)
+                labelDS.SetGeoTransform(tileGeoTransform)
+                gdal.RasterizeLayer(labelDS, [1], memLayer, options=['ATTRIBUTE=zone'])
+                zoneArray = labelDS.ReadAsArray()
+                labelDS = None
+
+                # as in the per zone mode, no data is compared with the
+                # scaled values
+                srcArray = rasterBand.ReadAsArray(xOff, yOff, width, height)
+                srcArray = numpy.nan_to_num(srcArray * scale + offset)
+                valid = zoneArray > 0
+                if noData is not None:
+                    valid &= srcArray != noData
+                zoneArray = zoneArray[valid]
+                srcArray = srcArray[valid]
+
+                complete = ~spanning[zoneArray]
+                self.storeZoneStatistics(results, zoneArray[complete], srcArray[complete])
+
+                zoneArray = zoneArray[~complete]
+                srcArray = srcArray[~complete]
+                if zoneArray.size > 0:
+                    order = numpy.argsort(zoneArray, kind='mergesort')
+                    zoneArray = zoneArray[order]
+                    srcArray = srcArray[order]
+                    starts = numpy.flatnonzero(numpy.r_[True, zoneArray[1:] != zoneArray[:-1]])
+                    for values, zone in zip(numpy.split(srcArray, starts[1:]), zoneArray[starts]):
+                        pending.setdefault(zone, []).append(values)
+
+                finished = [z for z in finishing.pop(tile, []) if z in pending]
+                if finished:
+                    chunks = [numpy.concatenate(pending.pop(z)) for z in finished]
+                    self.storeZoneStatistics(results,
+                                             numpy.repeat(finished, [c.size for c in chunks]),
+                                             numpy.concatenate(chunks))
+
+                feedback.setProgress(int((tile + 1) * total))
+
+        memVDS = None
+
+        (idxMin, idxMax, idxSum, idxCount, idxMean, idxStd,
+         idxUnique, idxRange, idxVar, idxMedian, idxMode) = indexes
+
+        def value(stat, zone):
+            v = float(results[stat][zone])
+            return None if numpy.isnan(v) else v
+
+        features = vector.features(layer)
+        total = 10.0 / len(features) if len(features) > 0 else 0
+        for current, f in enumerate(features):
+            if f.id() in outside:
+                continue
+            zone = labels.get(f.id(), 0)
+            outFeat.setGeometry(f.geometry())
+
+            attrs = f.attributes()
+            attrs.insert(idxMin, value('min', zone))
+            attrs.insert(idxMax, value('max', zone))
+            attrs.insert(idxSum, value('sum', zone))
+            attrs.insert(idxCount, int(results['count'][zone]))
+            attrs.insert(idxMean, value('mean', zone))
+            attrs.insert(idxStd, value('std', zone))
+            attrs.insert(idxUnique, int(results['unique'][zone]))
+            v = value('max', zone)
+            attrs.insert(idxRange, None if v is None else v - value('min', zone))
+            attrs.insert(idxVar, value('var', zone))
+            attrs.insert(idxMedian, value('median', zone))
+            if idxMode is not None:
+                attrs.insert(idxMode, value('mode', zone))
+
+            outFeat.setAttributes(attrs)
+            writer.addFeature(outFeat)
+
+            feedback.setProgress(90 + int(current * total))
+
+    def storeZoneStatistics(self, results, zones, values):
+        """Computes the statistics of every zone present in the zones
+        array, using the matching cell values, and stores them in the
+        results arrays indexed by zone.
+
+        All values of a zone must be passed in a single call.
+        """
+        if zones.size == 0:
+            return
+
+        # Sort by zone, then by value, so that each zone is a contiguous
+        # and sorted slice of the values array
+        order = numpy.lexsort((values, zones))
+        zones = zones[order]
+        values = values[order].astype(numpy.float64)
+
+        zoneChange = numpy.r_[True, zones[1:] != zones[:-1]]
+        starts = numpy.flatnonzero(zoneChange)
+        counts = numpy.diff(numpy.r_[starts, zones.size])
+        ids = zones[starts]
+
+        sums = numpy.add.reduceat(values, starts)
+        means = sums / counts
+        variances = numpy.add.reduceat((values - numpy.repeat(means, counts)) ** 2, starts) / counts
+
+        results['count'][ids] = counts
+        results['sum'][ids] = sums
+        results['mean'][ids] = means
+        results['var'][ids] = variances
+        results['std'][ids] = numpy.sqrt(variances)
+        results['min'][ids] = values[starts]
+        results['max'][ids] = values[starts + counts - 1]
+        results['median'][ids] = (values[starts + (counts - 1) // 2] +
+                                  values[starts + counts // 2]) / 2.0
+
+        # Runs of identical values within a zone give the number of unique
+        # values and the mode (the smallest of the most frequent values)
+        runChange = zoneChange | numpy.r_[True, values[1:] != values[:-1]]
+        results['unique'][ids] = numpy.add.reduceat(runChange.astype(numpy.int64), starts)
+
+        runStarts = numpy.flatnonzero(runChange)
+        runLengths = numpy.diff(numpy.r_[runStarts, zones.size])
+        runZones = zones[runStarts]
+        byLength = numpy.lexsort((runStarts, -runLengths, runZones))
+        firstRuns = byLength[numpy.r_[True, runZones[byLength][1:] != runZones[byLength][:-1]]]
+        results['mode'][runZones[firstRuns]] = values[runStarts[firstRuns]]
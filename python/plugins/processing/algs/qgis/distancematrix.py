@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    distancematrix.py
+    ---------------------
+    Date                 : April 2017
+    Copyright            : (C) 2017 by the QGIS Development Team
+    Email                : qgis-developer at lists dot osgeo dot org
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Development Team'
+__date__ = 'April 2017'
+__copyright__ = '(C) 2017, the QGIS Development Team'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import numpy
+
+try:
+    from scipy.spatial import cKDTree
+    hasSciPy = True
+except:
+    hasSciPy = False
+
+# maximum number of distances computed at once when comparing a chunk
+# of source points with all the target points
+CHUNK_CELLS = 4194304
+
+
+def nearestNeighbours(sources, targets, k, ellipsoid=None):
+    """Finds the k nearest target points of each source point.
+
+    sources and targets are arrays of shape (n, 2) with the coordinates
+    of the points. If an ellipsoid is given as a (semi major axis, semi
+    minor axis) tuple, coordinates must be longitudes and latitudes in
+    degrees, and distances are measured on that ellipsoid. Otherwise,
+    distances are planar.
+
+    Source points are processed in chunks, so the results can be written
+    before the whole matrix is computed. For each chunk, this yields the
+    index of its first source point, and two arrays of shape (chunk
+    size, k) with the indices of the nearest targets and the distances
+    to them, sorted by distance.
+    """
+    k = min(k, len(targets))
+    if ellipsoid is None:
+        for start, indices, distances in _nearest(sources, targets, k):
+            yield start, indices, distances
+        return
+
+    # candidates are found using the straight line distance between
+    # geocentric coordinates, and then sorted by their distance on the
+    # ellipsoid. A few more candidates are taken, since both orders
+    # might differ slightly
+    a, b = ellipsoid
+    candidates = min(len(targets), 2 * k)
+    for start, indices, chordDistances in _nearest(_geocentric(sources, a, b),
+                                           _geocentric(targets, a, b),
+                                           candidates):
+        chunk = sources[start:start + len(indices)]
+        distances = ellipsoidalDistance(chunk[:, 0, None], chunk[:, 1, None],
+                                        targets[indices, 0], targets[indices, 1],
+                                        a, b)
+        rows = numpy.arange(len(chunk))[:, None]
+        order = numpy.argsort(distances, axis=1)[:, :k]
+        yield start, indices[rows, order], distances[rows, order]
+
+
+def _nearest(sources, targets, k):
+    if len(targets) == 0 or k == 0:
+        return
+
+    if hasSciPy and k < len(targets):
+        chunkSize = max(1, CHUNK_CELLS // k)
+        tree = cKDTree(targets)
+        for start in range(0, len(sources), chunkSize):
+            distances, indices = tree.query(sources[start:start + chunkSize], k)
+            yield (start, indices.reshape(-1, k), distances.reshape(-1, k))
+        return
+
+    chunkSize = max(1, CHUNK_CELLS // len(targets))
+    for start in range(0, len(sources), chunkSize):
+        chunk = sources[start:start + chunkSize]
+        rows = numpy.arange(len(chunk))[:, None]
+        sqrDistances = numpy.zeros((len(chunk), len(targets)))
+        for axis in range(sources.shape[1]):
+            sqrDistances += (chunk[:, axis, None] - targets[None, :, axis]) ** 2
+        if k < len(targets):
+            indices = numpy.argpartition(sqrDistances, k - 1, axis=1)[:, :k]
+            sqrDistances = sqrDistances[rows, indices]
+        else:
+            indices = numpy.tile(numpy.arange(len(targets)), (len(chunk), 1))
+        order = numpy.argsort(sqrDistances, axis=1)
+        yield start, indices[rows, order], numpy.sqrt(sqrDistances[rows, order])
+
+
+def _geocentric(points, a, b):
+    """Converts longitudes and latitudes in degrees to geocentric
+    cartesian coordinates.
+    """
+    lon = numpy.radians(points[:, 0])
+    lat = numpy.radians(points[:, 1])
+    e2 = 1 - (b * b) / (a * a)
+    n = a / numpy.sqrt(1 - e2 * numpy.sin(lat) ** 2)
+    return numpy.column_stack((n * numpy.cos(lat) * numpy.cos(lon),
+                               n * numpy.cos(lat) * numpy.sin(lon),
+                               n * (1 - e2) * numpy.sin(lat)))
+
+
+def ellipsoidalDistance(lon1, lat1, lon2, lat2, a, b, iterations=100):
+    """Computes the distance between points on an ellipsoid, using the
+    inverse Vincenty formula. Arguments are arrays of longitudes and
+    latitudes in degrees, which are broadcast together.
+
+    For nearly antipodal points, the formula might not converge, and the
+    distance is only approximated.
+    """
+    f = (a - b) / a
+    L = numpy.radians(lon2 - lon1)
+    U1 = numpy.arctan((1 - f) * numpy.tan(numpy.radians(lat1)))
+    U2 = numpy.arctan((1 - f) * numpy.tan(numpy.radians(lat2)))
+    sinU1, cosU1 = numpy.sin(U1), numpy.cos(U1)
+    sinU2, cosU2 = numpy.sin(U2), numpy.cos(U2)
+
+    lam = L
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        for i in range(iterations):
+            sinLam, cosLam = numpy.sin(lam), numpy.cos(lam)
+            sinSigma = numpy.sqrt((cosU2 * sinLam) ** 2 +
+                                  (cosU1 * sinU2 - sinU1 * cosU2 * cosLam) ** 2)
+            cosSigma = sinU1 * sinU2 + cosU1 * cosU2 * cosLam
+            sigma = numpy.arctan2(sinSigma, cosSigma)
+            sinAlpha = numpy.where(sinSigma == 0, 0, cosU1 * cosU2 * sinLam / sinSigma)
+            cos2Alpha = 1 - sinAlpha ** 2
+            # points on the equator
+            cos2SigmaM = numpy.where(cos2Alpha == 0, 0, cosSigma - 2 * sinU1 * sinU2 / cos2Alpha)
+            C = f / 16 * cos2Alpha * (4 + f * (4 - 3 * cos2Alpha))
+            previous = lam
+            lam = L + (1 - C) * f * sinAlpha * (
+                sigma + C * sinSigma * (cos2SigmaM + C * cosSigma * (-1 + 2 * cos2SigmaM ** 2)))
+            if numpy.all(numpy.abs(lam - previous) < 1e-12):
+                break
+
+    uSq = cos2Alpha * (a * a - b * b) / (b * b)
+    A = 1 + uSq / 16384 * (4096 + uSq * (-768 + uSq * (320 - 175 * uSq)))
+    B = uSq / 1024 * (256 + uSq * (-128 + uSq * (74 - 47 * uSq)))
+    deltaSigma = B * sinSigma * (cos2SigmaM + B / 4 * (
+        cosSigma * (-1 + 2 * cos2SigmaM ** 2) -
+        B / 6 * cos2SigmaM * (-3 + 4 * sinSigma ** 2) * (-3 + 4 * cos2SigmaM ** 2)))
+    return b * A * (sigma - deltaSigma)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    overlay.py
+    ---------------------
+    Date                 : April 2017
+    Copyright            : (C) 2017 by the QGIS Development Team
+    Email                : qgis-developer at lists dot osgeo dot org
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Development Team'
+__date__ = 'April 2017'
+__copyright__ = '(C) 2017, the QGIS Development Team'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+from collections import OrderedDict
+
+from qgis.core import QgsFeatureRequest, QgsGeometry, QgsSpatialIndex
+
+from processing.tools import vector
+
+# Maximum number of prepared geometry engines kept by a FeatureCache
+ENGINE_CACHE_SIZE = 1000
+
+
+class FeatureCache(object):
+    """Keeps the geometries, and optionally the attributes, of the
+    features of a layer in memory, along with a spatial index, so the
+    layer is read only once by overlay algorithms.
+
+    Prepared geometry engines are created the first time they are
+    needed and reused afterwards. Only the most recently used ones are
+    kept, up to maxEngines of them.
+    """
+
+    def __init__(self, attributes=True, maxEngines=ENGINE_CACHE_SIZE):
+        self.index = QgsSpatialIndex()
+        self.ids = []
+        self.rows = {}
+        self.geometries = {}
+        self.attributes = {}
+        self.withAttributes = attributes
+        self.engines = OrderedDict()
+        self.maxEngines = maxEngines
+
+    @staticmethod
+    def fromLayer(layer, attributes=True):
+        cache = FeatureCache(attributes)
+        request = QgsFeatureRequest()
+        if not attributes:
+            request.setSubsetOfAttributes([])
+        for feature in vector.features(layer, request):
+            cache.addFeature(feature)
+        return cache
+
+    def addFeature(self, feature):
+        fid = feature.id()
+        self.rows[fid] = len(self.ids)
+        self.ids.append(fid)
+        self.geometries[fid] = QgsGeometry(feature.geometry())
+        if self.withAttributes:
+            self.attributes[fid] = feature.attributes()
+        if feature.hasGeometry():
+            self.index.insertFeature(feature)
+
+    def cachingFeatures(self, features):
+        """Adds the given features to the cache while iterating them.
+        """
+        for feature in features:
+            self.addFeature(feature)
+            yield feature
+
+    def candidates(self, geom):
+        """Returns the ids of the features whose bounding box intersects
+        the one of the given geometry, in ascending order.
+        """
+        return self.intersecting(geom.boundingBox())
+
+    def intersecting(self, rect):
+        """Returns the ids of the features whose bounding box intersects
+        the given rectangle, in ascending order.
+        """
+        return sorted(self.index.intersects(rect))
+
+    def engine(self, fid):
+        """Returns a prepared geometry engine for the geometry of a feature.
+        """
+        engine = self.engines.get(fid)
+        if engine is None:
+            engine = QgsGeometry.createGeometryEngine(self.geometries[fid].geometry())
+            engine.prepareGeometry()
+            self.engines[fid] = engine
+            if len(self.engines) > self.maxEngines:
+                self.engines.popitem(last=False)
+        else:
+            self.engines.move_to_end(fid)
+        return engine
+
+
+def difference(geom, cache):
+    """Returns the difference between a geometry and the geometries of
+    the features in a FeatureCache.
+    """
+    diff_geom = QgsGeometry(geom)
+    for fid in cache.candidates(geom):
+        if diff_geom.isEmpty():
+            break
+        if cache.engine(fid).intersects(diff_geom.geometry()):
+            diff_geom = QgsGeometry(diff_geom.difference(cache.geometries[fid]))
+    return diff_geom
+
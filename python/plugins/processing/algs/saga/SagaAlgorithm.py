@@ -38,6 +38,7 @@ from processing.core.GeoAlgorithm import GeoAlgorithm
 from processing.core.ProcessingConfig import ProcessingConfig
 from processing.core.ProcessingLog import ProcessingLog
 from processing.core.GeoAlgorithmExecutionException import GeoAlgorithmExecutionException
+from processing.core.providercache import LazyDescription
 from processing.core.parameters import (getParameterFromString,
                                         ParameterExtent,
                                         ParameterRaster,
@@ -62,16 +63,27 @@ pluginPath = os.path.normpath(os.path.join(
 sessionExportedLayers = {}
 
 
-class SagaAlgorithm(GeoAlgorithm):
+class SagaAlgorithm(LazyDescription, GeoAlgorithm):
 
     OUTPUT_EXTENT = 'OUTPUT_EXTENT'
 
-    def __init__(self, descriptionfile):
+    # lines of the description file with the name and group
+    HEADER_LINES = 2
+
+    def __init__(self, descriptionfile, header=None):
+        """If the header lines of the description file are passed, the
+        rest of the file is only read when the parameters or outputs
+        of the algorithm are first needed.
+        """
         GeoAlgorithm.__init__(self)
         self.hardcodedStrings = []
         self.allowUnmatchingGridExtents = False
         self.descriptionFile = descriptionfile
-        self.defineCharacteristicsFromFile()
+        if header is None:
+            self.defineCharacteristicsFromFile()
+        else:
+            self.defineHeader(header)
+            self.setPendingDefinition()
         self._icon = None
 
     def getCopy(self):
@@ -84,29 +96,30 @@ class SagaAlgorithm(GeoAlgorithm):
             self._icon = QIcon(os.path.join(pluginPath, 'images', 'saga.png'))
         return self._icon
 
-    def defineCharacteristicsFromFile(self):
-        with open(self.descriptionFile) as lines:
-            line = lines.readline().strip('\n').strip()
-            self.name = line
-            if '|' in self.name:
-                tokens = self.name.split('|')
-                self.name = tokens[0]
-                # cmdname is the name of the algorithm in SAGA, that is, the name to use to call it in the console
-                self.cmdname = tokens[1]
+    def defineHeader(self, header):
+        self.name = header[0]
+        if '|' in self.name:
+            tokens = self.name.split('|')
+            self.name = tokens[0]
+            # cmdname is the name of the algorithm in SAGA, that is, the name to use to call it in the console
+            self.cmdname = tokens[1]
 
-            else:
-                self.cmdname = self.name
-                self.i18n_name = QCoreApplication.translate("SAGAAlgorithm", str(self.name))
-            # _commandLineName is the name used in processing to call the algorithm
-            # Most of the time will be equal to the cmdname, but in same cases, several processing algorithms
-            # call the same SAGA one
-            self._commandLineName = self.createCommandLineName(self.name)
-            self.name = decoratedAlgorithmName(self.name)
+        else:
+            self.cmdname = self.name
             self.i18n_name = QCoreApplication.translate("SAGAAlgorithm", str(self.name))
-            line = lines.readline().strip('\n').strip()
-            self.undecoratedGroup = line
-            self.group = decoratedGroupName(self.undecoratedGroup)
-            self.i18n_group = QCoreApplication.translate("SAGAAlgorithm", self.group)
+        # _commandLineName is the name used in processing to call the algorithm
+        # Most of the time will be equal to the cmdname, but in same cases, several processing algorithms
+        # call the same SAGA one
+        self._commandLineName = self.createCommandLineName(self.name)
+        self.name = decoratedAlgorithmName(self.name)
+        self.i18n_name = QCoreApplication.translate("SAGAAlgorithm", str(self.name))
+        self.undecoratedGroup = header[1]
+        self.group = decoratedGroupName(self.undecoratedGroup)
+        self.i18n_group = QCoreApplication.translate("SAGAAlgorithm", self.group)
+
+    def defineCharacteristicsFromFile(self):
+        with open(self.descriptionFile) as lines:
+            self.defineHeader([lines.readline().strip('\n').strip() for i in range(self.HEADER_LINES)])
             line = lines.readline().strip('\n').strip()
             while line != '':
                 if line.startswith('Hardcoded'):
@@ -31,6 +31,7 @@ from qgis.PyQt.QtGui import QIcon
 from processing.core.AlgorithmProvider import AlgorithmProvider
 from processing.core.ProcessingConfig import ProcessingConfig, Setting
 from processing.core.ProcessingLog import ProcessingLog
+from processing.core.providercache import providerCache
 from processing.tools.system import isWindows, isMac
 
 from .SagaAlgorithm import SagaAlgorithm
@@ -87,19 +88,28 @@ class SagaAlgorithmProvider(AlgorithmProvider):
                                    self.tr('Problem with SAGA installation: unsupported SAGA version found.'))
             return
 
+        # algorithms are created from the cached first lines of their
+        # description files, and read the rest when they are first used
         folder = SagaUtils.sagaDescriptionPath()
-        for descriptionFile in os.listdir(folder):
-            if descriptionFile.endswith('txt'):
-                try:
-                    alg = SagaAlgorithm(os.path.join(folder, descriptionFile))
-                    if alg.name.strip() != '':
-                        self.algs.append(alg)
-                    else:
-                        ProcessingLog.addToLog(ProcessingLog.LOG_ERROR,
-                                               self.tr('Could not open SAGA algorithm: {}'.format(descriptionFile)))
-                except Exception as e:
+        descriptions, stale = providerCache.descriptions(self.id(), folder,
+                                                         SagaAlgorithm.HEADER_LINES)
+        stale = set(stale)
+        newAlgs = []
+        for descriptionFile, header in descriptions:
+            try:
+                alg = SagaAlgorithm(descriptionFile, header)
+                if alg.name.strip() != '':
+                    self.algs.append(alg)
+                    if descriptionFile in stale:
+                        newAlgs.append(alg)
+                else:
                     ProcessingLog.addToLog(ProcessingLog.LOG_ERROR,
-                                           self.tr('Could not open SAGA algorithm: {}\n{}'.format(descriptionFile, str(e))))
+                                           self.tr('Could not open SAGA algorithm: {}'.format(descriptionFile)))
+            except Exception as e:
+                ProcessingLog.addToLog(ProcessingLog.LOG_ERROR,
+                                       self.tr('Could not open SAGA algorithm: {}\n{}'.format(descriptionFile, str(e))))
+        providerCache.defineInBackground(self.id(), newAlgs,
+                                         self.tr('Could not open SAGA algorithm: {}\n{}'))
 
         self.algs.append(SplitRGBBands())
 
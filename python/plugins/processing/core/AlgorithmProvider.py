@@ -64,6 +64,29 @@ class AlgorithmProvider(QgsProcessingProvider):
         """
         pass
 
+    def canLoadAlgorithmFromFile(self):
+        """Returns True if the provider can load a single algorithm from
+        its file with loadAlgorithmFromFile().
+
+        Providers whose algorithms are defined in files should return
+        True, so a single algorithm can be loaded again when its file is
+        added, edited or removed.
+        """
+        return False
+
+    def algorithmsFolders(self):
+        """Returns the folders where the files of the algorithms of the
+        provider are found. Only files in these folders are loaded with
+        loadAlgorithmFromFile().
+        """
+        return []
+
+    def loadAlgorithmFromFile(self, descriptionFile):
+        """Returns the algorithm defined in a file, or None if the file
+        does not contain a valid algorithm.
+        """
+        return None
+
     def initializeSettings(self):
         """This is the place where you should add config parameters
         using the ProcessingConfig class.
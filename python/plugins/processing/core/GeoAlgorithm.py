@@ -78,6 +78,11 @@ class GeoAlgorithm(object):
         # False if it should not be run a a batch process
         self.canRunInBatchMode = True
 
+        # True if several instances of the algorithm can be executed at
+        # the same time in different threads (for instance, when it only
+        # runs an external process and does not share any files)
+        self.canRunInParallel = False
+
         # To be set by the provider when it loads the algorithm
         self.provider = None
 
@@ -209,16 +214,62 @@ class GeoAlgorithm(object):
             feedback = QgsProcessingFeedback()
 
         self.model = model
+        self.executeSteps([self.prepareExecution, self.processAlgorithm,
+                           self.closeOutputs, self.finishExecution], feedback)
+
+    def prepareExecution(self, feedback):
+        """Performs the operations done by execute() before calling
+        processAlgorithm().
+
+        They use shared state and run user scripts, so when the
+        algorithm itself is run in a worker thread, this has to be
+        called from the main thread.
+        """
+        self.setOutputCRS()
+        self.resolveOutputs()
+        self.evaluateParameterValues()
+        self.runPreExecutionScript(feedback)
+
+    def closeOutputs(self, feedback=None):
+        """Closes the writers created for the vector outputs of the
+        algorithm, so errors writing their last features are raised
+        instead of being only logged when the writers are deleted.
+
+        It must be called from the thread where processAlgorithm() was
+        run.
+        """
+        for writer in self.releaseOutputWriters():
+            writer.close()
+
+    def releaseOutputWriters(self):
+        """Removes the writers from the vector outputs of the algorithm,
+        and returns them.
+        """
+        writers = []
+        for out in self.outputs:
+            if getattr(out, 'writer', None) is not None:
+                writers.append(out.writer)
+                out.writer = None
+        return writers
+
+    def finishExecution(self, feedback):
+        """Performs the operations done by execute() after calling
+        processAlgorithm(). As prepareExecution(), this has to be
+        called from the main thread.
+        """
+        feedback.setProgress(100)
+        self.convertUnsupportedFormats(feedback)
+        self.runPostExecutionScript(feedback)
+
+    def executeSteps(self, steps, feedback):
+        """Calls each of the given execution steps with the feedback
+        object, wrapping any error in a GeoAlgorithmExecutionException.
+        """
         try:
-            self.setOutputCRS()
-            self.resolveOutputs()
-            self.evaluateParameterValues()
-            self.runPreExecutionScript(feedback)
-            self.processAlgorithm(feedback)
-            feedback.setProgress(100)
-            self.convertUnsupportedFormats(feedback)
-            self.runPostExecutionScript(feedback)
+            for step in steps:
+                step(feedback)
         except GeoAlgorithmExecutionException as gaee:
+            self.releaseOutputWriters()
             lines = [self.tr('Error while executing algorithm')]
             lines.append(traceback.format_exc())
             ProcessingLog.addToLog(ProcessingLog.LOG_ERROR, gaee.msg)
@@ -226,6 +277,7 @@ class GeoAlgorithm(object):
         except Exception as e:
             # If something goes wrong and is not caught in the
             # algorithm, we catch it here and wrap it
+            self.releaseOutputWriters()
             lines = [self.tr('Uncaught error while executing algorithm')]
             lines.append(traceback.format_exc())
             ProcessingLog.addToLog(ProcessingLog.LOG_ERROR, lines)
@@ -65,6 +65,10 @@ class ProcessingConfig(object):
     DEFAULT_OUTPUT_VECTOR_LAYER_EXT = 'DEFAULT_OUTPUT_VECTOR_LAYER_EXT'
     SHOW_PROVIDERS_TOOLTIP = 'SHOW_PROVIDERS_TOOLTIP'
     MODELS_SCRIPTS_REPO = 'MODELS_SCRIPTS_REPO'
+    MAX_THREADS = 'MAX_THREADS'
+    MERGE_ITERATION_OUTPUTS = 'MERGE_ITERATION_OUTPUTS'
+    VECTOR_WRITER_BATCH_SIZE = 'VECTOR_WRITER_BATCH_SIZE'
+    POSTGIS_OUTPUT_INDEX = 'POSTGIS_OUTPUT_INDEX'
 
     settings = {}
     settingIcons = {}
@@ -153,6 +157,24 @@ class ProcessingConfig(object):
             ProcessingConfig.MODELS_SCRIPTS_REPO,
             ProcessingConfig.tr('Scripts and models repository'),
             'https://raw.githubusercontent.com/qgis/QGIS-Processing/master'))
+        ProcessingConfig.addSetting(Setting(
+            ProcessingConfig.tr('General'),
+            ProcessingConfig.MAX_THREADS,
+            ProcessingConfig.tr('Number of algorithms to run in parallel in batch processes'), 1,
+            valuetype=Setting.INT))
+        ProcessingConfig.addSetting(Setting(
+            ProcessingConfig.tr('General'),
+            ProcessingConfig.MERGE_ITERATION_OUTPUTS,
+            ProcessingConfig.tr('Merge vector outputs when iterating over a layer'), False))
+        ProcessingConfig.addSetting(Setting(
+            ProcessingConfig.tr('General'),
+            ProcessingConfig.VECTOR_WRITER_BATCH_SIZE,
+            ProcessingConfig.tr('Number of features written at once to memory and database outputs'), 1000,
+            valuetype=Setting.INT))
+        ProcessingConfig.addSetting(Setting(
+            ProcessingConfig.tr('General'),
+            ProcessingConfig.POSTGIS_OUTPUT_INDEX,
+            ProcessingConfig.tr('Create spatial index and analyze PostGIS output tables'), False))
 
         invalidFeaturesOptions = [ProcessingConfig.tr('Do not filter (better performance)'),
                                   ProcessingConfig.tr('Ignore features with invalid geometries'),
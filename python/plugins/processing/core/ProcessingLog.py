@@ -30,6 +30,7 @@ __revision__ = '$Format:%H$'
 import os
 import codecs
 import datetime
+import threading
 from processing.tools.system import userFolder
 from processing.core.ProcessingConfig import ProcessingConfig
 from qgis.core import QgsMessageLog
@@ -45,13 +46,17 @@ class ProcessingLog(object):
     DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
     recentAlgs = []
 
+    # algorithms running in worker threads can write to the log
+    lock = threading.RLock()
+
     @staticmethod
     def logFilename():
         logFilename = userFolder() + os.sep + 'processing.log'
-        if not os.path.isfile(logFilename):
-            with codecs.open(logFilename, 'w', encoding='utf-8') as logfile:
-                logfile.write('Started logging at ' +
-                              datetime.datetime.now().strftime(ProcessingLog.DATE_FORMAT) + '\n')
+        with ProcessingLog.lock:
+            if not os.path.isfile(logFilename):
+                with codecs.open(logFilename, 'w', encoding='utf-8') as logfile:
+                    logfile.write('Started logging at ' +
+                                  datetime.datetime.now().strftime(ProcessingLog.DATE_FORMAT) + '\n')
 
         return logFilename
 
@@ -66,17 +71,18 @@ class ProcessingLog(object):
                 line = msgtype + '|' + datetime.datetime.now().strftime(
                     ProcessingLog.DATE_FORMAT) + '|' \
                     + msg + '\n'
-                with codecs.open(ProcessingLog.logFilename(), 'a',
-                                 encoding='utf-8') as logfile:
-                    logfile.write(line)
-                algname = msg[len('Processing.runalg("'):]
-                algname = algname[:algname.index('"')]
-                if algname not in ProcessingLog.recentAlgs:
-                    ProcessingLog.recentAlgs.append(algname)
-                    recentAlgsString = ';'.join(ProcessingLog.recentAlgs[-6:])
-                    ProcessingConfig.setSettingValue(
-                        ProcessingConfig.RECENT_ALGORITHMS,
-                        recentAlgsString)
+                with ProcessingLog.lock:
+                    with codecs.open(ProcessingLog.logFilename(), 'a',
+                                     encoding='utf-8') as logfile:
+                        logfile.write(line)
+                    algname = msg[len('Processing.runalg("'):]
+                    algname = algname[:algname.index('"')]
+                    if algname not in ProcessingLog.recentAlgs:
+                        ProcessingLog.recentAlgs.append(algname)
+                        recentAlgsString = ';'.join(ProcessingLog.recentAlgs[-6:])
+                        ProcessingConfig.setSettingValue(
+                            ProcessingConfig.RECENT_ALGORITHMS,
+                            recentAlgsString)
             else:
                 if isinstance(msg, list):
                     msg = '\n'.join([m for m in msg])
@@ -127,7 +133,8 @@ class ProcessingLog(object):
 
     @staticmethod
     def clearLog():
-        os.unlink(ProcessingLog.logFilename())
+        with ProcessingLog.lock:
+            os.unlink(ProcessingLog.logFilename())
 
     @staticmethod
     def saveLog(fileName):
@@ -25,6 +25,8 @@ __copyright__ = '(C) 2016, Victor Olaya'
 
 __revision__ = '$Format:%H$'
 
+import os
+
 from qgis.core import QgsApplication
 from qgis.PyQt.QtCore import QObject, pyqtSignal
 
@@ -37,8 +39,13 @@ class AlgorithmList(QObject):
     # and values are list with all algorithms from that provider
     algs = {}
 
+    # All the algorithms by name, so they can be found without looking
+    # into each provider
+    index = {}
+
     def removeProvider(self, provider_id):
         if provider_id in self.algs:
+            self._unindex(provider_id)
             del self.algs[provider_id]
 
         QgsApplication.processingRegistry().removeProvider(provider_id)
@@ -47,18 +54,75 @@ class AlgorithmList(QObject):
         for p in QgsApplication.processingRegistry().providers():
             if p.id() == provider_id:
                 p.loadAlgorithms()
-                self.algs[p.id()] = {a.commandLineName(): a for a in p.algs}
+                self._setAlgorithms(p)
                 self.providerUpdated.emit(p.id())
                 break
 
     def addProvider(self, provider):
         if QgsApplication.processingRegistry().addProvider(provider):
-            self.algs[provider.id()] = {a.commandLineName(): a for a in provider.algs}
+            self._setAlgorithms(provider)
+
+    def reloadAlgorithm(self, provider_id, descriptionFile):
+        """Loads again the algorithm of a provider defined in the given
+        file, or removes it if the file does not exist anymore, without
+        loading the rest of the algorithms of the provider.
+
+        Files outside the folders of the provider are not loaded, as
+        they would not be found when the whole provider is reloaded.
+        Providers which can not load a single algorithm are reloaded.
+        """
+        provider = QgsApplication.processingRegistry().providerById(provider_id)
+        if provider is None:
+            return
+        if not provider.canLoadAlgorithmFromFile():
+            self.reloadProvider(provider_id)
+            return
+
+        alg = None
+        if os.path.exists(descriptionFile) and isInFolders(descriptionFile, provider.algorithmsFolders()):
+            alg = provider.loadAlgorithmFromFile(descriptionFile)
+
+        # the name of the algorithm might have changed, so the previous
+        # one is found by its file
+        algs = [a for a in provider.algs
+                if getattr(a, 'descriptionFile', None) != descriptionFile]
+        if alg is not None:
+            alg.provider = provider
+            algs = [a for a in algs if a.commandLineName() != alg.commandLineName()]
+            algs.append(alg)
+        provider.algs = algs
+        self._setAlgorithms(provider)
+        self.providerUpdated.emit(provider_id)
 
     def getAlgorithm(self, name):
-        for provider in list(self.algs.values()):
-            if name in provider:
-                return provider[name]
+        return self.index.get(name)
+
+    def _setAlgorithms(self, provider):
+        self._unindex(provider.id())
+        algs = {a.commandLineName(): a for a in provider.algs}
+        self.algs[provider.id()] = algs
+        self.index.update(algs)
+
+    def _unindex(self, provider_id):
+        for name, alg in self.algs.get(provider_id, {}).items():
+            if self.index.get(name) is alg:
+                del self.index[name]
+
+
+def isInFolders(path, folders):
+    """Returns True if the file is in one of the folders or in any of
+    their subfolders.
+    """
+    path = os.path.normcase(os.path.realpath(path))
+    for folder in folders:
+        if not folder:
+            continue
+        folder = os.path.normcase(os.path.realpath(folder))
+        if not folder.endswith(os.sep):
+            folder += os.sep
+        if path.startswith(folder):
+            return True
+    return False
 
 
 algList = AlgorithmList()
@@ -300,6 +300,10 @@ class OutputVector(Output):
     encoding = None
     compatible = None
 
+    # writer returned by getVectorWriter for database outputs, which
+    # buffer their features, until it is closed
+    writer = None
+
     def __init__(self, name='', description='', hidden=False, base_input=None, datatype=[-1]):
         Output.__init__(self, name, description, hidden)
         self.base_input = base_input
@@ -381,6 +385,10 @@ class OutputVector(Output):
                          crs, options)
         self.layer = w.layer
         self.value = w.destination
+        if w.buffered:
+            # closed by GeoAlgorithm.closeOutputs(), so write errors are
+            # raised even if the algorithm deletes the writer
+            self.writer = w
         return w
 
     def dataType(self):
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    providercache.py
+    ---------------------
+    Date                 : April 2017
+    Copyright            : (C) 2017 by the QGIS Development Team
+    Email                : qgis-developer at lists dot osgeo dot org
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Development Team'
+__date__ = 'April 2017'
+__copyright__ = '(C) 2017, the QGIS Development Team'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+import json
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from processing.core.ProcessingLog import ProcessingLog
+from processing.tools.system import userFolder
+
+# increase when the content of the cache changes, so older caches are
+# discarded
+CACHE_VERSION = 1
+
+# number of threads reading description files which are not cached
+READ_THREADS = 8
+
+
+def readHeader(path, size):
+    """Returns the first lines of a description file, stripped.
+    """
+    with open(path) as lines:
+        return [lines.readline().strip('\n').strip() for i in range(size)]
+
+
+class ProviderCache(object):
+
+    """Keeps the first lines of the description files of the providers
+    which define their algorithms in text files, such as GRASS and SAGA,
+    along with the modification time and size of each file.
+
+    Those lines are enough to list the algorithms, so they can be
+    registered at startup without reading all the files again, and
+    their parameters are read when they are first used.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = None
+        self.modified = False
+
+    def cacheFile(self):
+        return os.path.join(userFolder(), 'descriptions.cache')
+
+    def _load(self):
+        if self.entries is not None:
+            return
+        self.entries = {}
+        try:
+            with open(self.cacheFile()) as f:
+                cache = json.load(f)
+            if cache.get('version') == CACHE_VERSION:
+                self.entries = cache['providers']
+        except (IOError, OSError, ValueError, KeyError):
+            pass
+
+    def save(self):
+        with self.lock:
+            if not self.modified:
+                return
+            filename = self.cacheFile()
+            # a unique temporary file keeps several QGIS instances from
+            # writing to the same one
+            try:
+                handle, tmpFilename = tempfile.mkstemp(dir=os.path.dirname(filename),
+                                                       prefix='descriptions.', suffix='.tmp')
+            except (IOError, OSError):
+                return
+            try:
+                with os.fdopen(handle, 'w') as f:
+                    json.dump({'version': CACHE_VERSION, 'providers': self.entries}, f)
+                os.replace(tmpFilename, filename)
+                self.modified = False
+            except (IOError, OSError):
+                try:
+                    os.remove(tmpFilename)
+                except OSError:
+                    pass
+
+    def clear(self, providerId=None):
+        with self.lock:
+            self._load()
+            if providerId is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(providerId, None)
+            self.modified = True
+        self.save()
+
+    def descriptions(self, providerId, folder, headerSize, extension='txt'):
+        """Returns a list of (path, header) tuples for the description
+        files in a folder, where header is the list of the first
+        headerSize lines of the file, and the list of the paths of the
+        files that had to be read because they were not in the cache, or
+        had changed since they were cached.
+
+        Files which have been marked as invalid are left out.
+        """
+        with self.lock:
+            self._load()
+            cached = self.entries.get(providerId, {})
+
+        entries = {}
+        stale = []
+        for descriptionFile in sorted(os.listdir(folder)):
+            if not descriptionFile.endswith(extension):
+                continue
+            path = os.path.join(folder, descriptionFile)
+            stat = os.stat(path)
+            stamp = [stat.st_mtime, stat.st_size]
+            entry = cached.get(path)
+            if entry is not None and entry['stamp'] == stamp and len(entry['header']) == headerSize:
+                entries[path] = entry
+            else:
+                stale.append((path, stamp))
+
+        if stale:
+            # reading many small files is limited by the file system and
+            # not by python, so it is done by several threads
+            with ThreadPoolExecutor(max_workers=min(READ_THREADS, len(stale))) as executor:
+                headers = list(executor.map(lambda s: self._readHeader(s[0], headerSize), stale))
+            for (path, stamp), header in zip(stale, headers):
+                entries[path] = {'stamp': stamp, 'header': header or [''] * headerSize,
+                                 'valid': header is not None}
+
+        if stale or len(entries) != len(cached):
+            with self.lock:
+                self.entries[providerId] = entries
+                self.modified = True
+            self.save()
+
+        descriptions = [(path, entries[path]['header']) for path in sorted(entries)
+                        if entries[path]['valid']]
+        return descriptions, [path for (path, stamp) in stale]
+
+    def _readHeader(self, path, size):
+        try:
+            return readHeader(path, size)
+        except (IOError, OSError, UnicodeDecodeError):
+            return None
+
+    def setInvalid(self, providerId, path):
+        """Marks a description file as invalid, so it is left out until
+        it changes.
+        """
+        with self.lock:
+            self._load()
+            entry = self.entries.get(providerId, {}).get(path)
+            if entry is not None and entry['valid']:
+                entry['valid'] = False
+                self.modified = True
+
+    def defineInBackground(self, providerId, algs, message):
+        """Reads the whole description of algorithms that have just been
+        created from their header in a background thread, so errors in
+        the description files are found, and those files left out next
+        time.
+        """
+        if not algs:
+            return
+
+        def define():
+            for alg in algs:
+                try:
+                    alg.defineLazily()
+                except Exception as e:
+                    ProcessingLog.addToLog(ProcessingLog.LOG_ERROR,
+                                           message.format(alg.descriptionFile, str(e)))
+                    self.setInvalid(providerId, alg.descriptionFile)
+            self.save()
+
+        thread = threading.Thread(target=define)
+        thread.daemon = True
+        thread.start()
+
+
+class LazyDescription(object):
+
+    """Mixin for algorithms defined by a description file, which can be
+    created from the header lines kept by the ProviderCache. In that
+    case, the rest of the file is read the first time the parameters or
+    outputs of the algorithm are needed.
+
+    Classes using it must implement defineCharacteristicsFromFile().
+    """
+
+    _definitionLock = threading.RLock()
+    _pendingDefinition = False
+    _definingThread = None
+
+    @property
+    def parameters(self):
+        self.defineLazily()
+        return self._parameters
+
+    @parameters.setter
+    def parameters(self, parameters):
+        self._parameters = parameters
+
+    @property
+    def outputs(self):
+        self.defineLazily()
+        return self._outputs
+
+    @outputs.setter
+    def outputs(self, outputs):
+        self._outputs = outputs
+
+    def setPendingDefinition(self):
+        self._pendingDefinition = True
+
+    def defineLazily(self):
+        if not self._pendingDefinition or self._definingThread == threading.get_ident():
+            return
+        with LazyDescription._definitionLock:
+            if not self._pendingDefinition:
+                return
+            self._definingThread = threading.get_ident()
+            try:
+                self._parameters = []
+                self._outputs = []
+                self.defineCharacteristicsFromFile()
+                self._pendingDefinition = False
+            finally:
+                self._definingThread = None
+
+
+providerCache = ProviderCache()
@@ -27,7 +27,7 @@ __copyright__ = '(C) 2012, Victor Olaya'
 __revision__ = '$Format:%H$'
 
 from qgis.PyQt.QtCore import Qt
-from qgis.PyQt.QtWidgets import QMessageBox, QApplication, QPushButton, QWidget, QVBoxLayout, QSizePolicy
+from qgis.PyQt.QtWidgets import QMessageBox, QApplication, QPushButton, QWidget, QVBoxLayout, QSizePolicy, QCheckBox
 from qgis.PyQt.QtGui import QCursor, QColor, QPalette
 
 from qgis.core import QgsProject
@@ -36,6 +36,7 @@ from qgis.utils import iface
 
 from processing.core.ProcessingLog import ProcessingLog
 from processing.core.ProcessingConfig import ProcessingConfig
+from processing.modeler.ModelerUtils import ModelerUtils
 
 from processing.gui.BatchAlgorithmDialog import BatchAlgorithmDialog
 from processing.gui.AlgorithmDialogBase import AlgorithmDialogBase
@@ -63,6 +64,13 @@ class AlgorithmDialog(AlgorithmDialogBase):
 
         self.setMainWidget(alg.getParametersPanel(self))
 
+        # models using the results cache can be run once ignoring it
+        self.recomputeCheck = None
+        if hasattr(alg, 'forceRecompute') and ProcessingConfig.getSetting(ModelerUtils.USE_CACHE):
+            self.recomputeCheck = QCheckBox(self.tr('Recompute all algorithms and refresh cached results'))
+            self.mainWidget.layoutMain.insertWidget(self.mainWidget.layoutMain.count() - 1,
+                                                    self.recomputeCheck)
+
         self.bar = QgsMessageBar()
         self.bar.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Fixed)
         self.layout().insertWidget(0, self.bar)
@@ -101,6 +109,9 @@ class AlgorithmDialog(AlgorithmDialogBase):
             if isinstance(output, (OutputRaster, OutputVector, OutputTable)):
                 output.open = self.mainWidget.checkBoxes[output.name].isChecked()
 
+        if self.recomputeCheck is not None:
+            self.alg.forceRecompute = self.recomputeCheck.isChecked()
+
         return True
 
     def setParamValue(self, param, wrapper):
@@ -28,14 +28,15 @@ __copyright__ = '(C) 2012, Victor Olaya'
 __revision__ = '$Format:%H$'
 
 import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from qgis.PyQt.QtCore import QCoreApplication
-from qgis.core import (QgsFeature,
-                       QgsVectorFileWriter,
-                       QgsProcessingFeedback,
-                       QgsSettings)
+from qgis.core import QgsProcessingFeedback
+from processing.core.ProcessingConfig import ProcessingConfig
 from processing.core.ProcessingLog import ProcessingLog
 from processing.core.GeoAlgorithmExecutionException import GeoAlgorithmExecutionException
+from processing.core.outputs import OutputVector
 from processing.gui.Postprocessing import handleAlgorithmResults
 from processing.tools import dataobjects
 from processing.tools.system import getTempFilename
@@ -63,47 +64,328 @@ def runalg(alg, feedback=None):
         return False
 
 
+def _runSteps(alg, steps, feedback):
+    """Runs some of the execution steps of an algorithm (see
+    GeoAlgorithm.execute), reporting errors as runalg() does.
+    """
+    try:
+        alg.executeSteps(steps, feedback)
+        return True
+    except GeoAlgorithmExecutionException as e:
+        ProcessingLog.addToLog(sys.exc_info()[0], ProcessingLog.LOG_ERROR)
+        feedback.reportError(e.msg)
+        return False
+
+
+def _startInThread(executor, alg, feedback, model=None):
+    """Prepares the execution of an algorithm in the calling thread,
+    and submits the algorithm itself to a pool of worker threads.
+
+    Returns a future with the result of the algorithm, which is
+    already False if it could not be prepared. The caller must call
+    alg.finishExecution() from its own thread, using _runSteps(), once
+    the future is done.
+    """
+    alg.model = model
+    if not _runSteps(alg, [alg.prepareExecution], feedback):
+        future = Future()
+        future.set_result(False)
+        return future
+    return executor.submit(_runSteps, alg, [alg.processAlgorithm, alg.closeOutputs], feedback)
+
+
+class BatchFeedback(QgsProcessingFeedback):
+    """Feedback for a single algorithm of a batch process.
+
+    Messages are forwarded to the feedback of the whole batch process,
+    and progress is reported as part of the overall progress. When the
+    algorithm runs in a worker thread, messages are queued instead, and
+    the main thread forwards them by calling flush().
+    """
+
+    def __init__(self, parent, row, rows, queued=False):
+        QgsProcessingFeedback.__init__(self)
+        self.parent = parent
+        self.row = row
+        self.rows = rows
+        self.queued = queued
+        self.rowProgress = 0
+        self.messages = deque()
+        # errors reported by the algorithm
+        self.errors = []
+
+    def forward(self, method, *args):
+        if self.queued:
+            self.messages.append((method, args))
+        else:
+            getattr(self.parent, method)(*args)
+
+    def flush(self):
+        while self.messages:
+            method, args = self.messages.popleft()
+            getattr(self.parent, method)(*args)
+
+    def reportError(self, msg):
+        self.errors.append(msg)
+        self.forward('reportError', msg)
+
+    def setProgressText(self, text):
+        self.forward('setProgressText', text)
+
+    def setProgress(self, i):
+        self.rowProgress = i
+        if not self.queued:
+            self.parent.setProgress((self.row * 100 + i) / self.rows)
+
+    def pushInfo(self, msg):
+        self.forward('pushInfo', msg)
+
+    def pushCommandInfo(self, msg):
+        self.forward('pushCommandInfo', msg)
+
+    def pushDebugInfo(self, msg):
+        self.forward('pushDebugInfo', msg)
+
+    def pushConsoleInfo(self, msg):
+        self.forward('pushConsoleInfo', msg)
+
+
+def runalgs(algs, feedback, onFinished=None):
+    """Executes a list of algorithms, as in a batch process.
+
+    If all algorithms can run in parallel and the MAX_THREADS setting
+    allows it, they are executed in a pool of worker threads. Otherwise
+    they are run one after another. In both cases, onFinished(row, alg)
+    is called from the calling thread for each algorithm that was
+    correctly executed, in the same order as the algs list.
+
+    In worker threads, only processAlgorithm() is run. The operations
+    done before and after it use shared state and user scripts, so they
+    are run in the calling thread.
+
+    Execution stops at the first algorithm that fails. Returns true if
+    all algorithms were executed.
+    """
+
+    maxThreads = int(ProcessingConfig.getSetting(ProcessingConfig.MAX_THREADS) or 1)
+    parallel = maxThreads > 1 and len(algs) > 1 and all(alg.canRunInParallel for alg in algs)
+    feedbacks = [BatchFeedback(feedback, row, len(algs), parallel)
+                 for row in range(len(algs))]
+
+    def start(row):
+        feedbacks[row].setProgressText(
+            tr('\nProcessing algorithm {0}/{1}...').format(row + 1, len(algs)))
+        feedbacks[row].pushInfo(
+            tr('<b>Algorithm {0} starting...</b>').format(algs[row].name))
+
+    if not parallel:
+        for row, alg in enumerate(algs):
+            start(row)
+            if not runalg(alg, feedbacks[row]) or feedback.isCanceled():
+                return False
+            if onFinished is not None:
+                onFinished(row, alg)
+        return True
+
+    with ThreadPoolExecutor(max_workers=min(maxThreads, len(algs))) as executor:
+        # no more algorithms are started after one that could not be
+        # prepared, which is a failed future
+        futures = []
+        for row, alg in enumerate(algs):
+            start(row)
+            futures.append(_startInThread(executor, alg, feedbacks[row]))
+            if futures[-1].done() and not futures[-1].result():
+                break
+
+        nextRow = 0
+        while nextRow < len(futures):
+            wait(futures[nextRow:], timeout=0.1, return_when=FIRST_COMPLETED)
+
+            for f in feedbacks:
+                f.flush()
+            feedback.setProgress(sum(f.rowProgress for f in feedbacks) / len(algs))
+            QCoreApplication.processEvents()
+
+            # results are handled in order, as soon as all previous
+            # algorithms have finished
+            failed = feedback.isCanceled()
+            while not failed and nextRow < len(futures) and futures[nextRow].done():
+                alg = algs[nextRow]
+                if not futures[nextRow].result() or \
+                        not _runSteps(alg, [alg.finishExecution], feedbacks[nextRow]):
+                    failed = True
+                    break
+                feedbacks[nextRow].flush()
+                if onFinished is not None:
+                    onFinished(nextRow, algs[nextRow])
+                nextRow += 1
+
+            if failed:
+                for future, f in zip(futures, feedbacks):
+                    future.cancel()
+                    f.cancel()
+                wait(futures)
+                for f in feedbacks:
+                    f.flush()
+                return False
+
+    return True
+
+
 def runalgIterating(alg, paramToIter, feedback):
-    # Generate all single-feature layers
-    settings = QgsSettings()
-    systemEncoding = settings.value('/UI/encoding', 'System')
+    """Executes an algorithm once for each feature of the layer used as
+    value of the paramToIter parameter.
+
+    Single-feature layers are created as they are needed, so only a few
+    of them exist at any time. They are memory layers if the algorithm
+    provider can read them, and temporary GeoPackage files otherwise.
+    If the algorithm can run in parallel and the MAX_THREADS setting
+    allows it, iterations are executed in a pool of worker threads.
+
+    If the MERGE_ITERATION_OUTPUTS setting is enabled, the vector outputs
+    of all iterations are merged into a single layer for each output.
+    """
     layerfile = alg.getParameterValue(paramToIter)
     layer = dataobjects.getObjectFromUri(layerfile, False)
-    feat = QgsFeature()
-    filelist = []
-    outputs = {}
     features = vector.features(layer)
-    for feat in features:
-        output = getTempFilename('shp')
-        filelist.append(output)
-        writer = QgsVectorFileWriter(output, systemEncoding,
-                                     layer.fields(), layer.wkbType(), layer.crs())
-        writer.addFeature(feat)
-        del writer
+    total = len(features)
+
+    inMemory = alg.provider.supportsNonFileBasedOutput()
+    maxThreads = int(ProcessingConfig.getSetting(ProcessingConfig.MAX_THREADS) or 1)
+    parallel = maxThreads > 1 and alg.canRunInParallel
 
     # store output values to use them later as basenames for all outputs
+    outputs = {}
     for out in alg.outputs:
         outputs[out.name] = out.value
+    merged = []
+    if ProcessingConfig.getSetting(ProcessingConfig.MERGE_ITERATION_OUTPUTS):
+        merged = [out.name for out in alg.outputs
+                  if isinstance(out, OutputVector) and not out.hidden]
+    mergeWriters = {}
 
-    # now run all the algorithms
-    for i, f in enumerate(filelist):
-        alg.setParameterValue(paramToIter, f)
-        for out in alg.outputs:
-            filename = outputs[out.name]
-            if filename:
-                filename = filename[:filename.rfind('.')] + '_' + str(i) \
-                    + filename[filename.rfind('.'):]
-            out.value = filename
-        feedback.setProgressText(tr('Executing iteration {0}/{1}...').format(i, len(filelist)))
-        feedback.setProgress(i * 100 / len(filelist))
-        if runalg(alg, feedback):
-            handleAlgorithmResults(alg, None, False)
-        else:
+    def prepare(i, feat):
+        writer = vector.VectorWriter('memory:' if inMemory else getTempFilename('gpkg'),
+                                     None, layer.fields(), layer.wkbType(), layer.crs())
+        writer.addFeature(feat)
+        inputLayer = writer.destination
+        if inMemory:
+            dataobjects.registerLayer(inputLayer, writer.layer)
+        del writer
+
+        iterAlg = alg.getCopy()
+        iterAlg.setParameterValue(paramToIter, inputLayer)
+        for out in iterAlg.outputs:
+            if out.name in merged:
+                out.value = None
+                out.open = False
+            else:
+                out.value = _iterationFilename(outputs[out.name], i)
+        return iterAlg, inputLayer
+
+    def start(i, iterFeedback):
+        iterFeedback.setProgressText(tr('Executing iteration {0}/{1}...').format(i + 1, total))
+
+    def finished(iterAlg, inputLayer):
+        dataobjects.unregisterLayer(inputLayer)
+        for name in merged:
+            out = iterAlg.getOutputFromName(name)
+            result = getattr(out, 'layer', None) or dataobjects.getObjectFromUri(out.value)
+            if name not in mergeWriters:
+                mergedOut = alg.getOutputFromName(name)
+                mergedOut.value = outputs[name]
+                mergedOut.resolveValue(alg)
+                mergeWriters[name] = mergedOut.getVectorWriter(
+                    result.fields(), result.wkbType(), result.crs())
+            for feat in result.getFeatures():
+                mergeWriters[name].addFeature(feat)
+            dataobjects.unregisterLayer(out.value)
+        handleAlgorithmResults(iterAlg, None, False)
+
+    if not parallel:
+        for i, feat in enumerate(features):
+            iterAlg, inputLayer = prepare(i, feat)
+            iterFeedback = BatchFeedback(feedback, i, total)
+            start(i, iterFeedback)
+            if not runalg(iterAlg, iterFeedback) or feedback.isCanceled():
+                dataobjects.unregisterLayer(inputLayer)
+                return False
+            finished(iterAlg, inputLayer)
+    else:
+        # iterations are prepared only when there is room for them in
+        # the queue, and their results are handled in order
+        pending = deque()
+        featuresIterator = iter(features)
+        done = 0
+        with ThreadPoolExecutor(max_workers=maxThreads) as executor:
+            while True:
+                while len(pending) < 2 * maxThreads:
+                    feat = next(featuresIterator, None)
+                    if feat is None:
+                        break
+                    i = done + len(pending)
+                    iterAlg, inputLayer = prepare(i, feat)
+                    iterFeedback = BatchFeedback(feedback, i, total, True)
+                    start(i, iterFeedback)
+                    future = _startInThread(executor, iterAlg, iterFeedback)
+                    pending.append((future, iterAlg, inputLayer, iterFeedback))
+                if not pending:
+                    break
+
+                wait([p[0] for p in pending], timeout=0.1, return_when=FIRST_COMPLETED)
+                for p in pending:
+                    p[3].flush()
+                feedback.setProgress((done * 100 + sum(p[3].rowProgress for p in pending)) / total)
+                QCoreApplication.processEvents()
+
+                while pending and pending[0][0].done():
+                    future, iterAlg, inputLayer, iterFeedback = pending.popleft()
+                    if not future.result() or feedback.isCanceled() or \
+                            not _runSteps(iterAlg, [iterAlg.finishExecution], iterFeedback):
+                        pending.appendleft((future, iterAlg, inputLayer, iterFeedback))
+                        for future, iterAlg, inputLayer, iterFeedback in pending:
+                            future.cancel()
+                            iterFeedback.cancel()
+                        wait([p[0] for p in pending])
+                        for future, iterAlg, inputLayer, iterFeedback in pending:
+                            iterFeedback.flush()
+                            dataobjects.unregisterLayer(inputLayer)
+                        return False
+                    finished(iterAlg, inputLayer)
+                    done += 1
+
+    if mergeWriters:
+        # close the writers before loading the merged layers, so buffered
+        # features are written
+        try:
+            for name, w in mergeWriters.items():
+                alg.getOutputFromName(name).writer = None
+                w.close()
+        except GeoAlgorithmExecutionException as e:
+            ProcessingLog.addToLog(ProcessingLog.LOG_ERROR, e.msg)
+            feedback.reportError(e.msg)
             return False
+        finally:
+            mergeWriters.clear()
+        opened = dict((out.name, out.open) for out in alg.outputs)
+        for out in alg.outputs:
+            out.open = out.open and out.name in merged
+        handleAlgorithmResults(alg, None, False)
+        for out in alg.outputs:
+            out.open = opened[out.name]
 
     return True
 
 
+def _iterationFilename(filename, i):
+    """Returns the name of an output file for a given iteration, adding
+    the iteration number to the base name of the file.
+    """
+    if not filename or '.' not in filename or filename.startswith(vector.VectorWriter.MEMORY_LAYER_PREFIX):
+        return filename
+    return filename[:filename.rfind('.')] + '_' + str(i) + filename[filename.rfind('.'):]
+
+
 def tr(string, context=''):
     if context == '':
         context = 'AlgorithmExecutor'
@@ -34,7 +34,7 @@ from qgis.gui import QgsMessageBar
 
 from processing.gui.BatchPanel import BatchPanel
 from processing.gui.AlgorithmDialogBase import AlgorithmDialogBase
-from processing.gui.AlgorithmExecutor import runalg
+from processing.gui.AlgorithmExecutor import runalgs
 from processing.gui.Postprocessing import handleAlgorithmResults
 
 from processing.core.ProcessingResults import ProcessingResults
@@ -110,7 +110,7 @@ class BatchAlgorithmDialog(AlgorithmDialogBase):
         QApplication.setOverrideCursor(QCursor(Qt.WaitCursor))
         self.mainWidget.setEnabled(False)
 
-        self.progressBar.setMaximum(len(self.algs))
+        self.progressBar.setMaximum(100)
         # Make sure the Log tab is visible before executing the algorithm
         try:
             self.tabWidget.setCurrentIndex(1)
@@ -118,16 +118,14 @@ class BatchAlgorithmDialog(AlgorithmDialogBase):
         except:
             pass
 
-        for count, alg in enumerate(self.algs):
-            self.setText(self.tr('\nProcessing algorithm {0}/{1}...').format(count + 1, len(self.algs)))
-            self.setInfo(self.tr('<b>Algorithm {0} starting...</b>').format(alg.name))
-            if runalg(alg, self.feedback) and not self.canceled:
-                if self.load[count]:
-                    handleAlgorithmResults(alg, self.feedback, False)
-                self.setInfo(self.tr('Algorithm {0} correctly executed...').format(alg.name))
-            else:
-                QApplication.restoreOverrideCursor()
-                return
+        def algorithmFinished(count, alg):
+            if self.load[count]:
+                handleAlgorithmResults(alg, self.feedback, False)
+            self.setInfo(self.tr('Algorithm {0} correctly executed...').format(alg.name))
+
+        if not runalgs(self.algs, self.feedback, algorithmFinished) or self.canceled:
+            QApplication.restoreOverrideCursor()
+            return
 
         self.finish()
 
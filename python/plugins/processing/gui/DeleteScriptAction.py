@@ -61,6 +61,6 @@ class DeleteScriptAction(ContextAction):
         if reply == QMessageBox.Yes:
             os.remove(self.itemData.descriptionFile)
             if self.scriptType == self.SCRIPT_PYTHON:
-                algList.reloadProvider('script')
+                algList.reloadAlgorithm('script', self.itemData.descriptionFile)
             elif self.scriptType == self.SCRIPT_R:
                 algList.reloadProvider('r')
@@ -146,6 +146,7 @@ class ScriptEditorDialog(BASE, WIDGET):
             self.filename = None
 
         self.update = False
+        self.savedFiles = set()
         self.help = None
 
         self.setHasChanged(False)
@@ -178,7 +179,8 @@ class ScriptEditorDialog(BASE, WIDGET):
     def updateProviders(self):
         if self.update:
             if self.algType == self.SCRIPT_PYTHON:
-                algList.reloadProvider('script')
+                for filename in self.savedFiles:
+                    algList.reloadAlgorithm('script', filename)
             elif self.algType == self.SCRIPT_R:
                 algList.reloadProvider('r')
 
@@ -267,6 +269,7 @@ class ScriptEditorDialog(BASE, WIDGET):
                                     )
                 return
             self.update = True
+            self.savedFiles.add(self.filename)
 
             # If help strings were defined before saving the script for
             # the first time, we do it here
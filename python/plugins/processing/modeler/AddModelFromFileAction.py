@@ -75,4 +75,4 @@ class AddModelFromFileAction(ToolboxAction):
                 return
             destFilename = os.path.join(ModelerUtils.modelsFolders()[0], os.path.basename(filename))
             shutil.copyfile(filename, destFilename)
-            algList.reloadProvider('model')
+            algList.reloadAlgorithm('model', destFilename)
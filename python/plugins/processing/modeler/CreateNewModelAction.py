@@ -47,8 +47,8 @@ class CreateNewModelAction(ToolboxAction):
 
     def execute(self):
         dlg = ModelerDialog()
-        dlg.update_model.connect(self.updateModel)
+        dlg.update_model.connect(lambda: self.updateModel(dlg.alg))
         dlg.show()
 
-    def updateModel(self):
-        algList.reloadProvider('model')
+    def updateModel(self, model):
+        algList.reloadAlgorithm('model', model.descriptionFile)
@@ -49,4 +49,4 @@ class DeleteModelAction(ContextAction):
             QMessageBox.No)
         if reply == QMessageBox.Yes:
             os.remove(self.itemData.descriptionFile)
-            algList.reloadProvider('model')
+            algList.reloadAlgorithm('model', self.itemData.descriptionFile)
@@ -41,8 +41,8 @@ class EditModelAction(ContextAction):
 
     def execute(self):
         dlg = ModelerDialog(self.itemData.getCopy())
-        dlg.update_model.connect(self.updateModel)
+        dlg.update_model.connect(lambda: self.updateModel(dlg.alg))
         dlg.show()
 
-    def updateModel(self):
-        algList.reloadProvider('model')
+    def updateModel(self, model):
+        algList.reloadAlgorithm('model', model.descriptionFile)
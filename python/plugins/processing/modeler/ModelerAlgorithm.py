@@ -32,13 +32,17 @@ import sys
 import copy
 import time
 import json
-from qgis.PyQt.QtCore import QPointF
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from qgis.PyQt.QtCore import QCoreApplication, QPointF
 from operator import attrgetter
 
 from qgis.core import QgsApplication
 from qgis.gui import QgsMessageBar
 from qgis.utils import iface
 from processing.core.GeoAlgorithm import GeoAlgorithm
+from processing.core.ProcessingConfig import ProcessingConfig
+from processing.modeler.ModelerUtils import ModelerUtils
 from processing.modeler.WrongModelException import WrongModelException
 from processing.core.GeoAlgorithmExecutionException import GeoAlgorithmExecutionException
 from processing.core.parameters import (ParameterRaster,
@@ -49,8 +53,13 @@ from processing.core.parameters import (ParameterRaster,
                                         ParameterString,
                                         ParameterNumber,
                                         ParameterDataObject)
+from processing.core.outputs import OutputVector
+from processing.tools import dataobjects
+from processing.tools.system import getTempFilenameInTempFolder
+from processing.tools.vector import VectorWriter
 
 from processing.gui.Help2Html import getHtmlFromDescriptionsDict
+from processing.gui.AlgorithmExecutor import BatchFeedback, _startInThread, _runSteps
 from processing.core.alglist import algList
 
 pluginPath = os.path.split(os.path.dirname(__file__))[0]
@@ -253,6 +262,13 @@ class ModelerAlgorithm(GeoAlgorithm):
 
         # Input parameters. A dict of Input objects, with names as keys
         self.inputs = {}
+
+        # Cache for the results of the algorithms, set when executing the model
+        self.resultsCache = None
+
+        # If True, cached results are not used in the next execution, and
+        # are replaced by the new results
+        self.forceRecompute = False
         GeoAlgorithm.__init__(self)
 
     def getIcon(self):
@@ -443,10 +459,47 @@ class ModelerAlgorithm(GeoAlgorithm):
                     if modelOut:
                         out.value = modelOut.value
                 else:
-                    out.value = None
+                    out.value = self.getIntermediateOutputValue(alg, out)
 
         return algInstance
 
+    def getIntermediateOutputValue(self, alg, out):
+        """Returns the value to use for an output which is not an output
+        of the model, and is only used as input of other algorithms.
+
+        Depending on the settings, vector outputs are kept in memory
+        layers when the algorithm and all the algorithms using them can
+        handle them, or written to GeoPackage files. A None value lets
+        the algorithm use a temporary file in the default format.
+        """
+        if not isinstance(out, OutputVector):
+            return None
+        mode = ProcessingConfig.getSetting(ModelerUtils.INTERMEDIATE_OUTPUTS)
+        if mode == ModelerUtils.MEMORY_LAYERS:
+            providers = [alg.algorithm.provider]
+            providers.extend(self.algs[name].algorithm.provider
+                             for name in self.getOutputConsumers(alg.name, out.name))
+            if all(provider.supportsNonFileBasedOutput() for provider in providers):
+                return 'memory:'
+        if mode in (ModelerUtils.MEMORY_LAYERS, ModelerUtils.GEOPACKAGE):
+            return getTempFilenameInTempFolder(out.name + '.gpkg')
+        return None
+
+    def getOutputConsumers(self, algName, outName):
+        """Returns the names of the algorithms which use the given output
+        of an algorithm as input.
+        """
+        def _uses(value):
+            if isinstance(value, list):
+                return any(_uses(v) for v in value)
+            elif isinstance(value, CompoundValue):
+                return _uses(value.values)
+            return isinstance(value, ValueFromOutput) and \
+                value.alg == algName and value.output == outName
+
+        return [alg.name for alg in list(self.algs.values())
+                if any(_uses(value) for value in list(alg.params.values()))]
+
     def deactivateAlgorithm(self, algName):
         dependent = self.getDependentAlgorithms(algName)
         for alg in dependent:
@@ -478,50 +531,204 @@ class ModelerAlgorithm(GeoAlgorithm):
             v = value
         return param.evaluateForModeler(v, self)
 
+    def getExecutionGraph(self):
+        """Returns a dict with the names of the active algorithms in the
+        model as keys, and the set of names of the active algorithms each
+        one depends on as values.
+        """
+        active = set(alg.name for alg in list(self.algs.values()) if alg.active)
+        graph = {}
+        for name in active:
+            graph[name] = set(self.getDependsOnAlgorithms(name)) & active
+            graph[name].discard(name)
+        return graph
+
     def processAlgorithm(self, feedback):
+        """Executes the algorithms in the model following the order of
+        their dependencies.
+
+        Algorithms whose dependencies have all been executed are ready
+        to run. Those that can run in parallel are prepared and finished
+        in the calling thread, and only processed in a pool of worker
+        threads, while the rest are run in the calling thread.
+        """
+        graph = self.getExecutionGraph()
+        dependents = dict((name, set()) for name in graph)
+        for name, required in list(graph.items()):
+            for requiredAlg in required:
+                dependents[requiredAlg].add(name)
+        waiting = dict((name, len(required)) for name, required in list(graph.items()))
+        ready = deque(sorted(name for name, n in list(waiting.items()) if n == 0))
+
+        continueOnError = ProcessingConfig.getSetting(ModelerUtils.CONTINUE_ON_ERROR)
+        maxThreads = int(ProcessingConfig.getSetting(ProcessingConfig.MAX_THREADS) or 1)
+
         executed = []
-        toExecute = [alg for alg in list(self.algs.values()) if alg.active]
-        while len(executed) < len(toExecute):
-            for alg in toExecute:
-                if alg.name not in executed:
-                    canExecute = True
-                    required = self.getDependsOnAlgorithms(alg.name)
-                    for requiredAlg in required:
-                        if requiredAlg != alg.name and requiredAlg not in executed:
-                            canExecute = False
-                            break
-                    if canExecute:
+        errors = []
+        skipped = set()
+        running = {}
+        self.executionTimes = {}
+        self.resultsCache = ModelerUtils.resultsCache()
+
+        def finished(name, dt, error):
+            alg = self.algs[name]
+            if error is not None:
+                feedback.pushDebugInfo(self.tr('Failed', 'ModelerAlgorithm'))
+                msg = self.tr('Error executing algorithm {0}\n{1}', 'ModelerAlgorithm').format(alg.description, error.msg)
+                if not continueOnError:
+                    for future, (_, childFeedback, _, _) in list(running.items()):
+                        future.cancel()
+                        childFeedback.cancel()
+                    raise GeoAlgorithmExecutionException(msg)
+                errors.append(msg)
+                toSkip = list(dependents[name])
+                while toSkip:
+                    dependent = toSkip.pop()
+                    if dependent not in skipped:
+                        skipped.add(dependent)
+                        toSkip.extend(dependents[dependent])
+                return
+
+            # copy algorithm output value(s) back to model in case the algorithm modified those
+            for out in alg.algorithm.outputs:
+                if not out.hidden:
+                    if out.name in alg.outputs:
+                        modelOut = self.getOutputFromName(self.getSafeNameForOutput(alg.name, out.name))
+                        if modelOut:
+                            modelOut.value = out.value
+
+            # intermediate memory layers are handed over to the algorithms
+            # using them through dataobjects.getObjectFromUri
+            for out in alg.algorithm.outputs:
+                if self.isIntermediateMemoryOutput(alg, out):
+                    dataobjects.registerLayer(out.value, out.layer)
+
+            executed.append(name)
+            self.executionTimes[name] = dt
+            feedback.pushDebugInfo(
+                self.tr('OK. Execution took %{0:.3f} ms ({1} outputs).', 'ModelerAlgorithm').format(dt, len(alg.algorithm.outputs)))
+
+            for dependent in sorted(dependents[name]):
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0 and dependent not in skipped:
+                    ready.append(dependent)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, maxThreads)) as executor:
+                while ready or running:
+                    while ready:
+                        name = ready.popleft()
+                        alg = self.algs[name]
                         try:
                             feedback.pushDebugInfo(
                                 self.tr('Prepare algorithm: {0}', 'ModelerAlgorithm').format(alg.name))
                             self.prepareAlgorithm(alg)
-                            feedback.setProgressText(
-                                self.tr('Running {0} [{1}/{2}]', 'ModelerAlgorithm').format(alg.description, len(executed) + 1, len(toExecute)))
-                            feedback.pushDebugInfo('Parameters: ' + ', '.join([str(p).strip() +
-                                                                               '=' + str(p.value) for p in alg.algorithm.parameters]))
-                            t0 = time.time()
-                            alg.algorithm.execute(feedback, self)
-                            dt = time.time() - t0
-
-                            # copy algorithm output value(s) back to model in case the algorithm modified those
-                            for out in alg.algorithm.outputs:
-                                if not out.hidden:
-                                    if out.name in alg.outputs:
-                                        modelOut = self.getOutputFromName(self.getSafeNameForOutput(alg.name, out.name))
-                                        if modelOut:
-                                            modelOut.value = out.value
-
-                            executed.append(alg.name)
-                            feedback.pushDebugInfo(
-                                self.tr('OK. Execution took %{0:.3f} ms ({1} outputs).', 'ModelerAlgorithm').format(dt, len(alg.algorithm.outputs)))
                         except GeoAlgorithmExecutionException as e:
-                            feedback.pushDebugInfo(self.tr('Failed', 'ModelerAlgorithm'))
-                            raise GeoAlgorithmExecutionException(
-                                self.tr('Error executing algorithm {0}\n{1}', 'ModelerAlgorithm').format(alg.description, e.msg))
+                            finished(name, 0, e)
+                            continue
+                        feedback.setProgressText(
+                            self.tr('Running {0} [{1}/{2}]', 'ModelerAlgorithm').format(alg.description, len(executed) + len(running) + 1, len(graph)))
+                        feedback.pushDebugInfo('Parameters: ' + ', '.join([str(p).strip() +
+                                                                           '=' + str(p.value) for p in alg.algorithm.parameters]))
+
+                        if maxThreads > 1 and alg.algorithm.canRunInParallel:
+                            t0 = time.time()
+                            key = self.cachedResultsKey(alg)
+                            if self.restoreCachedResults(alg, key, feedback):
+                                finished(name, time.time() - t0, None)
+                                continue
+                            childFeedback = BatchFeedback(feedback, len(executed), len(graph), True)
+                            future = _startInThread(executor, alg.algorithm, childFeedback, self)
+                            running[future] = (name, childFeedback, key, t0)
+                        else:
+                            try:
+                                dt = self.executeChildAlgorithm(alg, feedback)
+                            except GeoAlgorithmExecutionException as e:
+                                finished(name, 0, e)
+                            else:
+                                finished(name, dt, None)
+
+                    if not running:
+                        continue
+
+                    done, _ = wait(list(running.keys()), timeout=0.1, return_when=FIRST_COMPLETED)
+                    for _, childFeedback, _, _ in list(running.values()):
+                        childFeedback.flush()
+                    QCoreApplication.processEvents()
+
+                    for future in done:
+                        name, childFeedback, key, t0 = running.pop(future)
+                        algInstance = self.algs[name].algorithm
+                        # the algorithm is finished and its results are
+                        # stored in the calling thread, like it was prepared
+                        ok = future.result() and _runSteps(algInstance, [algInstance.finishExecution], childFeedback)
+                        childFeedback.flush()
+                        if ok:
+                            if key is not None:
+                                self.resultsCache.store(key, algInstance)
+                            finished(name, time.time() - t0, None)
+                        else:
+                            finished(name, 0, GeoAlgorithmExecutionException('\n'.join(childFeedback.errors)))
+        finally:
+            # memory layers used to hand over intermediate outputs are not
+            # needed anymore
+            for name in executed:
+                alg = self.algs[name]
+                for out in alg.algorithm.outputs:
+                    if self.isIntermediateMemoryOutput(alg, out):
+                        dataobjects.unregisterLayer(out.value)
+                        out.layer = None
+
+        if errors:
+            raise GeoAlgorithmExecutionException('\n'.join(errors))
+
+        if len(executed) + len(skipped) < len(graph):
+            raise GeoAlgorithmExecutionException(
+                self.tr('The model contains circular dependencies between algorithms', 'ModelerAlgorithm'))
 
         feedback.pushDebugInfo(
             self.tr('Model processed ok. Executed {0} algorithms total', 'ModelerAlgorithm').format(len(executed)))
 
+    def isIntermediateMemoryOutput(self, alg, out):
+        """Returns True if an output of an algorithm of the model is a
+        memory layer which is not an output of the model.
+        """
+        return isinstance(out, OutputVector) and out.name not in alg.outputs \
+            and getattr(out, 'layer', None) is not None \
+            and str(out.value).startswith(VectorWriter.MEMORY_LAYER_PREFIX)
+
+    def executeChildAlgorithm(self, alg, feedback):
+        """Executes an already prepared algorithm of the model in the
+        calling thread and returns the time it took.
+        """
+        t0 = time.time()
+        key = self.cachedResultsKey(alg)
+        if self.restoreCachedResults(alg, key, feedback):
+            return time.time() - t0
+
+        alg.algorithm.execute(feedback, self)
+        if key is not None:
+            self.resultsCache.store(key, alg.algorithm)
+        return time.time() - t0
+
+    def cachedResultsKey(self, alg):
+        """Returns the key of the results of an already prepared algorithm
+        of the model in the results cache, or None if they are not cached.
+        """
+        if self.resultsCache is None:
+            return None
+        return self.resultsCache.key(alg.algorithm)
+
+    def restoreCachedResults(self, alg, key, feedback):
+        """Restores the outputs of an algorithm of the model from the
+        results cache, and returns True if they were found.
+        """
+        if key is None or self.forceRecompute or not self.resultsCache.restore(key, alg.algorithm):
+            return False
+        feedback.pushInfo(
+            self.tr('Using cached results for {0}', 'ModelerAlgorithm').format(alg.description))
+        return True
+
     def getAsCommand(self):
         if self.descriptionFile:
             return GeoAlgorithm.getAsCommand(self)
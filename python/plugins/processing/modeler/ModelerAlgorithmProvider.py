@@ -56,6 +56,35 @@ class ModelerAlgorithmProvider(AlgorithmProvider):
         ProcessingConfig.addSetting(Setting(self.name(),
                                             ModelerUtils.MODELS_FOLDER, self.tr('Models folder', 'ModelerAlgorithmProvider'),
                                             ModelerUtils.defaultModelsFolder(), valuetype=Setting.MULTIPLE_FOLDERS))
+        ProcessingConfig.addSetting(Setting(self.name(),
+                                            ModelerUtils.CONTINUE_ON_ERROR,
+                                            self.tr('Keep running independent algorithms when an algorithm fails', 'ModelerAlgorithmProvider'),
+                                            False))
+        ProcessingConfig.addSetting(Setting(self.name(),
+                                            ModelerUtils.USE_CACHE,
+                                            self.tr('Reuse results of algorithms run with unchanged inputs', 'ModelerAlgorithmProvider'),
+                                            False))
+        ProcessingConfig.addSetting(Setting(self.name(),
+                                            ModelerUtils.CACHE_FOLDER,
+                                            self.tr('Results cache folder', 'ModelerAlgorithmProvider'),
+                                            ModelerUtils.defaultCacheFolder(), valuetype=Setting.FOLDER))
+        ProcessingConfig.addSetting(Setting(self.name(),
+                                            ModelerUtils.CACHE_MAX_SIZE,
+                                            self.tr('Maximum size of the results cache (MB)', 'ModelerAlgorithmProvider'),
+                                            1024, valuetype=Setting.INT))
+        ProcessingConfig.addSetting(Setting(self.name(),
+                                            ModelerUtils.CACHE_HASH_INPUTS,
+                                            self.tr('Compare content of input files when reusing results (slower)', 'ModelerAlgorithmProvider'),
+                                            False))
+        intermediateOutputsOptions = [self.tr('Temporary files in the default format', 'ModelerAlgorithmProvider'),
+                                      self.tr('Memory layers when possible, GeoPackage files otherwise', 'ModelerAlgorithmProvider'),
+                                      self.tr('GeoPackage files', 'ModelerAlgorithmProvider')]
+        ProcessingConfig.addSetting(Setting(self.name(),
+                                            ModelerUtils.INTERMEDIATE_OUTPUTS,
+                                            self.tr('Intermediate vector outputs', 'ModelerAlgorithmProvider'),
+                                            intermediateOutputsOptions[0],
+                                            valuetype=Setting.SELECTION,
+                                            options=intermediateOutputsOptions))
 
     def modelsFolder(self):
         return ModelerUtils.modelsFolders()[0]
@@ -84,16 +113,28 @@ class ModelerAlgorithmProvider(AlgorithmProvider):
         for path, subdirs, files in os.walk(folder):
             for descriptionFile in files:
                 if descriptionFile.endswith('model'):
-                    try:
-                        fullpath = os.path.join(path, descriptionFile)
-                        alg = ModelerAlgorithm.fromFile(fullpath)
-                        if alg.name:
-                            alg.provider = self
-                            alg.descriptionFile = fullpath
-                            self.algs.append(alg)
-                        else:
-                            ProcessingLog.addToLog(ProcessingLog.LOG_ERROR,
-                                                   self.tr('Could not load model {0}', 'ModelerAlgorithmProvider').format(descriptionFile))
-                    except WrongModelException as e:
-                        ProcessingLog.addToLog(ProcessingLog.LOG_ERROR,
-                                               self.tr('Could not load model {0}\n{1}', 'ModelerAlgorithmProvider').format(descriptionFile, e.msg))
+                    alg = self.loadAlgorithmFromFile(os.path.join(path, descriptionFile))
+                    if alg is not None:
+                        self.algs.append(alg)
+
+    def canLoadAlgorithmFromFile(self):
+        return True
+
+    def algorithmsFolders(self):
+        return ModelerUtils.modelsFolders()
+
+    def loadAlgorithmFromFile(self, fullpath):
+        descriptionFile = os.path.basename(fullpath)
+        try:
+            alg = ModelerAlgorithm.fromFile(fullpath)
+            if alg.name:
+                alg.provider = self
+                alg.descriptionFile = fullpath
+                return alg
+            else:
+                ProcessingLog.addToLog(ProcessingLog.LOG_ERROR,
+                                       self.tr('Could not load model {0}', 'ModelerAlgorithmProvider').format(descriptionFile))
+        except WrongModelException as e:
+            ProcessingLog.addToLog(ProcessingLog.LOG_ERROR,
+                                   self.tr('Could not load model {0}\n{1}', 'ModelerAlgorithmProvider').format(descriptionFile, e.msg))
+        return None
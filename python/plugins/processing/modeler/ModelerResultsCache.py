@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    ModelerResultsCache.py
+    ---------------------
+    Date                 : April 2017
+    Copyright            : (C) 2017 by the QGIS Development Team
+    Email                : qgis-developer at lists dot osgeo dot org
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Development Team'
+__date__ = 'April 2017'
+__copyright__ = '(C) 2017, the QGIS Development Team'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+from processing.core.ProcessingLog import ProcessingLog
+from processing.core.parameters import (ParameterDataObject,
+                                        ParameterFile)
+from processing.core.outputs import OutputDirectory
+from processing.tools.system import mkdir
+
+
+class ModelerResultsCache(object):
+    """Stores the outputs of the algorithms run as part of a model, so
+    they can be reused when the same algorithm is run again with the
+    same parameter values and unchanged input files.
+
+    Each entry is a folder named after a hash of the algorithm name,
+    its parameter values and the fingerprint (modification time and size,
+    and optionally a hash of the content) of its input files. It contains
+    a copy of the output files and an entry.json file with the values
+    of the outputs which are not files. Cached files are copied keeping
+    their modification time, so the outputs restored from the cache have
+    the same fingerprint when used as inputs of the following algorithms.
+
+    Algorithms with inputs which are not local files (such as memory or
+    database layers) are never cached, since there is no way to know
+    whether their content has changed.
+    """
+
+    ENTRY_FILE = 'entry.json'
+
+    def __init__(self, folder, maxSize, hashInputs=False):
+        self.folder = folder
+        self.maxSize = maxSize
+        self.hashInputs = hashInputs
+        self.lock = threading.Lock()
+        # last use time and size of the entries, read the first time an
+        # entry has to be evicted
+        self.entries = None
+        mkdir(self.folder)
+
+    def key(self, alg):
+        """Returns the key identifying the results of an algorithm with
+        its current parameter values, or None if the results can not be
+        cached because some input can not be fingerprinted.
+        """
+        items = [alg.commandLineName()]
+        for param in alg.parameters:
+            if isinstance(param, (ParameterDataObject, ParameterFile)) and param.value:
+                # Files are identified by their fingerprint and not by their
+                # path, since intermediate outputs of a model are written
+                # to a different temporary file each time it is run
+                values = []
+                for value in str(param.value).split(';'):
+                    path, sep, options = value.partition('|')
+                    fingerprint = self.fingerprint(path)
+                    if fingerprint is None:
+                        return None
+                    values.append([fingerprint, options])
+                items.append([param.name, values])
+            else:
+                items.append([param.name, str(param.value)])
+        for out in alg.outputs:
+            if not out.hidden:
+                items.append([out.name, os.path.splitext(str(out.value or ''))[1].lower()])
+        return hashlib.sha1(json.dumps(items).encode('utf-8')).hexdigest()
+
+    def fingerprint(self, path):
+        """Returns the modification time and size, and optionally a hash
+        of the content, of a file and the files storing part of its data,
+        or None if it is not a local file.
+        """
+        if not os.path.exists(path):
+            return None
+        fingerprint = []
+        for filename in self.dataFiles(path):
+            stat = os.stat(filename)
+            fingerprint.extend([stat.st_mtime, stat.st_size])
+            if self.hashInputs and os.path.isfile(filename):
+                sha = hashlib.sha1()
+                with open(filename, 'rb') as f:
+                    for chunk in iter(lambda: f.read(1048576), b''):
+                        sha.update(chunk)
+                fingerprint.append(sha.hexdigest())
+        return fingerprint
+
+    def dataFiles(self, path):
+        """Returns the existing files holding the data of a layer file:
+        the attributes and index of a shapefile, or the write ahead log
+        of a GeoPackage or SpatiaLite database.
+        """
+        base, ext = os.path.splitext(path)
+        if ext.lower() == '.shp':
+            candidates = [base + '.dbf', base + '.shx']
+        else:
+            candidates = [path + '-wal']
+        return [path] + [f for f in candidates if os.path.exists(f)]
+
+    def restore(self, key, alg):
+        """Sets the outputs of the algorithm from a cache entry, copying
+        the cached files to the output paths.
+
+        Returns False if there is no entry for the given key.
+        """
+        entryFolder = os.path.join(self.folder, key)
+        entryFile = os.path.join(entryFolder, self.ENTRY_FILE)
+        if not os.path.exists(entryFile):
+            return False
+
+        with self.lock:
+            try:
+                with open(entryFile) as f:
+                    entry = json.load(f)
+                alg.resolveOutputs()
+                for out in alg.outputs:
+                    if out.name not in entry:
+                        continue
+                    if out.hidden:
+                        out.value = entry[out.name]
+                    else:
+                        self._copyOutput(os.path.join(entryFolder, out.name),
+                                         entry[out.name], str(out.value),
+                                         isinstance(out, OutputDirectory))
+                # touch the entry so it is the last one to be evicted
+                os.utime(entryFile, None)
+                if self.entries is not None and key in self.entries:
+                    self.entries[key][0] = os.path.getmtime(entryFile)
+            except (IOError, OSError, ValueError) as e:
+                ProcessingLog.addToLog(ProcessingLog.LOG_WARNING,
+                                       'Could not read cached results {0}: {1}'.format(key, e))
+                shutil.rmtree(entryFolder, True)
+                if self.entries is not None:
+                    self.entries.pop(key, None)
+                return False
+        return True
+
+    def store(self, key, alg):
+        """Adds the outputs of an executed algorithm to the cache.
+
+        Outputs which are not local files (such as memory or database
+        layers) can not be cached, and in that case nothing is stored.
+        """
+        entry = {}
+        for out in alg.outputs:
+            if out.hidden:
+                entry[out.name] = out.value
+            elif out.value is None or not os.path.exists(str(out.value)):
+                return
+
+        with self.lock:
+            entryFolder = os.path.join(self.folder, key)
+            shutil.rmtree(entryFolder, True)
+            try:
+                os.makedirs(entryFolder)
+                for out in alg.outputs:
+                    if not out.hidden:
+                        outFolder = os.path.join(entryFolder, out.name)
+                        os.makedirs(outFolder)
+                        entry[out.name] = self._copyOutput(
+                            os.path.dirname(str(out.value)),
+                            os.path.splitext(os.path.basename(str(out.value)))[0],
+                            os.path.join(outFolder, os.path.basename(str(out.value))),
+                            isinstance(out, OutputDirectory))
+                entryFile = os.path.join(entryFolder, self.ENTRY_FILE)
+                with open(entryFile, 'w') as f:
+                    json.dump(entry, f)
+            except (IOError, OSError, TypeError, ValueError) as e:
+                ProcessingLog.addToLog(ProcessingLog.LOG_WARNING,
+                                       'Could not cache results {0}: {1}'.format(key, e))
+                shutil.rmtree(entryFolder, True)
+                if self.entries is not None:
+                    self.entries.pop(key, None)
+                return
+
+            if self.entries is not None:
+                self.entries[key] = [os.path.getmtime(entryFile), self._folderSize(entryFolder)]
+            self._evict()
+
+    def clear(self):
+        with self.lock:
+            for name in os.listdir(self.folder):
+                shutil.rmtree(os.path.join(self.folder, name), True)
+            self.entries = {}
+
+    def _copyOutput(self, srcFolder, srcName, dest, isFolder):
+        """Copies an output to dest, and returns the base name of the
+        copied files.
+
+        For file outputs, all the files in srcFolder sharing the srcName
+        base name (such as the .dbf and .shx files of a shapefile) are
+        copied, renamed after the base name of dest.
+        """
+        if isFolder:
+            if os.path.exists(dest):
+                shutil.rmtree(dest)
+            shutil.copytree(os.path.join(srcFolder, srcName), dest)
+            return srcName
+
+        destFolder = os.path.dirname(dest)
+        destName = os.path.splitext(os.path.basename(dest))[0]
+        mkdir(destFolder)
+        for f in os.listdir(srcFolder):
+            name, ext = os.path.splitext(f)
+            if name == srcName or name.startswith(srcName + '.'):
+                shutil.copy2(os.path.join(srcFolder, f),
+                             os.path.join(destFolder, destName + f[len(srcName):]))
+        return destName
+
+    def _evict(self):
+        """Removes the least recently used entries until the cache is
+        smaller than maxSize.
+
+        The cache folder is only read the first time, entries are then
+        tracked as they are stored, restored and removed.
+        """
+        if self.entries is None:
+            self.entries = {}
+            for name in os.listdir(self.folder):
+                entryFolder = os.path.join(self.folder, name)
+                entryFile = os.path.join(entryFolder, self.ENTRY_FILE)
+                if os.path.exists(entryFile):
+                    self.entries[name] = [os.path.getmtime(entryFile), self._folderSize(entryFolder)]
+
+        total = sum(size for mtime, size in self.entries.values())
+        for mtime, size, name in sorted((mtime, size, name) for name, (mtime, size) in self.entries.items()):
+            if total <= self.maxSize:
+                break
+            shutil.rmtree(os.path.join(self.folder, name), True)
+            del self.entries[name]
+            total -= size
+
+    def _folderSize(self, folder):
+        size = 0
+        for path, dirs, files in os.walk(folder):
+            for f in files:
+                size += os.path.getsize(os.path.join(path, f))
+        return size
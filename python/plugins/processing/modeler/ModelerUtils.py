@@ -36,6 +36,15 @@ class ModelerUtils(object):
 
     MODELS_FOLDER = 'MODELS_FOLDER'
     ACTIVATE_MODELS = 'ACTIVATE_MODELS'
+    CONTINUE_ON_ERROR = 'MODELS_CONTINUE_ON_ERROR'
+    USE_CACHE = 'MODELS_USE_CACHE'
+    CACHE_FOLDER = 'MODELS_CACHE_FOLDER'
+    CACHE_MAX_SIZE = 'MODELS_CACHE_MAX_SIZE'
+    CACHE_HASH_INPUTS = 'MODELS_CACHE_HASH_INPUTS'
+    INTERMEDIATE_OUTPUTS = 'MODELS_INTERMEDIATE_OUTPUTS'
+
+    # Storage of the vector outputs which are not outputs of the model
+    TEMPORARY_FILES, MEMORY_LAYERS, GEOPACKAGE = range(3)
 
     @staticmethod
     def defaultModelsFolder():
@@ -43,6 +52,25 @@ class ModelerUtils(object):
         mkdir(folder)
         return os.path.abspath(folder)
 
+    @staticmethod
+    def defaultCacheFolder():
+        folder = str(os.path.join(userFolder(), 'modelcache'))
+        mkdir(folder)
+        return os.path.abspath(folder)
+
+    @staticmethod
+    def resultsCache():
+        """Returns the cache for the results of the algorithms in models,
+        or None if caching is disabled.
+        """
+        if not ProcessingConfig.getSetting(ModelerUtils.USE_CACHE):
+            return None
+        from processing.modeler.ModelerResultsCache import ModelerResultsCache
+        folder = ProcessingConfig.getSetting(ModelerUtils.CACHE_FOLDER) or ModelerUtils.defaultCacheFolder()
+        maxSize = float(ProcessingConfig.getSetting(ModelerUtils.CACHE_MAX_SIZE) or 0) * 1024 * 1024
+        return ModelerResultsCache(folder, maxSize,
+                                   ProcessingConfig.getSetting(ModelerUtils.CACHE_HASH_INPUTS))
+
     @staticmethod
     def modelsFolders():
         folder = ProcessingConfig.getSetting(ModelerUtils.MODELS_FOLDER)
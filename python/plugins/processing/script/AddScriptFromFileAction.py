@@ -57,7 +57,7 @@ class AddScriptFromFileAction(ToolboxAction):
                                                                   self.tr('Script files', 'AddScriptFromFileAction'), lastDir,
                                                                   self.tr('Script files (*.py *.PY)', 'AddScriptFromFileAction'))
         if filenames:
-            validAlgs = 0
+            validAlgs = []
             wrongAlgs = []
             for filename in filenames:
                 try:
@@ -67,11 +67,11 @@ class AddScriptFromFileAction(ToolboxAction):
                     destFilename = os.path.join(ScriptUtils.scriptsFolders()[0], os.path.basename(filename))
                     with open(destFilename, 'w') as f:
                         f.write(script.script)
-                    validAlgs += 1
+                    validAlgs.append(destFilename)
                 except WrongScriptException:
                     wrongAlgs.append(os.path.basename(filename))
-            if validAlgs:
-                algList.reloadProvider('script')
+            for destFilename in validAlgs:
+                algList.reloadAlgorithm('script', destFilename)
             if wrongAlgs:
                 QMessageBox.warning(self.toolbox,
                                     self.tr('Error reading scripts', 'AddScriptFromFileAction'),
@@ -39,6 +39,7 @@ from processing.gui.Help2Html import getHtmlFromHelpFile
 from processing.core.parameters import getParameterFromString
 from processing.core.outputs import getOutputFromString
 from processing.core.ProcessingLog import ProcessingLog
+from processing.tools.vector import VectorWriter, TableWriter
 from processing.script.WrongScriptException import WrongScriptException
 
 pluginPath = os.path.split(os.path.dirname(__file__))[0]
@@ -178,6 +179,13 @@ class ScriptAlgorithm(GeoAlgorithm):
                 ProcessingLog.addToLog(ProcessingLog.LOG_WARNING, self.tr('Cannot find variable: {0}').format(varname))
 
         exec((script), ns)
+
+        # writers created by the script are closed before their output is
+        # used, even if the namespace is not freed right away
+        for value in list(ns.values()):
+            if isinstance(value, (VectorWriter, TableWriter)):
+                value.close()
+
         for out in self.outputs:
             out.setValue(ns[out.name])
 
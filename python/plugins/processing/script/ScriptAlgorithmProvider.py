@@ -84,5 +84,14 @@ class ScriptAlgorithmProvider(AlgorithmProvider):
         for f in folders:
             self.algs.extend(ScriptUtils.loadFromFolder(f))
 
+    def canLoadAlgorithmFromFile(self):
+        return True
+
+    def algorithmsFolders(self):
+        return ScriptUtils.scriptsFolders()
+
+    def loadAlgorithmFromFile(self, descriptionFile):
+        return ScriptUtils.loadFromFile(descriptionFile)
+
     def addAlgorithmsFromFolder(self, folder):
         self.algs.extend(ScriptUtils.loadFromFolder(folder))
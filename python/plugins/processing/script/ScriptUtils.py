@@ -64,16 +64,22 @@ class ScriptUtils(object):
         for path, subdirs, files in os.walk(folder):
             for descriptionFile in files:
                 if descriptionFile.endswith('py'):
-                    try:
-                        fullpath = os.path.join(path, descriptionFile)
-                        alg = ScriptAlgorithm(fullpath)
-                        if alg.name.strip() != '':
-                            algs.append(alg)
-                    except WrongScriptException as e:
-                        ProcessingLog.addToLog(ProcessingLog.LOG_ERROR, e.msg)
-                    except Exception as e:
-                        ProcessingLog.addToLog(
-                            ProcessingLog.LOG_ERROR,
-                            QCoreApplication.translate('Processing', 'Could not load script: {0}\n{1}').format(descriptionFile, str(e))
-                        )
+                    alg = ScriptUtils.loadFromFile(os.path.join(path, descriptionFile))
+                    if alg is not None:
+                        algs.append(alg)
         return algs
+
+    @staticmethod
+    def loadFromFile(fullpath):
+        try:
+            alg = ScriptAlgorithm(fullpath)
+            if alg.name.strip() != '':
+                return alg
+        except WrongScriptException as e:
+            ProcessingLog.addToLog(ProcessingLog.LOG_ERROR, e.msg)
+        except Exception as e:
+            ProcessingLog.addToLog(
+                ProcessingLog.LOG_ERROR,
+                QCoreApplication.translate('Processing', 'Could not load script: {0}\n{1}').format(os.path.basename(fullpath), str(e))
+            )
+        return None
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    AlgListTest.py
+    ---------------------
+    Date                 : April 2017
+    Copyright            : (C) 2017 by the QGIS Development Team
+    Email                : qgis-developer at lists dot osgeo dot org
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Development Team'
+__date__ = 'April 2017'
+__copyright__ = '(C) 2017, the QGIS Development Team'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+import shutil
+import tempfile
+
+from qgis.testing import start_app, unittest
+
+from processing.core.alglist import algList, isInFolders
+from processing.core.AlgorithmProvider import AlgorithmProvider
+from processing.core.GeoAlgorithm import GeoAlgorithm
+
+start_app()
+
+
+class FileAlgorithm(GeoAlgorithm):
+
+    def __init__(self, descriptionFile):
+        GeoAlgorithm.__init__(self)
+        self.descriptionFile = descriptionFile
+        with open(descriptionFile) as f:
+            self.name = f.read().strip()
+        self.group = 'Test'
+
+
+class FileAlgorithmProvider(AlgorithmProvider):
+
+    """A provider with an algorithm for each file in a folder, named
+    after the content of the file.
+    """
+
+    def __init__(self, folder, canLoad=True):
+        super().__init__()
+        self.folder = folder
+        self.canLoad = canLoad
+        self.loaded = 0
+
+    def id(self):
+        return 'testfiles'
+
+    def name(self):
+        return 'Test files'
+
+    def _loadAlgorithms(self):
+        self.loaded += 1
+        self.algs = [FileAlgorithm(os.path.join(self.folder, f))
+                     for f in sorted(os.listdir(self.folder))]
+
+    def canLoadAlgorithmFromFile(self):
+        return self.canLoad
+
+    def algorithmsFolders(self):
+        return [self.folder]
+
+    def loadAlgorithmFromFile(self, descriptionFile):
+        return FileAlgorithm(descriptionFile)
+
+
+class AlgListTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.outside = tempfile.mkdtemp()
+        for name in ['a', 'b']:
+            self.writeAlgorithm(os.path.join(self.folder, name + '.txt'), name)
+
+    def tearDown(self):
+        algList.removeProvider('testfiles')
+        shutil.rmtree(self.folder)
+        shutil.rmtree(self.outside)
+
+    def writeAlgorithm(self, path, name):
+        with open(path, 'w') as f:
+            f.write(name)
+        return path
+
+    def addProvider(self, canLoad=True):
+        provider = FileAlgorithmProvider(self.folder, canLoad)
+        provider.loadAlgorithms()
+        algList.addProvider(provider)
+        return provider
+
+    def algorithmNames(self):
+        return sorted(algList.algs['testfiles'].keys())
+
+    def testIndex(self):
+        self.assertIsNone(algList.getAlgorithm('testfiles:a'))
+        self.addProvider()
+        self.assertEqual(self.algorithmNames(), ['testfiles:a', 'testfiles:b'])
+        self.assertEqual(algList.getAlgorithm('testfiles:a').name, 'a')
+        self.assertEqual(algList.getAlgorithm('testfiles:b').name, 'b')
+
+        # algorithms of removed providers are not found anymore
+        algList.removeProvider('testfiles')
+        self.assertIsNone(algList.getAlgorithm('testfiles:a'))
+        self.assertIsNone(algList.getAlgorithm('testfiles:b'))
+        self.assertNotIn('testfiles', algList.algs)
+
+    def testReloadAlgorithm(self):
+        provider = self.addProvider()
+
+        # added files are loaded
+        added = self.writeAlgorithm(os.path.join(self.folder, 'c.txt'), 'c')
+        algList.reloadAlgorithm('testfiles', added)
+        self.assertEqual(self.algorithmNames(), ['testfiles:a', 'testfiles:b', 'testfiles:c'])
+        self.assertIs(algList.getAlgorithm('testfiles:c').provider, provider)
+
+        # edited files replace their algorithm, also if it is renamed
+        self.writeAlgorithm(added, 'd')
+        algList.reloadAlgorithm('testfiles', added)
+        self.assertEqual(self.algorithmNames(), ['testfiles:a', 'testfiles:b', 'testfiles:d'])
+        self.assertIsNone(algList.getAlgorithm('testfiles:c'))
+
+        # removed files remove their algorithm
+        os.remove(added)
+        algList.reloadAlgorithm('testfiles', added)
+        self.assertEqual(self.algorithmNames(), ['testfiles:a', 'testfiles:b'])
+        self.assertIsNone(algList.getAlgorithm('testfiles:d'))
+
+        # the rest of the provider is not loaded again
+        self.assertEqual(provider.loaded, 1)
+
+    def testReloadAlgorithmOutsideFolders(self):
+        self.addProvider()
+        outside = self.writeAlgorithm(os.path.join(self.outside, 'c.txt'), 'c')
+        algList.reloadAlgorithm('testfiles', outside)
+        self.assertEqual(self.algorithmNames(), ['testfiles:a', 'testfiles:b'])
+        self.assertIsNone(algList.getAlgorithm('testfiles:c'))
+
+    def testReloadProvider(self):
+        # providers which can not load a single algorithm are reloaded
+        provider = self.addProvider(canLoad=False)
+        added = self.writeAlgorithm(os.path.join(self.folder, 'c.txt'), 'c')
+        algList.reloadAlgorithm('testfiles', added)
+        self.assertEqual(provider.loaded, 2)
+        self.assertEqual(self.algorithmNames(), ['testfiles:a', 'testfiles:b', 'testfiles:c'])
+
+    def testIsInFolders(self):
+        path = os.path.join(self.folder, 'sub', 'a.txt')
+        self.assertTrue(isInFolders(path, [self.folder]))
+        self.assertTrue(isInFolders(path, ['', self.outside, self.folder]))
+        self.assertFalse(isInFolders(path, [self.outside]))
+        self.assertFalse(isInFolders(self.folder + 'x', [self.folder]))
+        self.assertFalse(isInFolders(path, []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    AlgorithmExecutorTest.py
+    ---------------------
+    Date                 : April 2017
+    Copyright            : (C) 2017 by the QGIS Development Team
+    Email                : qgis-developer at lists dot osgeo dot org
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Development Team'
+__date__ = 'April 2017'
+__copyright__ = '(C) 2017, the QGIS Development Team'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import threading
+import time
+
+from qgis.core import QgsProcessingFeedback
+from qgis.testing import start_app, unittest
+
+from processing.core.GeoAlgorithm import GeoAlgorithm
+from processing.core.GeoAlgorithmExecutionException import GeoAlgorithmExecutionException
+from processing.core.ProcessingConfig import ProcessingConfig
+from processing.gui.AlgorithmExecutor import runalgs
+
+start_app()
+
+
+class SleepingAlgorithm(GeoAlgorithm):
+
+    def __init__(self, delay, fail=False):
+        GeoAlgorithm.__init__(self)
+        self.delay = delay
+        self.fail = fail
+        self.canRunInParallel = True
+        self.processed = False
+        self.finishingThread = None
+
+    def defineCharacteristics(self):
+        self.name = 'Sleeping algorithm'
+        self.group = 'Tests'
+
+    def processAlgorithm(self, feedback):
+        time.sleep(self.delay)
+        if self.fail:
+            raise GeoAlgorithmExecutionException('Failed')
+        self.processed = True
+
+    def finishExecution(self, feedback):
+        self.finishingThread = threading.current_thread()
+        GeoAlgorithm.finishExecution(self, feedback)
+
+
+class AlgorithmExecutorTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        ProcessingConfig.initialize()
+        cls.maxThreads = ProcessingConfig.getSetting(ProcessingConfig.MAX_THREADS)
+        ProcessingConfig.setSettingValue(ProcessingConfig.MAX_THREADS, 4)
+
+    @classmethod
+    def tearDownClass(cls):
+        ProcessingConfig.setSettingValue(ProcessingConfig.MAX_THREADS, cls.maxThreads)
+
+    def testRunalgsOrder(self):
+        # the first algorithms are the slowest ones, but results are
+        # still handled in order, from the main thread
+        algs = [SleepingAlgorithm(0.05 * (4 - i)) for i in range(4)]
+        finished = []
+        self.assertTrue(runalgs(algs, QgsProcessingFeedback(),
+                                lambda row, alg: finished.append(row)))
+        self.assertEqual(finished, [0, 1, 2, 3])
+        for alg in algs:
+            self.assertTrue(alg.processed)
+            self.assertEqual(alg.finishingThread, threading.current_thread())
+
+    def testRunalgsFailFast(self):
+        algs = [SleepingAlgorithm(0.1), SleepingAlgorithm(0, fail=True),
+                SleepingAlgorithm(0), SleepingAlgorithm(0)]
+        finished = []
+        self.assertFalse(runalgs(algs, QgsProcessingFeedback(),
+                                 lambda row, alg: finished.append(row)))
+        # the algorithm before the failing one is handled, but none after
+        self.assertEqual(finished, [0])
+        self.assertIsNone(algs[1].finishingThread)
+        self.assertIsNone(algs[2].finishingThread)
+        self.assertIsNone(algs[3].finishingThread)
+
+    def testRunalgsSerial(self):
+        ProcessingConfig.setSettingValue(ProcessingConfig.MAX_THREADS, 1)
+        try:
+            algs = [SleepingAlgorithm(0), SleepingAlgorithm(0, fail=True), SleepingAlgorithm(0)]
+            finished = []
+            self.assertFalse(runalgs(algs, QgsProcessingFeedback(),
+                                     lambda row, alg: finished.append(row)))
+            self.assertEqual(finished, [0])
+            self.assertFalse(algs[2].processed)
+        finally:
+            ProcessingConfig.setSettingValue(ProcessingConfig.MAX_THREADS, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
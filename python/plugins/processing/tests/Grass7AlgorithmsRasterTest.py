@@ -27,8 +27,13 @@ __revision__ = ':%H$'
 
 import AlgorithmsTestBase
 
+import os
+import gdal
 import nose2
 import shutil
+import tempfile
+
+from numpy import allclose
 
 from qgis.testing import (
     start_app,
@@ -54,5 +59,84 @@ class TestGrass7AlgorithmsRasterTest(unittest.TestCase, AlgorithmsTestBase.Algor
         return 'grass7_algorithms_raster_tests.yaml'
 
 
+class TestGrass7LinkedOutputsTest(unittest.TestCase):
+
+    """Raster outputs written directly by GRASS with r.external.out must
+    be the same as the ones exported with r.out.gdal.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        start_app()
+        from processing.core.Processing import Processing
+        from processing.core.ProcessingConfig import ProcessingConfig
+        from processing.algs.grass7.Grass7Utils import Grass7Utils
+        Processing.initialize()
+        cls.linkExternal = ProcessingConfig.getSetting(Grass7Utils.GRASS_LINK_EXTERNAL)
+        cls.cleanup_paths = []
+
+    @classmethod
+    def tearDownClass(cls):
+        from processing.core.ProcessingConfig import ProcessingConfig
+        from processing.algs.grass7.Grass7Utils import Grass7Utils
+        ProcessingConfig.setSettingValue(Grass7Utils.GRASS_LINK_EXTERNAL, cls.linkExternal)
+        for path in cls.cleanup_paths:
+            shutil.rmtree(path)
+
+    def planeAlgorithm(self, linkExternal):
+        from processing.core.Processing import Processing
+        from processing.core.ProcessingConfig import ProcessingConfig
+        from processing.algs.grass7.Grass7Utils import Grass7Utils
+        ProcessingConfig.setSettingValue(Grass7Utils.GRASS_LINK_EXTERNAL, linkExternal)
+
+        alg = Processing.getAlgorithm('grass7:r.plane').getCopy()
+        alg.setParameterValue('GRASS_REGION_PARAMETER', '344500.0,358400.0,6682800.0,6693700.0')
+        alg.setParameterValue('azimuth', 125)
+        alg.setParameterValue('dip', 45)
+        alg.setParameterValue('easting', 351610)
+        alg.setParameterValue('elevation', 50)
+        alg.setParameterValue('northing', 6688312)
+        alg.setParameterValue('type', 1)
+        outdir = tempfile.mkdtemp()
+        self.cleanup_paths.append(outdir)
+        alg.setOutputValue('output', os.path.join(outdir, 'raster.tif'))
+        return alg
+
+    def readRaster(self, filename):
+        dataset = gdal.Open(filename)
+        self.assertIsNotNone(dataset)
+        return dataset.ReadAsArray(0)
+
+    def testLinkedOutput(self):
+        alg = self.planeAlgorithm(True)
+        self.assertEqual(alg.linkedRasterOutputs(), [alg.getOutputFromName('output')])
+        alg.execute()
+        linked = self.readRaster(alg.getOutputValue('output'))
+        # the location is returned to the pool once the execution finishes
+        self.assertIsNone(alg.session)
+
+        alg = self.planeAlgorithm(False)
+        self.assertEqual(alg.linkedRasterOutputs(), [])
+        alg.execute()
+        exported = self.readRaster(alg.getOutputValue('output'))
+
+        self.assertEqual(linked.shape, exported.shape)
+        self.assertTrue(allclose(linked, exported))
+
+    def testMissingLinkedOutput(self):
+        from processing.algs.grass7.Grass7Utils import Grass7Session
+        from processing.core.GeoAlgorithmExecutionException import GeoAlgorithmExecutionException
+
+        # outputs which GRASS could not write make the execution fail
+        alg = self.planeAlgorithm(True)
+        alg.session = Grass7Session()
+        try:
+            with self.assertRaises(GeoAlgorithmExecutionException):
+                alg.moveLinkedOutputs()
+        finally:
+            alg.session.remove()
+        self.assertFalse(os.path.exists(alg.getOutputValue('output')))
+
+
 if __name__ == '__main__':
     nose2.main()
@@ -25,6 +25,12 @@ __copyright__ = '(C) 2016, Nyall Dawson'
 
 __revision__ = '$Format:%H$'
 
+import os
+import time
+import shutil
+import tempfile
+import threading
+
 from qgis.testing import start_app, unittest
 
 from processing.modeler.ModelerAlgorithm import (Algorithm,
@@ -33,10 +39,17 @@ from processing.modeler.ModelerAlgorithm import (Algorithm,
                                                  ModelerOutput,
                                                  ValueFromOutput)
 from processing.modeler.ModelerParametersDialog import (ModelerParametersDialog)
+from processing.modeler.ModelerResultsCache import ModelerResultsCache
 from processing.core.parameters import (ParameterFile,
                                         ParameterNumber,
                                         ParameterString,
-                                        ParameterTableField)
+                                        ParameterTableField,
+                                        ParameterVector)
+from processing.core.outputs import OutputFile, OutputNumber
+from processing.core.GeoAlgorithm import GeoAlgorithm
+from processing.core.GeoAlgorithmExecutionException import GeoAlgorithmExecutionException
+from processing.core.ProcessingConfig import ProcessingConfig, Setting
+from processing.modeler.ModelerUtils import ModelerUtils
 start_app()
 
 
@@ -91,6 +104,229 @@ class ModelerTest(unittest.TestCase):
         a2.params['INPUT'] = ValueFromOutput('QGISCLIP_1', 'OUTPUT')
         self.assertEqual(m.hasDependencies('QGISCLIP_1'), True)
 
+    def testModelerAlgorithmExecutionGraph(self):
+        # test getExecutionGraph from ModelerAlgorithm
+
+        m = ModelerAlgorithm()
+
+        a = Algorithm("qgis:clip")
+        m.addAlgorithm(a)
+        a2 = Algorithm("qgis:clip")
+        m.addAlgorithm(a2)
+        a3 = Algorithm("qgis:clip")
+        m.addAlgorithm(a3)
+
+        # independent algorithms
+        self.assertEqual(m.getExecutionGraph(),
+                         {'QGISCLIP_1': set(), 'QGISCLIP_2': set(), 'QGISCLIP_3': set()})
+
+        # output and parent algorithm dependencies
+        a.outputs['OUTPUT'] = ModelerOutput('out')
+        a2.params['INPUT'] = ValueFromOutput('QGISCLIP_1', 'OUTPUT')
+        a3.dependencies = ['QGISCLIP_2']
+        self.assertEqual(m.getExecutionGraph(),
+                         {'QGISCLIP_1': set(),
+                          'QGISCLIP_2': set(['QGISCLIP_1']),
+                          'QGISCLIP_3': set(['QGISCLIP_2'])})
+
+        # inactive algorithms are not part of the graph
+        a3.active = False
+        self.assertEqual(m.getExecutionGraph(),
+                         {'QGISCLIP_1': set(), 'QGISCLIP_2': set(['QGISCLIP_1'])})
+
+
+class CachedAlgorithm(object):
+    """Minimal algorithm with the attributes used by the results cache.
+    """
+
+    def __init__(self, inputPath, outputPath, distance=1):
+        self.parameters = [ParameterVector('INPUT', 'input'),
+                           ParameterNumber('DISTANCE', 'distance')]
+        self.parameters[0].value = inputPath
+        self.parameters[1].value = distance
+        self.outputs = [OutputFile('OUTPUT', 'output', ext='txt'),
+                        OutputNumber('COUNT', 'count')]
+        self.outputs[0].value = outputPath
+
+    def commandLineName(self):
+        return 'tests:cached'
+
+    def resolveOutputs(self):
+        pass
+
+
+class ModelerResultsCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache = ModelerResultsCache(os.path.join(self.folder, 'cache'), 1024 * 1024)
+        self.input = os.path.join(self.folder, 'input.shp')
+        for ext in ['.shp', '.dbf', '.shx']:
+            with open(os.path.join(self.folder, 'input' + ext), 'w') as f:
+                f.write('data')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, path, content):
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def testKey(self):
+        alg = CachedAlgorithm(self.input, os.path.join(self.folder, 'out.txt'))
+        key = self.cache.key(alg)
+        self.assertIsNotNone(key)
+
+        # same parameters, different output path
+        self.assertEqual(self.cache.key(CachedAlgorithm(self.input, os.path.join(self.folder, 'out2.txt'))), key)
+        self.assertNotEqual(self.cache.key(CachedAlgorithm(self.input, os.path.join(self.folder, 'out.txt'), 2)), key)
+
+        # attribute only edits change the key
+        self.write(os.path.join(self.folder, 'input.dbf'), 'other data')
+        self.assertNotEqual(self.cache.key(alg), key)
+
+        # inputs which are not files can not be cached
+        self.assertIsNone(self.cache.key(CachedAlgorithm('memory:layer', os.path.join(self.folder, 'out.txt'))))
+        self.assertIsNone(self.cache.key(CachedAlgorithm("dbname='db' table=\"t\" (geom) sql=",
+                                                         os.path.join(self.folder, 'out.txt'))))
+
+    def testStoreRestore(self):
+        alg = CachedAlgorithm(self.input, os.path.join(self.folder, 'out.txt'))
+        key = self.cache.key(alg)
+        self.assertFalse(self.cache.restore(key, alg))
+
+        self.write(alg.outputs[0].value, 'result')
+        alg.outputs[1].value = 5
+        self.cache.store(key, alg)
+
+        restored = CachedAlgorithm(self.input, os.path.join(self.folder, 'restored.txt'))
+        self.assertTrue(self.cache.restore(key, restored))
+        with open(restored.outputs[0].value) as f:
+            self.assertEqual(f.read(), 'result')
+        self.assertEqual(restored.outputs[1].value, 5)
+
+        # outputs which are not files are not stored
+        memory = CachedAlgorithm(self.input, 'memory:out', 3)
+        self.cache.store(self.cache.key(memory), memory)
+        self.assertFalse(self.cache.restore(self.cache.key(memory), memory))
+
+    def testEvict(self):
+        self.cache.maxSize = 2500
+        keys = []
+        for i in range(3):
+            alg = CachedAlgorithm(self.input, os.path.join(self.folder, 'out.txt'), i)
+            self.write(alg.outputs[0].value, 'x' * 1000)
+            keys.append(self.cache.key(alg))
+            self.cache.store(keys[-1], alg)
+            # restoring the first entry makes it the most recently used
+            time.sleep(0.01)
+            self.cache.restore(keys[0], CachedAlgorithm(self.input, os.path.join(self.folder, 'r.txt'), 0))
+            time.sleep(0.01)
+
+        entries = os.listdir(self.cache.folder)
+        self.assertIn(keys[0], entries)
+        self.assertNotIn(keys[1], entries)
+        self.assertIn(keys[2], entries)
+
+        self.cache.clear()
+        self.assertEqual(os.listdir(self.cache.folder), [])
+
+
+class ThreadedAlgorithm(GeoAlgorithm):
+    """Algorithm recording the threads where each step of its execution
+    is run. If a barrier is passed, it is only processed once as many
+    algorithms as the barrier waits for are being processed.
+    """
+
+    def __init__(self, barrier=None, fail=False):
+        self.barrier = barrier
+        self.fail = fail
+        self.threads = {}
+        GeoAlgorithm.__init__(self)
+        self.canRunInParallel = True
+
+    def defineCharacteristics(self):
+        self.name = 'threaded'
+        self.group = 'Tests'
+
+    def prepareExecution(self, feedback):
+        self.threads['prepare'] = threading.current_thread()
+        GeoAlgorithm.prepareExecution(self, feedback)
+
+    def processAlgorithm(self, feedback):
+        self.threads['process'] = threading.current_thread()
+        if self.fail:
+            raise GeoAlgorithmExecutionException('Failed on purpose')
+        if self.barrier is not None:
+            self.barrier.wait(10)
+
+    def finishExecution(self, feedback):
+        self.threads['finish'] = threading.current_thread()
+        GeoAlgorithm.finishExecution(self, feedback)
+
+
+class ModelerExecutionTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        ProcessingConfig.initialize()
+        if ModelerUtils.CONTINUE_ON_ERROR not in ProcessingConfig.settings:
+            ProcessingConfig.addSetting(Setting('Models', ModelerUtils.CONTINUE_ON_ERROR,
+                                                'Keep running independent algorithms', False))
+
+    def setUp(self):
+        self.maxThreads = ProcessingConfig.getSetting(ProcessingConfig.MAX_THREADS)
+        self.continueOnError = ProcessingConfig.getSetting(ModelerUtils.CONTINUE_ON_ERROR)
+        ProcessingConfig.setSettingValue(ProcessingConfig.MAX_THREADS, 4)
+
+    def tearDown(self):
+        ProcessingConfig.setSettingValue(ProcessingConfig.MAX_THREADS, self.maxThreads)
+        ProcessingConfig.setSettingValue(ModelerUtils.CONTINUE_ON_ERROR, self.continueOnError)
+
+    def createModel(self, algorithms):
+        m = ModelerAlgorithm()
+        for algInstance in algorithms:
+            a = Algorithm('tests:threaded')
+            a._algInstance = algInstance
+            m.addAlgorithm(a)
+        return m
+
+    def testIndependentBranches(self):
+        # both algorithms can only be processed at the same time
+        barrier = threading.Barrier(2)
+        algorithms = [ThreadedAlgorithm(barrier), ThreadedAlgorithm(barrier)]
+        m = self.createModel(algorithms)
+        m.execute()
+
+        mainThread = threading.current_thread()
+        self.assertNotEqual(algorithms[0].threads['process'], algorithms[1].threads['process'])
+        for alg in algorithms:
+            self.assertNotEqual(alg.threads['process'], mainThread)
+            # shared state is only used in the main thread
+            self.assertEqual(alg.threads['prepare'], mainThread)
+            self.assertEqual(alg.threads['finish'], mainThread)
+        self.assertEqual(sorted(m.executionTimes.keys()), sorted(m.algs.keys()))
+
+    def testContinueOnError(self):
+        for continueOnError in [False, True]:
+            ProcessingConfig.setSettingValue(ModelerUtils.CONTINUE_ON_ERROR, continueOnError)
+            failing = ThreadedAlgorithm(fail=True)
+            dependent = ThreadedAlgorithm()
+            independent = ThreadedAlgorithm()
+            m = self.createModel([failing, dependent, independent])
+            names = sorted(m.algs.keys())
+            m.algs[names[1]].dependencies = [names[0]]
+
+            with self.assertRaises(GeoAlgorithmExecutionException) as cm:
+                m.execute()
+            self.assertIn('Failed on purpose', cm.exception.msg)
+            # algorithms depending on a failed one are never run
+            self.assertEqual(dependent.threads, {})
+            if continueOnError:
+                # the rest of the model is run before failing
+                self.assertIn('finish', independent.threads)
+                self.assertEqual(list(m.executionTimes.keys()), [names[2]])
+
 
 if __name__ == '__main__':
     unittest.main()
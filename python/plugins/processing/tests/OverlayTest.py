@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    OverlayTest.py
+    ---------------------
+    Date                 : April 2017
+    Copyright            : (C) 2017 by the QGIS Development Team
+    Email                : qgis-developer at lists dot osgeo dot org
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Development Team'
+__date__ = 'April 2017'
+__copyright__ = '(C) 2017, the QGIS Development Team'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from qgis.core import (QgsVectorLayer, QgsFeature, QgsGeometry, QgsRectangle,
+                       QgsProject, NULL)
+from qgis.testing import start_app, unittest
+
+from processing.core.ProcessingConfig import ProcessingConfig
+from processing.algs.qgis import overlay
+from processing.algs.qgis.Clip import Clip
+from processing.algs.qgis.Difference import Difference
+from processing.algs.qgis.Intersection import Intersection
+from processing.algs.qgis.SpatialJoin import candidatePairs, groupedStatistics
+from processing.algs.qgis.SymmetricalDifference import SymmetricalDifference
+from processing.algs.qgis.Union import Union
+
+start_app()
+
+
+def squaresLayer(name, field, squares):
+    layer = QgsVectorLayer('Polygon?crs=epsg:4326&field={}:integer'.format(field), name, 'memory')
+    features = []
+    for value, rect in squares:
+        feature = QgsFeature(layer.fields())
+        feature.setGeometry(QgsGeometry.fromRect(QgsRectangle(*rect)))
+        feature.setAttributes([value])
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+class OverlayTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        ProcessingConfig.initialize()
+        cls.cleanup_paths = []
+
+        # a1 overlaps b1 on a unit square, a2 does not overlap anything
+        cls.layerA = squaresLayer('a', 'a', [(1, (0, 0, 2, 2)), (2, (5, 0, 6, 1))])
+        cls.layerB = squaresLayer('b', 'b', [(10, (1, 1, 3, 3))])
+        QgsProject.instance().addMapLayers([cls.layerA, cls.layerB])
+
+    @classmethod
+    def tearDownClass(cls):
+        QgsProject.instance().removeAllMapLayers()
+        for path in cls.cleanup_paths:
+            shutil.rmtree(path)
+
+    def runOverlay(self, alg):
+        alg.setParameterValue(alg.parameters[0].name, self.layerA.source())
+        alg.setParameterValue(alg.parameters[1].name, self.layerB.source())
+        outdir = tempfile.mkdtemp()
+        self.cleanup_paths.append(outdir)
+        output = os.path.join(outdir, 'output.shp')
+        alg.setOutputValue('OUTPUT', output)
+        alg.execute()
+
+        result = QgsVectorLayer(output, 'output', 'ogr')
+        self.assertTrue(result.isValid())
+        # NULL values can not be ordered, so they are sorted by representation
+        return sorted(((round(f.geometry().area(), 6), f.attributes()) for f in result.getFeatures()),
+                      key=lambda r: (r[0], repr(r[1])))
+
+    def testFeatureCache(self):
+        cache = overlay.FeatureCache.fromLayer(self.layerA)
+        self.assertEqual(len(cache.ids), 2)
+        self.assertEqual(cache.candidates(QgsGeometry.fromRect(QgsRectangle(-1, -1, 10, 10))), sorted(cache.ids))
+        self.assertEqual(cache.intersecting(QgsRectangle(4, 0, 7, 1)), [cache.ids[1]])
+        self.assertEqual([cache.attributes[fid] for fid in cache.ids], [[1], [2]])
+
+        # only the most recently used engines are kept
+        cache.maxEngines = 1
+        first = cache.engine(cache.ids[0])
+        self.assertIs(cache.engine(cache.ids[0]), first)
+        cache.engine(cache.ids[1])
+        self.assertEqual(list(cache.engines.keys()), [cache.ids[1]])
+
+        geom = QgsGeometry.fromRect(QgsRectangle(1, 1, 3, 3))
+        self.assertAlmostEqual(overlay.difference(geom, cache).area(), 3)
+        outside = QgsGeometry.fromRect(QgsRectangle(10, 10, 11, 11))
+        self.assertAlmostEqual(overlay.difference(outside, cache).area(), 1)
+
+    def testIntersection(self):
+        self.assertEqual(self.runOverlay(Intersection()),
+                         [(1.0, [1, 10])])
+
+    def testUnion(self):
+        self.assertEqual(self.runOverlay(Union()),
+                         [(1.0, [1, 10]), (1.0, [2, NULL]), (3.0, [1, NULL]), (3.0, [NULL, 10])])
+
+    def testDifference(self):
+        self.assertEqual(self.runOverlay(Difference()),
+                         [(1.0, [2]), (3.0, [1])])
+
+    def testSymmetricalDifference(self):
+        self.assertEqual(self.runOverlay(SymmetricalDifference()),
+                         [(1.0, [2, NULL]), (3.0, [1, NULL]), (3.0, [NULL, 10])])
+
+    def testClip(self):
+        self.assertEqual(self.runOverlay(Clip()),
+                         [(1.0, [1])])
+
+
+class JoinByLocationTest(unittest.TestCase):
+
+    def testCandidatePairs(self):
+        boxesA = numpy.array([[0, 0, 1, 1],
+                              [numpy.nan] * 4,
+                              [5, 5, 6, 6],
+                              [-10, -10, 10, 10]], dtype=float)
+        boxesB = numpy.array([[1, 1, 2, 2],
+                              [5.5, 5.5, 5.5, 5.5],
+                              [3, 0, 4, 1]], dtype=float)
+        targets, joins = candidatePairs(boxesA, boxesB, maxCells=4)
+        # touching boxes match, empty ones do not
+        self.assertEqual(list(zip(targets.tolist(), joins.tolist())),
+                         [(0, 0), (2, 1), (3, 0), (3, 1), (3, 2)])
+
+        targets, joins = candidatePairs(boxesA, numpy.zeros((0, 4)))
+        self.assertEqual(len(targets), 0)
+        self.assertEqual(len(joins), 0)
+
+    def testGroupedStatistics(self):
+        groups = numpy.array([0, 0, 0, 2, 2, 2, 2, 3])
+        values = numpy.array([4, numpy.nan, 1, 2, 8, 6, 4, numpy.nan])
+        stats = groupedStatistics(groups, values, 5)
+
+        # NULL values are ignored. Groups 1 and 4 have no values, and
+        # group 3 only has a NULL value
+        self.assertEqual(stats['sum'].tolist(), [5, 0, 20, 0, 0])
+        for name, expected in [('mean', [2.5, 5]),
+                               ('min', [1, 2]),
+                               ('max', [4, 8]),
+                               ('median', [2.5, 5])]:
+            self.assertEqual(stats[name][[0, 2]].tolist(), expected)
+            self.assertTrue(numpy.isnan(stats[name][[1, 3, 4]]).all())
+
+        stats = groupedStatistics(numpy.zeros(0, dtype=int), numpy.zeros(0), 2)
+        self.assertEqual(stats['sum'].tolist(), [0, 0])
+        self.assertTrue(numpy.isnan(stats['median']).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
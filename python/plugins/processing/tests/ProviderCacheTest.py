@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    ProviderCacheTest.py
+    ---------------------
+    Date                 : April 2017
+    Copyright            : (C) 2017 by the QGIS Development Team
+    Email                : qgis-developer at lists dot osgeo dot org
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+__author__ = 'QGIS Development Team'
+__date__ = 'April 2017'
+__copyright__ = '(C) 2017, the QGIS Development Team'
+
+# This will get replaced with a git SHA1 when you do a git archive
+
+__revision__ = '$Format:%H$'
+
+import os
+import json
+import shutil
+import tempfile
+
+from qgis.testing import start_app, unittest
+
+from processing.core import providercache
+from processing.core.providercache import ProviderCache, LazyDescription
+
+start_app()
+
+
+class TemporaryProviderCache(ProviderCache):
+
+    def __init__(self, folder):
+        ProviderCache.__init__(self)
+        self.folder = folder
+
+    def cacheFile(self):
+        return os.path.join(self.folder, 'descriptions.cache')
+
+
+class LazyAlgorithm(LazyDescription):
+
+    def __init__(self):
+        self.definitions = 0
+        self.setPendingDefinition()
+
+    def defineCharacteristicsFromFile(self):
+        self.definitions += 1
+        # reading the parameters while they are defined must not define
+        # the algorithm again
+        self.parameters.append('INPUT')
+        self.outputs.append('OUTPUT')
+
+
+class ProviderCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.descriptions = os.path.join(self.folder, 'description')
+        os.mkdir(self.descriptions)
+        self.paths = []
+        for name in ['a', 'b']:
+            path = os.path.join(self.descriptions, name + '.txt')
+            with open(path, 'w') as f:
+                f.write('{}\n{} group\nParameterVector|INPUT\n'.format(name, name))
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def testStamps(self):
+        cache = TemporaryProviderCache(self.folder)
+        descriptions, read = cache.descriptions('test', self.descriptions, 2)
+        self.assertEqual(descriptions, [(self.paths[0], ['a', 'a group']),
+                                        (self.paths[1], ['b', 'b group'])])
+        self.assertEqual(read, self.paths)
+        # no temporary file is left behind
+        self.assertEqual(sorted(os.listdir(self.folder)), ['description', 'descriptions.cache'])
+
+        # unchanged files are taken from the cache, also by a new instance
+        cache = TemporaryProviderCache(self.folder)
+        descriptions, read = cache.descriptions('test', self.descriptions, 2)
+        self.assertEqual(len(descriptions), 2)
+        self.assertEqual(read, [])
+
+        # files are read again when their size changes
+        with open(self.paths[0], 'w') as f:
+            f.write('aa\naa group\n')
+        descriptions, read = cache.descriptions('test', self.descriptions, 2)
+        self.assertEqual(descriptions[0], (self.paths[0], ['aa', 'aa group']))
+        self.assertEqual(read, [self.paths[0]])
+
+        # or their modification time
+        stat = os.stat(self.paths[1])
+        os.utime(self.paths[1], (stat.st_atime, stat.st_mtime + 10))
+        descriptions, read = cache.descriptions('test', self.descriptions, 2)
+        self.assertEqual(read, [self.paths[1]])
+
+        # removed files are left out
+        os.remove(self.paths[0])
+        descriptions, read = cache.descriptions('test', self.descriptions, 2)
+        self.assertEqual(descriptions, [(self.paths[1], ['b', 'b group'])])
+        self.assertEqual(read, [])
+
+    def testSetInvalid(self):
+        cache = TemporaryProviderCache(self.folder)
+        cache.descriptions('test', self.descriptions, 2)
+        cache.setInvalid('test', self.paths[0])
+        cache.save()
+
+        # invalid files are left out until they change
+        cache = TemporaryProviderCache(self.folder)
+        descriptions, read = cache.descriptions('test', self.descriptions, 2)
+        self.assertEqual(descriptions, [(self.paths[1], ['b', 'b group'])])
+        self.assertEqual(read, [])
+
+        with open(self.paths[0], 'a') as f:
+            f.write('OutputVector|OUTPUT\n')
+        descriptions, read = cache.descriptions('test', self.descriptions, 2)
+        self.assertEqual(len(descriptions), 2)
+        self.assertEqual(read, [self.paths[0]])
+
+    def testVersion(self):
+        cache = TemporaryProviderCache(self.folder)
+        cache.descriptions('test', self.descriptions, 2)
+        with open(cache.cacheFile()) as f:
+            content = json.load(f)
+        self.assertEqual(content['version'], providercache.CACHE_VERSION)
+
+        # caches written by other versions are discarded
+        content['version'] = providercache.CACHE_VERSION + 1
+        with open(cache.cacheFile(), 'w') as f:
+            json.dump(content, f)
+        cache = TemporaryProviderCache(self.folder)
+        descriptions, read = cache.descriptions('test', self.descriptions, 2)
+        self.assertEqual(len(descriptions), 2)
+        self.assertEqual(read, self.paths)
+
+    def testSaveTemporaryFile(self):
+        cache = TemporaryProviderCache(self.folder)
+        cache.descriptions('test', self.descriptions, 2)
+        # a file with the name of the former fixed temporary file does
+        # not prevent saving, and no temporary file is left behind
+        os.mkdir(cache.cacheFile() + '.tmp')
+        cache.clear()
+        self.assertFalse(cache.modified)
+        self.assertEqual(sorted(os.listdir(self.folder)),
+                         ['description', 'descriptions.cache', 'descriptions.cache.tmp'])
+
+    def testDefineLazily(self):
+        alg = LazyAlgorithm()
+        self.assertEqual(alg.definitions, 0)
+        self.assertEqual(alg.parameters, ['INPUT'])
+        self.assertEqual(alg.outputs, ['OUTPUT'])
+        self.assertEqual(alg.definitions, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
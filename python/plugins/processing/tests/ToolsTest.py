@@ -26,15 +26,19 @@ __copyright__ = '(C) 2016, Nyall Dawson'
 __revision__ = '$Format:%H$'
 
 import os
+import gzip
 import shutil
 import tempfile
 
-from qgis.core import (QgsVectorLayer, QgsFeatureRequest)
+from osgeo import gdal
+
+from qgis.core import (QgsVectorLayer, QgsRasterLayer, QgsFeatureRequest, QgsCoordinateReferenceSystem,
+                       QgsProject, QgsGeometry, QgsRectangle, QgsProcessingFeedback)
 from qgis.testing import start_app, unittest
 
 from processing.core.ProcessingConfig import ProcessingConfig
 from processing.tests.TestData import points
-from processing.tools import vector
+from processing.tools import vector, raster, dataobjects
 
 testDataPath = os.path.join(os.path.dirname(__file__), 'testdata')
 
@@ -113,6 +117,49 @@ class VectorTest(unittest.TestCase):
 
         ProcessingConfig.setSettingValue(ProcessingConfig.FILTER_INVALID_GEOMETRIES, prevInvalidGeoms)
 
+    def testGeometryValidityCache(self):
+        ProcessingConfig.initialize()
+
+        test_data = points()
+        test_layer = QgsVectorLayer(test_data, 'test', 'ogr')
+        vector.clearValidityCache()
+
+        # ignore invalid features
+        prevInvalidGeoms = ProcessingConfig.getSetting(ProcessingConfig.FILTER_INVALID_GEOMETRIES)
+        ProcessingConfig.setSettingValue(ProcessingConfig.FILTER_INVALID_GEOMETRIES, 1)
+
+        features = vector.features(test_layer)
+        self.assertEqual(set([f.id() for f in features]), set([0, 1, 2, 3, 4, 5, 6, 7, 8]))
+
+        # results are cached, and checked again if the geometry changes
+        feature = next(test_layer.getFeatures(QgsFeatureRequest().setFilterFid(1)))
+        vector._validityCache[test_layer.source()][feature.id()] = (
+            vector._validityCache[test_layer.source()][feature.id()][0], False)
+        self.assertFalse(vector.isGeometryValid(test_layer.source(), feature))
+        vector._validityCache[test_layer.source()][feature.id()] = (0, False)
+        self.assertTrue(vector.isGeometryValid(test_layer.source(), feature))
+
+        # all the features of a source are kept, and only the last
+        # sources checked
+        prevSize = vector.VALIDITY_CACHE_SIZE
+        vector.VALIDITY_CACHE_SIZE = 1
+        vector.clearValidityCache()
+        try:
+            features = vector.features(test_layer)
+            self.assertEqual(len([f for f in features]), 9)
+            self.assertEqual(sorted(vector._validityCache[test_layer.source()].keys()), list(range(9)))
+            vector.isGeometryValid('other', feature)
+            self.assertEqual(list(vector._validityCache.keys()), ['other'])
+        finally:
+            vector.VALIDITY_CACHE_SIZE = prevSize
+
+        # geometries are not checked when they are not fetched
+        features = vector.features(test_layer, QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry))
+        self.assertEqual(len([f for f in features]), 9)
+
+        vector.clearValidityCache()
+        ProcessingConfig.setSettingValue(ProcessingConfig.FILTER_INVALID_GEOMETRIES, prevInvalidGeoms)
+
     def testValues(self):
         ProcessingConfig.initialize()
 
@@ -187,6 +234,72 @@ class VectorTest(unittest.TestCase):
         ProcessingConfig.setSettingValue(ProcessingConfig.USE_SELECTED, previous_value)
         ProcessingConfig.setSettingValue(ProcessingConfig.FILTER_INVALID_GEOMETRIES, prevInvalidGeoms)
 
+    def testLayerColumns(self):
+        ProcessingConfig.initialize()
+
+        # disable check for geometry validity
+        prevInvalidGeoms = ProcessingConfig.getSetting(ProcessingConfig.FILTER_INVALID_GEOMETRIES)
+        ProcessingConfig.setSettingValue(ProcessingConfig.FILTER_INVALID_GEOMETRIES, 0)
+
+        test_data = points()
+        test_layer = QgsVectorLayer(test_data, 'test', 'ogr')
+
+        columns = vector.layerColumns(test_layer, 'id', 2)
+        self.assertEqual(columns['id'].values.tolist(), [1, 2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertFalse(columns['id'].nulls.any())
+        self.assertEqual(columns[2].uniqueValues(), [2, 1, 0])
+
+        # columns are reused while the layer is unchanged
+        self.assertIs(vector.layerColumns(test_layer, 1)[1], columns['id'])
+
+        # cached arrays can not be modified in place
+        with self.assertRaises(ValueError):
+            columns['id'].values[0] = 10
+        with self.assertRaises(ValueError):
+            columns['id'].nulls[0] = True
+
+        # and read again when the features to use change
+        previous_value = ProcessingConfig.getSetting(ProcessingConfig.USE_SELECTED)
+        ProcessingConfig.setSettingValue(ProcessingConfig.USE_SELECTED, True)
+        test_layer.selectByIds([2, 4, 6])
+        self.assertEqual(set(vector.layerColumns(test_layer, 'id')['id'].values.tolist()), set([5, 7, 3]))
+
+        # layers are forgotten when they are deleted
+        self.assertIn(test_layer.id(), vector._connectedLayers)
+        test_layer.willBeDeleted.emit()
+        self.assertNotIn(test_layer.id(), vector._connectedLayers)
+        self.assertNotIn(test_layer.id(), vector._columnCache)
+
+        ProcessingConfig.setSettingValue(ProcessingConfig.USE_SELECTED, previous_value)
+        ProcessingConfig.setSettingValue(ProcessingConfig.FILTER_INVALID_GEOMETRIES, prevInvalidGeoms)
+
+    def testGetObjectFromUri(self):
+        test_data = points()
+        dataobjects.resetLoadedLayers()
+        self.assertIsNone(dataobjects.getObjectFromUri(test_data, False))
+
+        # layers added to the project are found by their source
+        test_layer = QgsVectorLayer(test_data, 'test', 'ogr')
+        QgsProject.instance().addMapLayer(test_layer)
+        self.assertEqual(dataobjects.getObjectFromUri(test_layer.source()), test_layer)
+
+        # and forgotten once removed
+        QgsProject.instance().removeMapLayer(test_layer.id())
+        self.assertIsNone(dataobjects.getObjectFromUri(test_data, False))
+
+        # layers opened from their source are reused
+        layer = dataobjects.getObjectFromUri(test_data)
+        self.assertTrue(layer.isValid())
+        self.assertIs(dataobjects.getObjectFromUri(test_data), layer)
+
+        # registered layers are returned until unregistered
+        memory_layer = QgsVectorLayer('Point', 'memory', 'memory')
+        dataobjects.registerLayer('memory:test', memory_layer)
+        self.assertIs(dataobjects.getObjectFromUri('memory:test'), memory_layer)
+        dataobjects.unregisterLayer('memory:test')
+        self.assertIsNone(dataobjects.getObjectFromUri('memory:test'))
+        dataobjects.resetLoadedLayers()
+
     def testOgrLayerNameExtraction(self):
         outdir = tempfile.mkdtemp()
         self.cleanup_paths.append(outdir)
@@ -226,6 +339,158 @@ class VectorTest(unittest.TestCase):
         name = vector.ogrLayerName('port=5493 sslmode=disable key=\'edge_id\' srid=0 type=LineString table="city_data"."edge" (geom) sql=')
         self.assertEqual(name, 'city_data.edge')
 
+    def testTableWriter(self):
+        outdir = tempfile.mkdtemp()
+        self.cleanup_paths.append(outdir)
+
+        # extension is added, and file is written when closing the writer
+        fileName = os.path.join(outdir, 'table')
+        with vector.TableWriter(fileName, None, ['a', 'b']) as writer:
+            writer.addRecord([1, 'x'])
+            writer.addRecords([i, str(i)] for i in range(3))
+        with open(fileName + '.csv') as f:
+            self.assertEqual(f.read().splitlines(), ['a,b', '1,x', '0,0', '1,1', '2,2'])
+
+        # compressed csv
+        fileName = os.path.join(outdir, 'table.csv.gz')
+        writer = vector.TableWriter(fileName, None, ['a'])
+        writer.addRecords([[i] for i in range(vector.TableWriter.CHUNK_SIZE + 1)])
+        writer.close()
+        with gzip.open(fileName, 'rt') as f:
+            self.assertEqual(len(f.read().splitlines()), vector.TableWriter.CHUNK_SIZE + 2)
+
+        # OGR formats
+        fileName = os.path.join(outdir, 'table.gpkg')
+        with vector.TableWriter(fileName, None, ['a', 'b']) as writer:
+            writer.addRecords([[1, 'x'], [2, 'y']])
+        layer = QgsVectorLayer(fileName, 'table', 'ogr')
+        self.assertTrue(layer.isValid())
+        self.assertEqual([f.name() for f in layer.fields()][-2:], ['a', 'b'])
+        self.assertEqual([f['b'] for f in layer.getFeatures()], ['x', 'y'])
+
+    def testVectorWriterMemoryOutput(self):
+        ProcessingConfig.initialize()
+        test_layer = QgsVectorLayer(points(), 'test', 'ogr')
+
+        # memory outputs are not buffered, so features can be read while
+        # the writer is still open
+        writer = vector.VectorWriter('memory:', None, test_layer.fields(),
+                                     test_layer.wkbType(), test_layer.crs())
+        self.assertFalse(writer.buffered)
+        for f in test_layer.getFeatures():
+            writer.addFeature(f)
+        self.assertEqual(writer.layer.featureCount(), 9)
+        writer.close()
+        self.assertEqual(writer.layer.featureCount(), 9)
+        # closing twice does nothing
+        writer.close()
+
+    def testUnionGeometries(self):
+        squares = [QgsGeometry.fromRect(QgsRectangle(x, y, x + 1, y + 1))
+                   for x in range(10) for y in range(10)]
+
+        # partitions hold every geometry once and group nearby ones
+        partitions = vector._strPartitions(squares, 10)
+        self.assertEqual(len(partitions), 10)
+        self.assertEqual(sorted(len(p) for p in partitions), [10] * 10)
+        self.assertEqual(set(id(g) for p in partitions for g in p), set(id(g) for g in squares))
+        for partition in partitions:
+            bbox = QgsRectangle(partition[0].boundingBox())
+            for geom in partition[1:]:
+                bbox.combineExtentWith(geom.boundingBox())
+            self.assertLessEqual(bbox.width() * bbox.height(), 12)
+
+        union = vector.unionGeometries(squares, partitionSize=10)
+        self.assertFalse(union.isMultipart())
+        self.assertAlmostEqual(union.area(), 100)
+        self.assertEqual(union.boundingBox(), QgsRectangle(0, 0, 10, 10))
+
+        # short lists are merged at once
+        union = vector.unionGeometries(squares[:3], partitionSize=10)
+        self.assertAlmostEqual(union.area(), 3)
+        self.assertEqual(union.boundingBox(), QgsRectangle(0, 0, 1, 3))
+
+
+class RasterTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cleanup_paths = []
+
+    @classmethod
+    def tearDownClass(cls):
+        for path in cls.cleanup_paths:
+            shutil.rmtree(path)
+
+    def testRasterWriter(self):
+        outdir = tempfile.mkdtemp()
+        self.cleanup_paths.append(outdir)
+        fileName = os.path.join(outdir, 'writer.tif')
+
+        # small cache, so that tiles get written and read back
+        writer = raster.RasterWriter(fileName, 0, 0, 600, 300, 1, 1,
+                                     QgsCoordinateReferenceSystem('EPSG:4326'),
+                                     cacheSize=2)
+        self.assertEqual(writer.getValue(10, 10), raster.RasterWriter.NODATA)
+        writer.setValue(1, 0, 0)
+        writer.setValue(2, 599, 299)
+        writer.setValue(3, 300, 10)
+        writer.setValue(4, 1000, 1000)
+        self.assertEqual(writer.getValue(0, 0), 1)
+        self.assertEqual(writer.getValue(599, 299), 2)
+        self.assertEqual(writer.getValue(1000, 1000), raster.RasterWriter.NODATA)
+        writer.close()
+
+        dataset = gdal.Open(fileName)
+        self.assertEqual(dataset.RasterXSize, 600)
+        self.assertEqual(dataset.RasterYSize, 300)
+        data = dataset.GetRasterBand(1).ReadAsArray()
+        self.assertEqual(data[0, 0], 1)
+        self.assertEqual(data[299, 599], 2)
+        self.assertEqual(data[10, 300], 3)
+        self.assertEqual(data[100, 100], raster.RasterWriter.NODATA)
+        dataset = None
+
+        # filled raster
+        writer = raster.RasterWriter(fileName, 0, 0, 10, 10, 1, 1,
+                                     QgsCoordinateReferenceSystem('EPSG:4326'))
+        writer.fill(5)
+        writer.close()
+        dataset = gdal.Open(fileName)
+        self.assertTrue((dataset.GetRasterBand(1).ReadAsArray() == 5).all())
+        dataset = None
+
+    def testScanRasterBlocksProgress(self):
+        outdir = tempfile.mkdtemp()
+        self.cleanup_paths.append(outdir)
+        fileName = os.path.join(outdir, 'blocks.tif')
+        # small blocks, so that the raster is scanned in several steps
+        writer = raster.RasterWriter(fileName, 0, 0, 10, 100, 1, 1,
+                                     QgsCoordinateReferenceSystem('EPSG:4326'),
+                                     options=['TILED=YES', 'BLOCKXSIZE=16', 'BLOCKYSIZE=16'])
+        writer.fill(1)
+        writer.close()
+        layer = QgsRasterLayer(fileName, 'blocks')
+
+        class ProgressFeedback(QgsProcessingFeedback):
+
+            def __init__(self):
+                QgsProcessingFeedback.__init__(self)
+                self.values = []
+
+            def setProgress(self, value):
+                self.values.append(value)
+
+        # the progress of the scan covers only the given range
+        feedback = ProgressFeedback()
+        cells = sum(block.count() for block in
+                    raster.scanrasterBlocks(layer, feedback, progressStart=50))
+        self.assertEqual(cells, 1000)
+        self.assertGreater(len(feedback.values), 1)
+        self.assertEqual(feedback.values[0], 50)
+        self.assertEqual(feedback.values, sorted(feedback.values))
+        self.assertLess(feedback.values[-1], 100)
+
 
 if __name__ == '__main__':
     unittest.main()
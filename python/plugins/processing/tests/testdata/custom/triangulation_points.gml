@@ -0,0 +1,55 @@
+<?xml version="1.0" encoding="utf-8" ?>
+<ogr:FeatureCollection
+     xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+     xsi:schemaLocation=""
+     xmlns:ogr="http://ogr.maptools.org/"
+     xmlns:gml="http://www.opengis.net/gml">
+  <gml:boundedBy>
+    <gml:Box>
+      <gml:coord><gml:X>0</gml:X><gml:Y>0</gml:Y></gml:coord>
+      <gml:coord><gml:X>9</gml:X><gml:Y>9</gml:Y></gml:coord>
+    </gml:Box>
+  </gml:boundedBy>
+  <gml:featureMember>
+    <ogr:triangulation_points fid="triangulation_points.0">
+      <ogr:geometryProperty><gml:Point srsName="EPSG:4326"><gml:coordinates>0,0</gml:coordinates></gml:Point></ogr:geometryProperty>
+      <ogr:id>1</ogr:id>
+    </ogr:triangulation_points>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points fid="triangulation_points.1">
+      <ogr:geometryProperty><gml:Point srsName="EPSG:4326"><gml:coordinates>6,1</gml:coordinates></gml:Point></ogr:geometryProperty>
+      <ogr:id>2</ogr:id>
+    </ogr:triangulation_points>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points fid="triangulation_points.2">
+      <ogr:geometryProperty><gml:Point srsName="EPSG:4326"><gml:coordinates>3,4</gml:coordinates></gml:Point></ogr:geometryProperty>
+      <ogr:id>3</ogr:id>
+    </ogr:triangulation_points>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points fid="triangulation_points.3">
+      <ogr:geometryProperty><gml:Point srsName="EPSG:4326"><gml:coordinates>1,7</gml:coordinates></gml:Point></ogr:geometryProperty>
+      <ogr:id>4</ogr:id>
+    </ogr:triangulation_points>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points fid="triangulation_points.4">
+      <ogr:geometryProperty><gml:Point srsName="EPSG:4326"><gml:coordinates>7,6</gml:coordinates></gml:Point></ogr:geometryProperty>
+      <ogr:id>5</ogr:id>
+    </ogr:triangulation_points>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points fid="triangulation_points.5">
+      <ogr:geometryProperty><gml:Point srsName="EPSG:4326"><gml:coordinates>4,9</gml:coordinates></gml:Point></ogr:geometryProperty>
+      <ogr:id>6</ogr:id>
+    </ogr:triangulation_points>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points fid="triangulation_points.6">
+      <ogr:geometryProperty><gml:Point srsName="EPSG:4326"><gml:coordinates>9,3</gml:coordinates></gml:Point></ogr:geometryProperty>
+      <ogr:id>7</ogr:id>
+    </ogr:triangulation_points>
+  </gml:featureMember>
+</ogr:FeatureCollection>
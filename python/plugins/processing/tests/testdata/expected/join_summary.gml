@@ -0,0 +1,90 @@
+<?xml version="1.0" encoding="utf-8" ?>
+<ogr:FeatureCollection
+     xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+     xsi:schemaLocation=""
+     xmlns:ogr="http://ogr.maptools.org/"
+     xmlns:gml="http://www.opengis.net/gml">
+  <gml:boundedBy>
+    <gml:Box>
+      <gml:coord><gml:X>-1</gml:X><gml:Y>-3</gml:Y></gml:coord>
+      <gml:coord><gml:X>10</gml:X><gml:Y>6</gml:Y></gml:coord>
+    </gml:Box>
+  </gml:boundedBy>
+  <gml:featureMember>
+    <ogr:join_summary fid="join_summary.0">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>-1,-1 -1,3 3,3 3,2 2,2 2,-1 -1,-1</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:name>aaaaa</ogr:name>
+      <ogr:intval>33</ogr:intval>
+      <ogr:floatval>44.123456</ogr:floatval>
+      <ogr:sumid>15</ogr:sumid>
+      <ogr:meanid>3.75</ogr:meanid>
+      <ogr:minid>1</ogr:minid>
+      <ogr:maxid>9</ogr:maxid>
+      <ogr:medianid>2.5</ogr:medianid>
+      <ogr:sumid2>3</ogr:sumid2>
+      <ogr:meanid2>0.75</ogr:meanid2>
+      <ogr:minid2>0</ogr:minid2>
+      <ogr:maxid2>2</ogr:maxid2>
+      <ogr:medianid2>0.5</ogr:medianid2>
+      <ogr:count>4</ogr:count>
+    </ogr:join_summary>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:join_summary fid="join_summary.1">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>5,5 6,4 4,4 5,5</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:name>Aaaaa</ogr:name>
+      <ogr:intval>-33</ogr:intval>
+      <ogr:floatval>0</ogr:floatval>
+    </ogr:join_summary>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:join_summary fid="join_summary.2">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>2,5 2,6 3,6 3,5 2,5</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:name>bbaaa</ogr:name>
+      <ogr:floatval>0.123</ogr:floatval>
+    </ogr:join_summary>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:join_summary fid="join_summary.3">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>6,1 10,1 10,-3 6,-3 6,1</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs><gml:innerBoundaryIs><gml:LinearRing><gml:coordinates>7,0 7,-2 9,-2 9,0 7,0</gml:coordinates></gml:LinearRing></gml:innerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:name>ASDF</ogr:name>
+      <ogr:intval>0</ogr:intval>
+      <ogr:sumid>8</ogr:sumid>
+      <ogr:meanid>8</ogr:meanid>
+      <ogr:minid>8</ogr:minid>
+      <ogr:maxid>8</ogr:maxid>
+      <ogr:medianid>8</ogr:medianid>
+      <ogr:sumid2>0</ogr:sumid2>
+      <ogr:meanid2>0</ogr:meanid2>
+      <ogr:minid2>0</ogr:minid2>
+      <ogr:maxid2>0</ogr:maxid2>
+      <ogr:medianid2>0</ogr:medianid2>
+      <ogr:count>1</ogr:count>
+    </ogr:join_summary>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:join_summary fid="join_summary.4">
+      <ogr:intval>120</ogr:intval>
+      <ogr:floatval>-100291.43213</ogr:floatval>
+    </ogr:join_summary>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:join_summary fid="join_summary.5">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>3,2 6,1 6,-3 2,-1 2,2 3,2</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:name>elim</ogr:name>
+      <ogr:intval>2</ogr:intval>
+      <ogr:floatval>3.33</ogr:floatval>
+      <ogr:sumid>8</ogr:sumid>
+      <ogr:meanid>4</ogr:meanid>
+      <ogr:minid>3</ogr:minid>
+      <ogr:maxid>5</ogr:maxid>
+      <ogr:medianid>4</ogr:medianid>
+      <ogr:sumid2>1</ogr:sumid2>
+      <ogr:meanid2>0.5</ogr:meanid2>
+      <ogr:minid2>0</ogr:minid2>
+      <ogr:maxid2>1</ogr:maxid2>
+      <ogr:medianid2>0.5</ogr:medianid2>
+      <ogr:count>2</ogr:count>
+    </ogr:join_summary>
+  </gml:featureMember>
+</ogr:FeatureCollection>
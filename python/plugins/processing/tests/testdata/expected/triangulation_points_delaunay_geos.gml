@@ -0,0 +1,61 @@
+<?xml version="1.0" encoding="utf-8" ?>
+<ogr:FeatureCollection
+     xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+     xsi:schemaLocation=""
+     xmlns:ogr="http://ogr.maptools.org/"
+     xmlns:gml="http://www.opengis.net/gml">
+  <gml:boundedBy>
+    <gml:Box>
+      <gml:coord><gml:X>0</gml:X><gml:Y>0</gml:Y></gml:coord>
+      <gml:coord><gml:X>9</gml:X><gml:Y>9</gml:Y></gml:coord>
+    </gml:Box>
+  </gml:boundedBy>
+  <gml:featureMember>
+    <ogr:triangulation_points_delaunay_geos fid="triangulation_points_delaunay_geos.0">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>0,0 6,1 3,4 0,0</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:POINTA>0.000000000000000</ogr:POINTA>
+      <ogr:POINTB>1.000000000000000</ogr:POINTB>
+      <ogr:POINTC>2.000000000000000</ogr:POINTC>
+    </ogr:triangulation_points_delaunay_geos>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points_delaunay_geos fid="triangulation_points_delaunay_geos.1">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>0,0 3,4 1,7 0,0</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:POINTA>0.000000000000000</ogr:POINTA>
+      <ogr:POINTB>2.000000000000000</ogr:POINTB>
+      <ogr:POINTC>3.000000000000000</ogr:POINTC>
+    </ogr:triangulation_points_delaunay_geos>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points_delaunay_geos fid="triangulation_points_delaunay_geos.2">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>6,1 7,6 3,4 6,1</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:POINTA>1.000000000000000</ogr:POINTA>
+      <ogr:POINTB>4.000000000000000</ogr:POINTB>
+      <ogr:POINTC>2.000000000000000</ogr:POINTC>
+    </ogr:triangulation_points_delaunay_geos>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points_delaunay_geos fid="triangulation_points_delaunay_geos.3">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>6,1 9,3 7,6 6,1</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:POINTA>1.000000000000000</ogr:POINTA>
+      <ogr:POINTB>6.000000000000000</ogr:POINTB>
+      <ogr:POINTC>4.000000000000000</ogr:POINTC>
+    </ogr:triangulation_points_delaunay_geos>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points_delaunay_geos fid="triangulation_points_delaunay_geos.4">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>3,4 7,6 4,9 3,4</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:POINTA>2.000000000000000</ogr:POINTA>
+      <ogr:POINTB>4.000000000000000</ogr:POINTB>
+      <ogr:POINTC>5.000000000000000</ogr:POINTC>
+    </ogr:triangulation_points_delaunay_geos>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points_delaunay_geos fid="triangulation_points_delaunay_geos.5">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>3,4 4,9 1,7 3,4</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:POINTA>2.000000000000000</ogr:POINTA>
+      <ogr:POINTB>5.000000000000000</ogr:POINTB>
+      <ogr:POINTC>3.000000000000000</ogr:POINTC>
+    </ogr:triangulation_points_delaunay_geos>
+  </gml:featureMember>
+</ogr:FeatureCollection>
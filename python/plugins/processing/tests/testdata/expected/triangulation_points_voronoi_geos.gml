@@ -0,0 +1,55 @@
+<?xml version="1.0" encoding="utf-8" ?>
+<ogr:FeatureCollection
+     xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+     xsi:schemaLocation=""
+     xmlns:ogr="http://ogr.maptools.org/"
+     xmlns:gml="http://www.opengis.net/gml">
+  <gml:boundedBy>
+    <gml:Box>
+      <gml:coord><gml:X>0</gml:X><gml:Y>0</gml:Y></gml:coord>
+      <gml:coord><gml:X>9</gml:X><gml:Y>9</gml:Y></gml:coord>
+    </gml:Box>
+  </gml:boundedBy>
+  <gml:featureMember>
+    <ogr:triangulation_points_voronoi_geos fid="triangulation_points_voronoi_geos.0">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>0,0 0,3.125 2.9285714285714284,0.9285714285714286 3.0833333333333335,0 0,0</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:id>1</ogr:id>
+    </ogr:triangulation_points_voronoi_geos>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points_voronoi_geos fid="triangulation_points_voronoi_geos.1">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>3.0833333333333335,0 2.9285714285714284,0.9285714285714286 5.666666666666667,3.6666666666666665 6.5,3.5 8.833333333333334,0 3.0833333333333335,0</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:id>2</ogr:id>
+    </ogr:triangulation_points_voronoi_geos>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points_voronoi_geos fid="triangulation_points_voronoi_geos.2">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>2.9285714285714284,0.9285714285714286 0,3.125 0,4.166666666666667 3.5,6.5 4.333333333333333,6.333333333333333 5.666666666666667,3.6666666666666665 2.9285714285714284,0.9285714285714286</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:id>3</ogr:id>
+    </ogr:triangulation_points_voronoi_geos>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points_voronoi_geos fid="triangulation_points_voronoi_geos.3">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>0,4.166666666666667 0,9 1.8333333333333333,9 3.5,6.5 0,4.166666666666667</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:id>4</ogr:id>
+    </ogr:triangulation_points_voronoi_geos>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points_voronoi_geos fid="triangulation_points_voronoi_geos.4">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>6.5,3.5 5.666666666666667,3.6666666666666665 4.333333333333333,6.333333333333333 7,9 9,9 9,5.166666666666667 6.5,3.5</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:id>5</ogr:id>
+    </ogr:triangulation_points_voronoi_geos>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points_voronoi_geos fid="triangulation_points_voronoi_geos.5">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>4.333333333333333,6.333333333333333 3.5,6.5 1.8333333333333333,9 7,9 4.333333333333333,6.333333333333333</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:id>6</ogr:id>
+    </ogr:triangulation_points_voronoi_geos>
+  </gml:featureMember>
+  <gml:featureMember>
+    <ogr:triangulation_points_voronoi_geos fid="triangulation_points_voronoi_geos.6">
+      <ogr:geometryProperty><gml:Polygon srsName="EPSG:4326"><gml:outerBoundaryIs><gml:LinearRing><gml:coordinates>8.833333333333334,0 6.5,3.5 9,5.166666666666667 9,0 8.833333333333334,0</gml:coordinates></gml:LinearRing></gml:outerBoundaryIs></gml:Polygon></ogr:geometryProperty>
+      <ogr:id>7</ogr:id>
+    </ogr:triangulation_points_voronoi_geos>
+  </gml:featureMember>
+</ogr:FeatureCollection>
@@ -29,6 +29,8 @@ __revision__ = '$Format:%H$'
 
 import os
 import re
+import threading
+from collections import OrderedDict
 
 from qgis.core import (QgsVectorFileWriter,
                        QgsMapLayer,
@@ -57,12 +59,44 @@ TYPE_RASTER = 3
 TYPE_FILE = 4
 TYPE_TABLE = 5
 
-_loadedLayers = {}
+# maximum number of layers opened by getObjectFromUri that are kept
+# around, in case they are needed again
+LOADED_LAYERS_CACHE_SIZE = 32
+
+# layers opened from their source by getObjectFromUri, least recently
+# used first
+_loadedLayers = OrderedDict()
+
+# layers made available by algorithms, which stay until unregistered
+_registeredLayers = {}
+
+# layers of the project by normalized source, and the source of each
+# layer by id. Built the first time it is needed, and then kept in sync
+# with the project
+_projectLayers = None
+_projectSources = {}
+_projectSignalsConnected = False
+_layersLock = threading.RLock()
 
 
 def resetLoadedLayers():
-    global _loadedLayers
-    _loadedLayers = {}
+    with _layersLock:
+        _loadedLayers.clear()
+        _registeredLayers.clear()
+
+
+def registerLayer(uri, layer):
+    """Makes a layer which is not loaded in the project, such as a
+    memory layer created by an algorithm, available through
+    getObjectFromUri.
+    """
+    with _layersLock:
+        _registeredLayers[uri] = layer
+
+
+def unregisterLayer(uri):
+    with _layersLock:
+        _registeredLayers.pop(uri, None)
 
 
 def getSupportedOutputVectorLayerExtensions():
@@ -245,6 +279,92 @@ def normalizeLayerSource(source):
     return source
 
 
+def _canUseLayer(layer):
+    return (layer.type() == QgsMapLayer.VectorLayer or
+            (layer.type() == QgsMapLayer.RasterLayer and canUseRasterLayer(layer)))
+
+
+def _indexLayer(layer):
+    if not _canUseLayer(layer):
+        return
+    source = normalizeLayerSource(layer.source())
+    _projectSources[layer.id()] = source
+    _projectLayers.setdefault(source, []).append(layer)
+
+
+def _unindexLayer(layerId):
+    source = _projectSources.pop(layerId, None)
+    if source is None:
+        return
+    layers = [layer for layer in _projectLayers.get(source, []) if layer.id() != layerId]
+    if layers:
+        _projectLayers[source] = layers
+    else:
+        _projectLayers.pop(source, None)
+
+
+def _layersAdded(layers):
+    with _layersLock:
+        if _projectLayers is not None:
+            for layer in layers:
+                _indexLayer(layer)
+
+
+def _layersWillBeRemoved(layerIds):
+    with _layersLock:
+        if _projectLayers is not None:
+            for layerId in layerIds:
+                _unindexLayer(layerId)
+
+
+def _buildProjectIndex():
+    global _projectLayers
+    _projectLayers = {}
+    _projectSources.clear()
+    for layer in QgsProject.instance().mapLayers().values():
+        _indexLayer(layer)
+
+
+def resetProjectLayersIndex():
+    """Discards the index of the project layers by source, which is
+    built again the next time it is needed.
+    """
+    global _projectLayers
+    with _layersLock:
+        _projectLayers = None
+        _projectSources.clear()
+
+
+def _projectLayerFromSource(source):
+    global _projectSignalsConnected
+    with _layersLock:
+        if not _projectSignalsConnected:
+            QgsProject.instance().layersAdded.connect(_layersAdded)
+            QgsProject.instance().layersWillBeRemoved.connect(_layersWillBeRemoved)
+            _projectSignalsConnected = True
+        if _projectLayers is None:
+            _buildProjectIndex()
+        layers = _projectLayers.get(source)
+        if layers and any(normalizeLayerSource(layer.source()) != source for layer in layers):
+            # the source of a layer has changed since it was indexed
+            _buildProjectIndex()
+            layers = _projectLayers.get(source)
+    if not layers:
+        return None
+    # rasters are preferred, and then layers are taken by name, as in
+    # the lists of layers offered by the parameters
+    return sorted(layers, key=lambda layer: (layer.type() != QgsMapLayer.RasterLayer,
+                                             layer.name().lower()))[0]
+
+
+def _cacheLoadedLayer(source, layer):
+    with _layersLock:
+        _loadedLayers[source] = layer
+        _loadedLayers.move_to_end(source)
+        while len(_loadedLayers) > LOADED_LAYERS_CACHE_SIZE:
+            _loadedLayers.popitem(last=False)
+
+
 def getObjectFromUri(uri, forceLoad=True):
     """Returns an object (layer/table) given a source definition.
 
@@ -254,20 +374,16 @@ def getObjectFromUri(uri, forceLoad=True):
 
     if uri is None:
         return None
-    if uri in _loadedLayers:
-        return _loadedLayers[uri]
-    layers = getRasterLayers()
-    for layer in layers:
-        if normalizeLayerSource(layer.source()) == normalizeLayerSource(uri):
-            return layer
-    layers = getVectorLayers()
-    for layer in layers:
-        if normalizeLayerSource(layer.source()) == normalizeLayerSource(uri):
-            return layer
-    tables = getTables()
-    for table in tables:
-        if normalizeLayerSource(table.source()) == normalizeLayerSource(uri):
-            return table
+    source = normalizeLayerSource(uri)
+    with _layersLock:
+        if uri in _registeredLayers:
+            return _registeredLayers[uri]
+        if source in _loadedLayers:
+            _loadedLayers.move_to_end(source)
+            return _loadedLayers[source]
+    layer = _projectLayerFromSource(source)
+    if layer is not None:
+        return layer
     if forceLoad and os.path.exists(uri):
         settings = QgsSettings()
         prjSetting = settings.value('/Projections/defaultBehavior')
@@ -280,13 +396,13 @@ def getObjectFromUri(uri, forceLoad=True):
             if layer.isValid():
                 if prjSetting:
                     settings.setValue('/Projections/defaultBehavior', prjSetting)
-                _loadedLayers[normalizeLayerSource(layer.source())] = layer
+                _cacheLoadedLayer(source, layer)
                 return layer
         layer = QgsRasterLayer(uri, name)
         if layer.isValid():
             if prjSetting:
                 settings.setValue('/Projections/defaultBehavior', prjSetting)
-            _loadedLayers[normalizeLayerSource(layer.source())] = layer
+            _cacheLoadedLayer(source, layer)
             return layer
         if prjSetting:
             settings.setValue('/Projections/defaultBehavior', prjSetting)
@@ -34,6 +34,7 @@ import psycopg2
 import psycopg2.extensions  # For isolation levels
 import re
 import os
+import io
 
 from qgis.core import QgsDataSourceUri, QgsCredentials, QgsSettings
 
@@ -824,6 +825,36 @@ class GeoDB(object):
         else:
             self._exec_sql_and_commit(sql)
 
+    def copy_rows(self, table, columns, rows, schema=None):
+        """Bulk load rows into a table using COPY, which is much faster
+        than running an INSERT for each row.
+
+        Values are sent in text format, so they must be None (for NULL)
+        or have a string representation accepted by the column type.
+        """
+
+        t = self._table_name(schema, table)
+        data = io.StringIO()
+        for row in rows:
+            data.write(u'\t'.join(self._copy_value(v) for v in row))
+            data.write(u'\n')
+        data.seek(0)
+        try:
+            c = self.con.cursor()
+            c.copy_expert('COPY %s (%s) FROM STDIN' % (t, ', '.join(columns)), data)
+            self.con.commit()
+        except psycopg2.Error as e:
+            self.con.rollback()
+            raise DbError(str(e))
+
+    def _copy_value(self, value):
+        """Escape a value for the text format of COPY."""
+
+        if value is None:
+            return u'\\N'
+        return str(value).replace(u'\\', u'\\\\').replace(u'\t', u'\\t') \
+            .replace(u'\n', u'\\n').replace(u'\r', u'\\r')
+
     def _exec_sql(self, cursor, sql):
         try:
             cursor.execute(sql)
@@ -31,6 +31,7 @@ from builtins import object
 
 import os
 import struct
+from collections import OrderedDict
 
 import numpy
 from osgeo import gdal
@@ -40,6 +41,9 @@ from processing.core.GeoAlgorithmExecutionException import GeoAlgorithmExecution
 
 RASTER_EXTENSION_MAP = None
 
+# Approximate number of cells read at once when a band is not tiled
+BLOCK_CELLS = 1048576
+
 
 def initGdalData():
     global RASTER_EXTENSION_MAP
@@ -103,6 +107,47 @@ def scanraster(layer, feedback):
             yield value
 
 
+def scanrasterBlocks(layer, feedback, bandNumber=1, progressStart=0, progressEnd=100):
+    """Iterates over a raster band block by block, following the natural
+    GDAL block size of the band, and yields the blocks as masked NumPy
+    arrays where no-data cells are masked.
+
+    Bands stored in scanlines are read several rows at a time, so that
+    each block holds roughly BLOCK_CELLS cells.
+
+    Progress goes from progressStart to progressEnd, so algorithms
+    scanning a band several times can report each pass as a part of it.
+    """
+    filename = str(layer.source())
+    dataset = gdal.Open(filename, gdal.GA_ReadOnly)
+    band = dataset.GetRasterBand(bandNumber)
+    nodata = band.GetNoDataValue()
+
+    blockXSize, blockYSize = band.GetBlockSize()
+    if blockXSize >= band.XSize:
+        blockXSize = band.XSize
+        rows = max(1, BLOCK_CELLS // max(1, band.XSize))
+        blockYSize = max(blockYSize, rows - rows % blockYSize)
+
+    for yOff in range(0, band.YSize, blockYSize):
+        feedback.setProgress(progressStart + yOff / float(band.YSize) * (progressEnd - progressStart))
+        ySize = min(blockYSize, band.YSize - yOff)
+        for xOff in range(0, band.XSize, blockXSize):
+            xSize = min(blockXSize, band.XSize - xOff)
+            data = band.ReadAsArray(xOff, yOff, xSize, ySize)
+            if data is None:
+                raise GeoAlgorithmExecutionException('Could not read raster block')
+            if nodata is None:
+                mask = numpy.zeros(data.shape, dtype=bool)
+            elif numpy.isnan(nodata):
+                mask = numpy.isnan(data)
+            else:
+                mask = data == nodata
+            yield numpy.ma.MaskedArray(data, mask=mask)
+
+    dataset = None
+
+
 def mapToPixel(mX, mY, geoTransform):
     (pX, pY) = gdal.ApplyGeoTransform(
         gdal.InvGeoTransform(geoTransform), mX, mY)
@@ -114,45 +159,123 @@ def pixelToMap(pX, pY, geoTransform):
 
 
 class RasterWriter(object):
+    """Writes a single band Float32 GeoTIFF cell by cell.
+
+    Cells are stored in tiles following the block size of the created
+    dataset. Only the most recently used tiles are kept in memory; when
+    the cache is full the least recently used tile is written to disk,
+    so memory usage does not depend on the size of the output raster.
+    """
 
     NODATA = -99999.0
 
+    CREATION_OPTIONS = ['TILED=YES', 'BLOCKXSIZE=256', 'BLOCKYSIZE=256',
+                        'COMPRESS=LZW', 'BIGTIFF=IF_SAFER']
+
     def __init__(self, fileName, minx, miny, maxx, maxy, cellsize,
-                 nbands, crs, geotransform=None):
+                 nbands, crs, geotransform=None, options=None, cacheSize=64):
         self.fileName = fileName
         self.nx = int((maxx - minx) / float(cellsize))
         self.ny = int((maxy - miny) / float(cellsize))
         self.nbands = nbands
-        self.matrix = numpy.empty(shape=(self.ny, self.nx), dtype=numpy.float32)
-        self.matrix.fill(self.NODATA)
         self.cellsize = cellsize
         self.crs = crs
         self.minx = minx
         self.maxy = maxy
         self.geotransform = geotransform
+        self.cacheSize = max(1, cacheSize)
+        self.background = self.NODATA
+
+        if options is None:
+            options = self.CREATION_OPTIONS
+
+        driver = gdal.GetDriverByName('GTiff')
+        self.dataset = driver.Create(self.fileName, self.nx, self.ny, 1,
+                                     gdal.GDT_Float32, options)
+        if self.dataset is None:
+            raise GeoAlgorithmExecutionException(
+                'Could not create raster file {0}'.format(self.fileName))
+        self.dataset.SetProjection(str(self.crs.toWkt()))
+        if self.geotransform is None:
+            self.dataset.SetGeoTransform([self.minx, self.cellsize, 0,
+                                          self.maxy, self.cellsize, 0])
+        else:
+            self.dataset.SetGeoTransform(self.geotransform)
+        self.band = self.dataset.GetRasterBand(1)
+        self.tileXSize, self.tileYSize = self.band.GetBlockSize()
+
+        # (tileX, tileY) -> [array, dirty], in least recently used order
+        self.tiles = OrderedDict()
+        # tiles which have already been written to the dataset
+        self.written = set()
 
     def setValue(self, value, x, y, band=0):
-        try:
-            self.matrix[y, x] = value
-        except IndexError:
-            pass
+        if not (0 <= x < self.nx and 0 <= y < self.ny):
+            return
+        tile = self._tile(x // self.tileXSize, y // self.tileYSize)
+        tile[0][y % self.tileYSize, x % self.tileXSize] = value
+        tile[1] = True
 
     def getValue(self, x, y, band=0):
-        try:
-            return self.matrix[y, x]
-        except IndexError:
+        if not (0 <= x < self.nx and 0 <= y < self.ny):
             return self.NODATA
+        tile = self._tile(x // self.tileXSize, y // self.tileYSize)
+        return tile[0][y % self.tileYSize, x % self.tileXSize]
+
+    def fill(self, value):
+        """Sets all cells of the raster to the given value.
+        """
+        self.background = value
+        self.tiles.clear()
+        self.written.clear()
 
     def close(self):
-        fmt = 'GTiff'
-        driver = gdal.GetDriverByName(fmt)
-        dst_ds = driver.Create(self.fileName, self.nx, self.ny, 1,
-                               gdal.GDT_Float32)
-        dst_ds.SetProjection(str(self.crs.toWkt()))
-        if self.geotransform is None:
-            dst_ds.SetGeoTransform([self.minx, self.cellsize, 0,
-                                    self.maxy, self.cellsize, 0])
-        else:
-            dst_ds.SetGeoTransform(self.geotransform)
-        dst_ds.GetRasterBand(1).WriteArray(self.matrix)
-        dst_ds = None
+        for key in list(self.tiles.keys()):
+            self._flush(key)
+
+        # Tiles which were never touched still need to be initialized
+        tilesX = (self.nx + self.tileXSize - 1) // self.tileXSize
+        tilesY = (self.ny + self.tileYSize - 1) // self.tileYSize
+        for tileY in range(tilesY):
+            for tileX in range(tilesX):
+                if (tileX, tileY) not in self.written:
+                    self._write(tileX, tileY, self._newTile(tileX, tileY))
+
+        self.band = None
+        self.dataset.FlushCache()
+        self.dataset = None
+
+    def _tileShape(self, tileX, tileY):
+        return (min(self.tileYSize, self.ny - tileY * self.tileYSize),
+                min(self.tileXSize, self.nx - tileX * self.tileXSize))
+
+    def _newTile(self, tileX, tileY):
+        array = numpy.empty(shape=self._tileShape(tileX, tileY), dtype=numpy.float32)
+        array.fill(self.background)
+        return array
+
+    def _tile(self, tileX, tileY):
+        key = (tileX, tileY)
+        tile = self.tiles.pop(key, None)
+        if tile is None:
+            if key in self.written:
+                rows, cols = self._tileShape(tileX, tileY)
+                array = self.band.ReadAsArray(tileX * self.tileXSize,
+                                              tileY * self.tileYSize,
+                                              cols, rows)
+            else:
+                array = self._newTile(tileX, tileY)
+            tile = [array, False]
+            while len(self.tiles) >= self.cacheSize:
+                self._flush(next(iter(self.tiles)))
+        self.tiles[key] = tile
+        return tile
+
+    def _flush(self, key):
+        array, dirty = self.tiles.pop(key)
+        if dirty or key not in self.written:
+            self._write(key[0], key[1], array)
+
+    def _write(self, tileX, tileY, array):
+        self.band.WriteArray(array, tileX * self.tileXSize, tileY * self.tileYSize)
+        self.written.add((tileX, tileY))
@@ -34,17 +34,24 @@ __revision__ = '$Format:%H$'
 
 import re
 import os
+import math
 import csv
+import gzip
+import itertools
+import threading
 import uuid
+import zlib
+from collections import OrderedDict
 
+import numpy
 import psycopg2
 from osgeo import ogr
 
-from qgis.PyQt.QtCore import QVariant, QCoreApplication
-from qgis.core import (QgsFields, QgsField, QgsGeometry, QgsRectangle, QgsWkbTypes,
+from qgis.PyQt.QtCore import Qt, QVariant, QCoreApplication, QDate, QDateTime, QTime
+from qgis.core import (QgsFeature, QgsFields, QgsField, QgsGeometry, QgsRectangle, QgsWkbTypes,
                        QgsSpatialIndex, QgsProject, QgsMapLayer, QgsVectorLayer,
                        QgsVectorFileWriter, QgsDistanceArea, QgsDataSourceUri, QgsCredentials,
-                       QgsFeatureRequest, QgsSettings)
+                       QgsFeatureRequest, QgsSettings, NULL)
 
 from processing.core.ProcessingConfig import ProcessingConfig
 from processing.core.ProcessingLog import ProcessingLog
@@ -52,6 +59,15 @@ from processing.core.GeoAlgorithmExecutionException import GeoAlgorithmExecution
 from processing.tools import dataobjects, spatialite, postgis
 
 
+# maximum number of geometries merged at once by unionGeometries
+UNION_PARTITION_SIZE = 1000
+
+# maximum number of layers whose columns are kept by layerColumns
+COLUMN_CACHE_SIZE = 8
+
+# maximum number of layer sources whose geometry validity is cached
+VALIDITY_CACHE_SIZE = 16
+
 TYPE_MAP = {
     str: QVariant.String,
     float: QVariant.Double,
@@ -83,12 +99,15 @@ TYPE_MAP_SPATIALITE_LAYER = {
 }
 
 
-def features(layer, request=QgsFeatureRequest()):
+def features(layer, request=QgsFeatureRequest(), checkValidity=True):
     """This returns an iterator over features in a vector layer,
     considering the selection that might exist in the layer, and the
     configuration that indicates whether to use only selected feature
     or all of them.
 
+    Features with invalid geometries are handled according to the
+    invalid features filtering setting, unless checkValidity is False.
+
     This should be used by algorithms instead of calling the Qgis API
     directly, to ensure a consistent behavior across algorithms.
     """
@@ -108,24 +127,39 @@ def features(layer, request=QgsFeatureRequest()):
 
             invalidFeaturesMethod = ProcessingConfig.getSetting(ProcessingConfig.FILTER_INVALID_GEOMETRIES)
 
-            def filterFeature(f, ignoreInvalid):
-                geom = f.geometry()
-                if geom is None:
-                    ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
-                                           self.tr('Feature with NULL geometry found.'))
-                elif not geom.isGeosValid():
-                    ProcessingLog.addToLog(ProcessingLog.LOG_ERROR,
-                                           self.tr('GEOS geoprocessing error: One or more input features have invalid geometry.'))
-                    if ignoreInvalid:
-                        return False
-                    else:
-                        raise GeoAlgorithmExecutionException(self.tr('Features with invalid geometries found. Please fix these geometries or specify the "Ignore invalid input features" flag'))
-                return True
+            # geometries can not be checked if they are not fetched
+            if not checkValidity or request.flags() & QgsFeatureRequest.NoGeometry:
+                invalidFeaturesMethod = self.DO_NOT_CHECK
 
             if invalidFeaturesMethod == self.IGNORE:
-                self.iter = filter(lambda x: filterFeature(x, True), self.iter)
+                self.iter = self.validFeatures(self.iter, True)
             elif invalidFeaturesMethod == self.RAISE_EXCEPTION:
-                self.iter = filter(lambda x: filterFeature(x, False), self.iter)
+                self.iter = self.validFeatures(self.iter, False)
+
+        def validFeatures(self, iterator, ignoreInvalid):
+            """Yields the features with valid geometries, and logs the
+            number of invalid ones once the iteration is finished.
+            """
+            source = self.layer.source()
+            nullCount = 0
+            invalidCount = 0
+            try:
+                for f in iterator:
+                    if f.geometry() is None:
+                        nullCount += 1
+                    elif not isGeometryValid(source, f):
+                        invalidCount += 1
+                        if ignoreInvalid:
+                            continue
+                        raise GeoAlgorithmExecutionException(self.tr('Features with invalid geometries found. Please fix these geometries or specify the "Ignore invalid input features" flag'))
+                    yield f
+            finally:
+                if nullCount > 0:
+                    ProcessingLog.addToLog(ProcessingLog.LOG_INFO,
+                                           self.tr('{0} features with NULL geometry found.').format(nullCount))
+                if invalidCount > 0:
+                    ProcessingLog.addToLog(ProcessingLog.LOG_ERROR,
+                                           self.tr('GEOS geoprocessing error: {0} input features have invalid geometry.').format(invalidCount))
 
         def __iter__(self):
             return self.iter
@@ -142,6 +176,51 @@ def features(layer, request=QgsFeatureRequest()):
     return Features(layer, request)
 
 
+_validityCache = OrderedDict()
+_validityCacheLock = threading.Lock()
+
+
+def isGeometryValid(source, feature):
+    """Returns True if the geometry of a feature of the layer with the
+    given source is valid according to GEOS.
+
+    Results are cached by layer source and feature id, along with a
+    checksum of the geometry, so a geometry is only checked again if it
+    changes. Results for all the features of the last VALIDITY_CACHE_SIZE
+    sources are kept, so every feature of a layer is found in the cache
+    when it is read again.
+    """
+    geom = feature.geometry()
+    checksum = zlib.crc32(bytes(geom.exportToWkb()))
+    with _validityCacheLock:
+        results = _validityCache.get(source)
+        if results is not None:
+            _validityCache.move_to_end(source)
+            cached = results.get(feature.id())
+            if cached is not None and cached[0] == checksum:
+                return cached[1]
+
+    valid = geom.isGeosValid()
+    with _validityCacheLock:
+        results = _validityCache.setdefault(source, {})
+        _validityCache.move_to_end(source)
+        results[feature.id()] = (checksum, valid)
+        while len(_validityCache) > VALIDITY_CACHE_SIZE:
+            _validityCache.popitem(last=False)
+    return valid
+
+
+def clearValidityCache(source=None):
+    """Removes the cached validity of the geometries of a layer source,
+    or of all the sources if none is passed.
+    """
+    with _validityCacheLock:
+        if source is None:
+            _validityCache.clear()
+        else:
+            _validityCache.pop(source, None)
+
+
 def uniqueValues(layer, attribute):
     """Returns a list of unique values for a given attribute.
 
@@ -153,14 +232,8 @@ def uniqueValues(layer, attribute):
     if ProcessingConfig.getSetting(ProcessingConfig.USE_SELECTED) \
             and layer.selectedFeatureCount() > 0:
 
-        # iterate through selected features
-        values = []
-        request = QgsFeatureRequest().setSubsetOfAttributes([fieldIndex]).setFlags(QgsFeatureRequest.NoGeometry)
-        feats = features(layer, request)
-        for feat in feats:
-            if feat.attributes()[fieldIndex] not in values:
-                values.append(feat.attributes()[fieldIndex])
-        return values
+        # values of the selected features
+        return layerColumns(layer, fieldIndex)[fieldIndex].uniqueValues()
     else:
         # no selection, or not considering selecting
         # so we can take advantage of provider side unique value optimisations
@@ -199,31 +272,186 @@ def values(layer, *attributes):
     to a number.
     """
     ret = {}
-    indices = []
-    attr_keys = {}
-    for attr in attributes:
-        index = resolveFieldIndex(layer, attr)
-        indices.append(index)
-        attr_keys[index] = attr
-
-    # use an optimised feature request
-    request = QgsFeatureRequest().setSubsetOfAttributes(indices).setFlags(QgsFeatureRequest.NoGeometry)
+    for attr, column in list(layerColumns(layer, *attributes).items()):
+        ret[attr] = [_toFloat(v) for v in column.toList()]
+    return ret
 
+
+def _toFloat(value):
+    # convert attribute value to number
+    try:
+        return float(value)
+    except:
+        return None
+
+
+class Column(object):
+    """The values of a field of a layer, as a NumPy array, along with a
+    boolean array which is True for NULL values.
+
+    Integer fields are stored as int64 arrays and other numeric fields
+    as float64 arrays, with 0 and NaN in place of NULL values. Values of
+    other fields are kept as they are, in arrays of objects.
+    """
+
+    INTEGER_TYPES = (QVariant.Int, QVariant.UInt, QVariant.LongLong, QVariant.ULongLong)
+
+    def __init__(self, field, values):
+        self.nulls = numpy.array([v is None or v == NULL for v in values], dtype=bool)
+        if field.type() in self.INTEGER_TYPES:
+            self.values = numpy.array([0 if n else v for (v, n) in zip(values, self.nulls)],
+                                      dtype=numpy.int64)
+        elif field.isNumeric():
+            self.values = numpy.array([numpy.nan if n else v for (v, n) in zip(values, self.nulls)],
+                                      dtype=float)
+        else:
+            self.values = numpy.empty(len(values), dtype=object)
+            self.values[:] = values
+
+        # columns are shared through the cache of layerColumns, so they
+        # can not be modified in place
+        self.values.flags.writeable = False
+        self.nulls.flags.writeable = False
+
+    def __len__(self):
+        return len(self.values)
+
+    def validValues(self):
+        """Returns an array with the values which are not NULL.
+        """
+        return self.values[~self.nulls]
+
+    def toList(self):
+        """Returns the values as a list, with NULL for NULL values.
+        """
+        if self.values.dtype == object:
+            return list(self.values)
+        return [NULL if n else v for (v, n) in zip(self.values.tolist(), self.nulls.tolist())]
+
+    def uniqueValues(self):
+        """Returns a list of the distinct values, including NULL if there
+        is any NULL value, in the order they are first found.
+        """
+        if self.values.dtype == object:
+            unique = []
+            seen = set()
+            for v in self.values:
+                try:
+                    if v in seen:
+                        continue
+                    seen.add(v)
+                except TypeError:
+                    # unhashable values, such as NULL
+                    if v in unique:
+                        continue
+                unique.append(v)
+            return unique
+
+        valid = numpy.flatnonzero(~self.nulls)
+        unique, first = numpy.unique(self.values[valid], return_index=True)
+        unique = unique.tolist()
+        positions = valid[first].tolist()
+        if self.nulls.any():
+            unique.append(NULL)
+            positions.append(int(numpy.argmax(self.nulls)))
+        return [unique[i] for i in numpy.argsort(positions, kind='mergesort')]
+
+
+_columnCache = OrderedDict()
+_columnCacheLock = threading.RLock()
+_connectedLayers = set()
+
+
+def layerColumns(layer, *attributes):
+    """Returns the values of the passed fields of a vector layer as
+    Column objects.
+
+    Field can be passed as field names or as zero-based field indices.
+    Returns a dict with the passed field identifiers as keys. It
+    considers the existing selection.
+
+    Columns are cached, and reused as long as the layer, its source and
+    the features to use are unchanged, so only the fields which are not
+    in the cache are read from the layer. Columns of the last
+    COLUMN_CACHE_SIZE layers used are kept. Their arrays are read-only,
+    and must be copied before being modified.
+    """
+    indices = [resolveFieldIndex(layer, attr) for attr in attributes]
+    version = _layerVersion(layer)
+    with _columnCacheLock:
+        _connectLayer(layer)
+        entry = _columnCache.pop(layer.id(), None)
+        if entry is None or entry[0] != version:
+            entry = (version, {})
+        _columnCache[layer.id()] = entry
+        while len(_columnCache) > COLUMN_CACHE_SIZE:
+            _columnCache.popitem(last=False)
+
+        columns = entry[1]
+        missing = sorted(set(i for i in indices if i not in columns))
+        if missing:
+            columns.update(_readColumns(layer, missing))
+        return dict((attr, columns[i]) for (attr, i) in zip(attributes, indices))
+
+
+def clearColumnCache(layerId=None):
+    """Removes the cached columns of a layer, or of all the layers if no
+    layer id is passed.
+    """
+    with _columnCacheLock:
+        if layerId is None:
+            _columnCache.clear()
+        else:
+            _columnCache.pop(layerId, None)
+
+
+def _readColumns(layer, indices):
+    request = QgsFeatureRequest().setSubsetOfAttributes(indices).setFlags(QgsFeatureRequest.NoGeometry)
+    values = dict((i, []) for i in indices)
     for feature in features(layer, request):
+        attrs = feature.attributes()
         for i in indices:
+            values[i].append(attrs[i])
+    fields = layer.fields()
+    return dict((i, Column(fields.at(i), values[i])) for i in indices)
 
-            # convert attribute value to number
-            try:
-                v = float(feature.attributes()[i])
-            except:
-                v = None
 
-            k = attr_keys[i]
-            if k in ret:
-                ret[k].append(v)
-            else:
-                ret[k] = [v]
-    return ret
+def _layerVersion(layer):
+    """Returns a tuple which changes when the features of a layer that
+    would be returned by features() might have changed.
+    """
+    selection = None
+    if ProcessingConfig.getSetting(ProcessingConfig.USE_SELECTED) \
+            and layer.selectedFeatureCount() > 0:
+        selection = tuple(sorted(layer.selectedFeatureIds()))
+    try:
+        stat = os.stat(layer.source().split('|')[0])
+        sourceVersion = (stat.st_mtime, stat.st_size)
+    except (OSError, ValueError):
+        sourceVersion = None
+    return (layer.source(), layer.subsetString(), layer.featureCount(), selection,
+            sourceVersion, ProcessingConfig.getSetting(ProcessingConfig.FILTER_INVALID_GEOMETRIES))
+
+
+def _connectLayer(layer):
+    # edits made in QGIS do not always change the source file, so the
+    # cached columns are discarded when the layer reports changes
+    layerId = layer.id()
+    if layerId in _connectedLayers:
+        return
+    _connectedLayers.add(layerId)
+
+    def invalidate(*args):
+        clearColumnCache(layerId)
+
+    def disconnect():
+        with _columnCacheLock:
+            _connectedLayers.discard(layerId)
+            _columnCache.pop(layerId, None)
+
+    layer.dataChanged.connect(invalidate)
+    layer.layerModified.connect(invalidate)
+    layer.willBeDeleted.connect(disconnect)
 
 
 def testForUniqueness(fieldList1, fieldList2):
@@ -352,12 +580,7 @@ def simpleMeasure(geom, method=0, ellips=None, crs=None):
 
 
 def getUniqueValues(layer, fieldIndex):
-    values = []
-    feats = features(layer)
-    for feat in feats:
-        if feat.attributes()[fieldIndex] not in values:
-            values.append(feat.attributes()[fieldIndex])
-    return values
+    return layerColumns(layer, fieldIndex)[fieldIndex].uniqueValues()
 
 
 def getUniqueValuesCount(layer, fieldIndex):
@@ -453,6 +676,106 @@ def checkMinDistance(point, index, distance, points):
     return True
 
 
+def clusterPoints(xs, ys, distance):
+    """Groups points which are at a distance smaller or equal than the
+    given one from any other point of the group.
+
+    Points are hashed to a grid whose cells have a diagonal equal to the
+    distance, so all the points in a cell belong to the same cluster and
+    only the points in nearby cells have to be compared. With a distance
+    of 0, only points with identical coordinates are grouped.
+
+    Returns a list with the cluster id of each point, and a list with
+    the number of points in each cluster. Cluster ids are numbered from
+    0, in the order in which the first point of each cluster is found.
+    """
+    parent = list(range(len(xs)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    cells = {}
+    cellSize = distance / math.sqrt(2)
+    for i in range(len(xs)):
+        if cellSize > 0:
+            key = (int(math.floor(xs[i] / cellSize)), int(math.floor(ys[i] / cellSize)))
+        else:
+            key = (xs[i], ys[i])
+        if key in cells:
+            cells[key].append(i)
+            parent[i] = cells[key][0]
+        else:
+            cells[key] = [i]
+
+    if cellSize > 0:
+        # points within the distance can be up to two cells away. Each
+        # pair of cells is checked once
+        sqrDistance = distance * distance
+        offsets = [(dx, dy) for dx in range(-2, 3) for dy in range(-2, 3) if (dx, dy) > (0, 0)]
+        for (cx, cy), members in list(cells.items()):
+            for dx, dy in offsets:
+                others = cells.get((cx + dx, cy + dy))
+                if others is None:
+                    continue
+                root, otherRoot = find(members[0]), find(others[0])
+                if root == otherRoot:
+                    continue
+                if any((xs[i] - xs[j]) ** 2 + (ys[i] - ys[j]) ** 2 <= sqrDistance
+                       for i in members for j in others):
+                    parent[otherRoot] = root
+
+    ids = {}
+    clusters = []
+    sizes = []
+    for i in range(len(xs)):
+        root = find(i)
+        if root not in ids:
+            ids[root] = len(sizes)
+            sizes.append(0)
+        clusters.append(ids[root])
+        sizes[ids[root]] += 1
+    return clusters, sizes
+
+
+def unionGeometries(geometries, partitionSize=None):
+    """Computes the union of a list of geometries.
+
+    Long lists are split into partitions of nearby geometries, using the
+    sort-tile-recursive packing of their bounding boxes. The union of each
+    partition is computed and the partial results are merged in the same
+    way until there are few enough of them to be merged at once.
+
+    Unions are computed one after the other: GEOS calls share a single
+    global context, so they must not run in several threads.
+    """
+    if partitionSize is None:
+        partitionSize = UNION_PARTITION_SIZE
+    while len(geometries) > partitionSize:
+        partitions = _strPartitions(geometries, partitionSize)
+        geometries = [QgsGeometry.unaryUnion(p) for p in partitions]
+    return QgsGeometry.unaryUnion(geometries)
+
+
+def _strPartitions(geometries, partitionSize):
+    centers = []
+    for geom in geometries:
+        center = geom.boundingBox().center()
+        centers.append((center.x(), center.y()))
+
+    nPartitions = int(math.ceil(len(geometries) / float(partitionSize)))
+    sliceSize = partitionSize * int(math.ceil(math.sqrt(nPartitions)))
+    byX = sorted(range(len(geometries)), key=lambda i: centers[i][0])
+    partitions = []
+    for start in range(0, len(byX), sliceSize):
+        byY = sorted(byX[start:start + sliceSize], key=lambda i: centers[i][1])
+        for first in range(0, len(byY), partitionSize):
+            partitions.append([geometries[i] for i in byY[first:first + partitionSize]])
+    return partitions
+
+
 def _toQgsField(f):
     if isinstance(f, QgsField):
         return f
@@ -624,6 +947,12 @@ class VectorWriter(object):
         self.isNotFileBased = False
         self.layer = None
         self.writer = None
+        self.db = None
+
+        # features are added to database outputs in batches
+        self.buffered = False
+        self.buffer = []
+        self.batchSize = max(1, int(ProcessingConfig.getSetting(ProcessingConfig.VECTOR_WRITER_BATCH_SIZE) or 1))
 
         if encoding is None:
             settings = QgsSettings()
@@ -645,6 +974,11 @@ class VectorWriter(object):
 
             self.layer = QgsVectorLayer(uri, self.destination, 'memory')
             self.writer = self.layer.dataProvider()
+
+            # Give the layer a unique destination, so it can be registered
+            # with dataobjects.registerLayer by the code handing it over to
+            # other algorithms (for instance, in a model)
+            self.destination = self.MEMORY_LAYER_PREFIX + self.layer.id()
         elif self.destination.startswith(self.POSTGIS_LAYER_PREFIX):
             self.isNotFileBased = True
             uri = QgsDataSourceUri(self.destination[len(self.POSTGIS_LAYER_PREFIX):])
@@ -681,6 +1015,18 @@ class VectorWriter(object):
 
             self.layer = QgsVectorLayer(uri.uri(), uri.table(), "postgres")
             self.writer = self.layer.dataProvider()
+            self.buffered = True
+
+            # features are loaded with COPY instead of the provider
+            self.db = db
+            self.table = uri.table().lower()
+            self.schema = uri.schema()
+            self.columns = [f.name() for f in fields]
+            if geometryType != QgsWkbTypes.NullGeometry:
+                self.srid = crs.authid().split(":")[-1]
+                self.columns.append('the_geom')
+            else:
+                self.srid = None
         elif self.destination.startswith(self.SPATIALITE_LAYER_PREFIX):
             self.isNotFileBased = True
             uri = QgsDataSourceUri(self.destination[len(self.SPATIALITE_LAYER_PREFIX):])
@@ -711,6 +1057,7 @@ class VectorWriter(object):
 
             self.layer = QgsVectorLayer(uri.uri(), uri.table(), "spatialite")
             self.writer = self.layer.dataProvider()
+            self.buffered = True
         else:
             formats = QgsVectorFileWriter.supportedFiltersAndFormats()
             OGRCodes = {}
@@ -748,34 +1095,203 @@ class VectorWriter(object):
                                               dataset_options, layer_options)
 
     def addFeature(self, feature):
-        if self.isNotFileBased:
+        if self.buffered:
+            self.buffer.append(QgsFeature(feature))
+            if len(self.buffer) >= self.batchSize:
+                self.flush()
+        elif self.isNotFileBased:
+            # memory layers are written at once, since algorithms might
+            # read them while the writer is still open
             self.writer.addFeatures([feature])
         else:
             self.writer.addFeature(feature)
 
+    def flush(self):
+        """Writes the buffered features to the output."""
+        if not self.buffer:
+            return
+        features = self.buffer
+        self.buffer = []
+        if self.db is not None:
+            self._copyToPostGIS(features)
+        else:
+            self.writer.addFeatures(features)
+
+    def close(self):
+        """Writes the pending features and finishes the output, raising
+        a GeoAlgorithmExecutionException if they can not be written.
+
+        Writers created with OutputVector.getVectorWriter() are closed by
+        GeoAlgorithm.execute() once the algorithm has been processed.
+        Writers are also closed when they are deleted, but then errors
+        can only be logged.
+        """
+        if self.writer is None:
+            return
+        self.flush()
+        if self.db is not None:
+            if ProcessingConfig.getSetting(ProcessingConfig.POSTGIS_OUTPUT_INDEX):
+                try:
+                    if self.srid is not None:
+                        self.db.create_spatial_index(self.table, self.schema)
+                    self.db.vacuum_analyze(self.table, self.schema)
+                except postgis.DbError as e:
+                    raise GeoAlgorithmExecutionException(
+                        'Error indexing output PostGIS table:\n%s' % e.message)
+            self.db.con.close()
+            self.db = None
+        # deleting the file writer closes the file
+        self.writer = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except GeoAlgorithmExecutionException as e:
+            ProcessingLog.addToLog(ProcessingLog.LOG_ERROR, e.msg)
+
+    def _copyToPostGIS(self, features):
+        rows = []
+        for f in features:
+            row = [_copyValue(v) for v in f.attributes()]
+            if self.srid is not None:
+                if f.hasGeometry():
+                    row.append('SRID=%s;%s' % (self.srid, f.geometry().exportToWkt()))
+                else:
+                    row.append(None)
+            rows.append(row)
+        try:
+            self.db.copy_rows(self.table, self.columns, rows, self.schema)
+        except postgis.DbError as e:
+            raise GeoAlgorithmExecutionException(
+                'Error writing to output PostGIS table:\n%s' % e.message)
+
+
+def _copyValue(value):
+    if value is None or (isinstance(value, QVariant) and value.isNull()):
+        return None
+    if isinstance(value, (QDate, QDateTime, QTime)):
+        return value.toString(Qt.ISODate)
+    return value
+
 
 class TableWriter(object):
+    """Writes records to a table.
+
+    The table is written as CSV by default, or as gzip compressed CSV if
+    the file name ends with .csv.gz. Other formats (such as GeoPackage or
+    Parquet) are written through OGR when the GDAL build supports them.
+    All values are written as strings.
+
+    The file is kept open until close() is called, or the writer is
+    deleted. The writer can be used as a context manager.
+    """
+
+    CHUNK_SIZE = 10000
+
+    OGR_DRIVERS = {
+        'gpkg': 'GPKG',
+        'sqlite': 'SQLite',
+        'xlsx': 'XLSX',
+        'ods': 'ODS',
+        'parquet': 'Parquet',
+        'arrow': 'Arrow',
+        'feather': 'Arrow',
+    }
 
     def __init__(self, fileName, encoding, fields):
         self.fileName = fileName
-        if not self.fileName.lower().endswith('csv'):
-            self.fileName += '.csv'
-
         self.encoding = encoding
         if self.encoding is None or encoding == 'System':
             self.encoding = 'utf-8'
 
-        with open(self.fileName, 'w', newline='', encoding=self.encoding) as f:
-            self.writer = csv.writer(f)
+        self.file = None
+        self.writer = None
+        self.dataset = None
+        self.layer = None
+        self.fields = None
+
+        extension = self.fileName[self.fileName.rfind('.') + 1:].lower()
+        if extension in self.OGR_DRIVERS:
+            driver = ogr.GetDriverByName(self.OGR_DRIVERS[extension])
+            if driver is None:
+                raise GeoAlgorithmExecutionException(
+                    'The {0} format is not supported by this GDAL version'.format(extension))
+            if os.path.exists(self.fileName):
+                driver.DeleteDataSource(self.fileName)
+            self.dataset = driver.CreateDataSource(self.fileName)
+            if self.dataset is None:
+                raise GeoAlgorithmExecutionException(
+                    'Could not create table {0}'.format(self.fileName))
+            name = os.path.splitext(os.path.basename(self.fileName))[0]
+            self.layer = self.dataset.CreateLayer(name, geom_type=ogr.wkbNone)
+            # without fields, the first record is used as header, as
+            # it happens when writing to CSV
             if len(fields) != 0:
-                self.writer.writerow(fields)
+                self._createFields(fields)
+            return
+
+        if self.fileName.lower().endswith('.csv.gz'):
+            self.file = gzip.open(self.fileName, 'wt', newline='', encoding=self.encoding)
+        else:
+            if not self.fileName.lower().endswith('csv'):
+                self.fileName += '.csv'
+            self.file = open(self.fileName, 'w', newline='', encoding=self.encoding)
+        self.writer = csv.writer(self.file)
+        if len(fields) != 0:
+            self.writer.writerow(fields)
 
     def addRecord(self, values):
-        with open(self.fileName, 'a', newline='', encoding=self.encoding) as f:
-            self.writer = csv.writer(f)
+        if self.writer is not None:
             self.writer.writerow(values)
+        else:
+            self._addOgrRecords([values])
 
     def addRecords(self, records):
-        with open(self.fileName, 'a', newline='', encoding=self.encoding) as f:
-            self.writer = csv.writer(f)
-            self.writer.writerows(records)
+        """Adds the records from a list or any other iterable, writing
+        them in chunks of CHUNK_SIZE records.
+        """
+        records = iter(records)
+        while True:
+            chunk = list(itertools.islice(records, self.CHUNK_SIZE))
+            if not chunk:
+                break
+            if self.writer is not None:
+                self.writer.writerows(chunk)
+            else:
+                self._addOgrRecords(chunk)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.writer = None
+        self.layer = None
+        self.dataset = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def _createFields(self, fields):
+        for field in fields:
+            self.layer.CreateField(ogr.FieldDefn(str(field), ogr.OFTString))
+        self.fields = [self.layer.GetLayerDefn().GetFieldDefn(i).GetName()
+                       for i in range(self.layer.GetLayerDefn().GetFieldCount())]
+
+    def _addOgrRecords(self, records):
+        self.layer.StartTransaction()
+        for values in records:
+            if self.fields is None:
+                self._createFields(values)
+                continue
+            feature = ogr.Feature(self.layer.GetLayerDefn())
+            for i, value in enumerate(values):
+                if i < len(self.fields) and value is not None:
+                    feature.SetField(i, str(value))
+            self.layer.CreateFeature(feature)
+        self.layer.CommitTransaction()